@@ -0,0 +1,36 @@
+"""Add work_calendar table
+
+Revision ID: 006_add_work_calendar
+Revises: 005_add_force_password_change
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_work_calendar'
+down_revision = '005_add_force_password_change'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the precomputed business-day/holiday calendar (filled by scripts/generate_work_calendar.py)."""
+    op.create_table(
+        'work_calendar',
+        sa.Column('calendar_date', sa.Date(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('is_working_day', sa.Boolean(), nullable=False),
+        sa.Column('holiday_name', sa.String(100), nullable=True),
+        sa.PrimaryKeyConstraint('calendar_date'),
+    )
+    op.create_index('idx_work_calendar_year_month', 'work_calendar', ['year', 'month'])
+
+
+def downgrade():
+    """Drop the work_calendar table."""
+    op.drop_index('idx_work_calendar_year_month', table_name='work_calendar')
+    op.drop_table('work_calendar')
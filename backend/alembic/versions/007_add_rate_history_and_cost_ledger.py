@@ -0,0 +1,75 @@
+"""Add employee rate history and work log cost ledger
+
+Revision ID: 007_add_rate_history_and_cost_ledger
+Revises: 006_add_work_calendar
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_rate_history_and_cost_ledger'
+down_revision = '006_add_work_calendar'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create employee_rates and work_log_costs; seed rate history from current employee rates.
+
+    The ledger itself is filled by scripts/rebuild_cost_ledger.py after upgrading.
+    """
+    op.create_table(
+        'employee_rates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('hourly_rate', sa.Float(), nullable=False),
+        sa.Column('overtime_rate', sa.Float(), nullable=True),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('employee_id', 'effective_from', name='unique_employee_rate_effective_from'),
+    )
+    op.create_index('idx_employee_rates_employee_id', 'employee_rates', ['employee_id'])
+
+    op.create_table(
+        'work_log_costs',
+        sa.Column('work_log_id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('work_date', sa.Date(), nullable=False),
+        sa.Column('hourly_rate', sa.Float(), nullable=False),
+        sa.Column('overtime_rate', sa.Float(), nullable=False),
+        sa.Column('base_cost', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('overtime_cost', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('total_cost', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['work_log_id'], ['work_logs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('work_log_id'),
+    )
+    op.create_index('idx_work_log_costs_employee_id', 'work_log_costs', ['employee_id'])
+    op.create_index('idx_work_log_costs_work_date', 'work_log_costs', ['work_date'])
+
+    # Existing rates become the first history entry, effective from the employee's creation
+    op.execute(
+        """
+        INSERT INTO employee_rates (employee_id, hourly_rate, overtime_rate, effective_from)
+        SELECT id, hourly_rate, overtime_rate, COALESCE(CAST(created_at AS DATE), CURRENT_DATE)
+        FROM employees
+        WHERE hourly_rate IS NOT NULL
+        """
+    )
+
+
+def downgrade():
+    """Drop the cost ledger and rate history."""
+    op.drop_index('idx_work_log_costs_work_date', table_name='work_log_costs')
+    op.drop_index('idx_work_log_costs_employee_id', table_name='work_log_costs')
+    op.drop_table('work_log_costs')
+    op.drop_index('idx_employee_rates_employee_id', table_name='employee_rates')
+    op.drop_table('employee_rates')
@@ -0,0 +1,144 @@
+"""Boot routine: schema check against the Alembic head, one-time seeding, timings.
+
+Runs once per deployment unit: in the gunicorn master (gunicorn.conf.py),
+or in the startup hook when the app is served some other way. It replaces
+``create_all`` plus the admin bootstrap on every boot:
+
+* schema: the revisions in ``alembic_version`` are compared with the heads
+  of alembic/versions, which is one catalog lookup and one query. BOOT_SCHEMA
+  selects what happens on a mismatch. ``verify`` (the default in production)
+  refuses to start until ``alembic upgrade heads`` has run. ``create``
+  (the default elsewhere) falls back to ``create_all`` for local databases.
+  ``skip`` does no check.
+* seed: the default admin is looked up with one indexed query. Only when it
+  is missing is it created (and its password hashed), under a PostgreSQL
+  advisory lock so that concurrently starting instances create it once.
+
+Phase durations are logged and reported under ``boot`` in /api/metrics.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, Optional
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database import Base, engine
+from app.models import User
+
+logger = logging.getLogger("app")
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+_production = os.getenv("NODE_ENV", os.getenv("APP_ENV", "development")) == "production"
+BOOT_SCHEMA = os.getenv("BOOT_SCHEMA", "verify" if _production else "create")
+# pg_advisory_xact_lock key serialising one-time seeding across instances
+BOOT_LOCK_KEY = 0x776F726B
+
+
+@dataclass
+class BootReport:
+    schema: str = "not run"
+    seeded: bool = False
+    phases_ms: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def stats(self) -> Dict:
+        return {
+            "schema": self.schema,
+            "seeded": self.seeded,
+            "phases_ms": dict(self.phases_ms),
+            "total_ms": round(sum(self.phases_ms.values()), 2),
+        }
+
+
+_last_report = BootReport()
+
+
+def boot_stats() -> Dict:
+    """Timings of the boot this process ran or inherited from the gunicorn master."""
+    return _last_report.stats()
+
+
+@lru_cache(maxsize=1)
+def expected_heads() -> FrozenSet[str]:
+    """Head revisions of alembic/versions."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(str(_BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(_BACKEND_DIR / "alembic"))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+def current_revisions(conn: Connection) -> FrozenSet[str]:
+    if not inspect(conn).has_table("alembic_version"):
+        return frozenset()
+    return frozenset(conn.scalars(text("SELECT version_num FROM alembic_version")))
+
+
+def check_schema(conn: Connection, mode: str = BOOT_SCHEMA) -> str:
+    """Compare the database with the Alembic heads; returns the outcome for the report."""
+    if mode == "skip":
+        return "skipped"
+    current, expected = current_revisions(conn), expected_heads()
+    if current == expected:
+        return "up to date"
+    found = ", ".join(sorted(current)) or "no alembic_version"
+    if mode == "verify":
+        raise RuntimeError(
+            f"Database schema is at {found}, expected {', '.join(sorted(expected))}; run `alembic upgrade heads`"
+        )
+    logger.warning("Database schema is at %s, not at the Alembic heads; creating missing tables", found)
+    Base.metadata.create_all(bind=conn)
+    conn.commit()
+    return "created"
+
+
+def seed(bind: Engine) -> bool:
+    """Create the default admin if it doesn't exist; True if this call created it."""
+    from init_db import DEFAULT_ADMIN_USERNAME, init_database
+
+    with bind.connect() as conn:
+        if conn.execute(select(User.id).where(User.username == DEFAULT_ADMIN_USERNAME)).first():
+            return False
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Held until this transaction ends; other instances wait, then find the admin
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BOOT_LOCK_KEY})
+        with Session(bind=conn) as db:
+            return init_database(db)
+
+
+def boot(bind: Optional[Engine] = None, schema_mode: str = BOOT_SCHEMA) -> BootReport:
+    """Check the schema and seed the database, recording how long each phase took."""
+    bind = bind if bind is not None else engine
+    report = BootReport()
+    with report.phase("connect"):
+        conn = bind.connect()
+    try:
+        with report.phase("schema"):
+            report.schema = check_schema(conn, schema_mode)
+    finally:
+        conn.close()
+    with report.phase("seed"):
+        report.seeded = seed(bind)
+    logger.info(
+        "Boot finished in %.1f ms (schema %s; %s)", sum(report.phases_ms.values()), report.schema,
+        ", ".join(f"{name} {ms:.1f} ms" for name, ms in report.phases_ms.items()),
+    )
+    global _last_report
+    _last_report = report
+    return report
@@ -0,0 +1,227 @@
+"""Binary output formats for analytics clients: Apache Arrow IPC streams and MessagePack.
+
+BI tools that pull large result sets spend most of their time parsing
+JSON. Endpoints that support it negotiate the format from the Accept
+header (``response_format``) or take it as an explicit ``format``
+parameter:
+
+* ``application/vnd.apache.arrow.stream`` is an Arrow IPC stream with one
+  record batch per cursor batch. It loads without copying into
+  pyarrow/pandas/polars.
+* ``application/msgpack`` is a sequence of MessagePack maps, one per row.
+  Read it with ``msgpack.Unpacker``.
+
+Rows are fetched from a server-side cursor (sync or async engine) in
+batches and encoded batch by batch, so neither the rows nor the encoded body are held in memory in
+full. Numeric columns are cast to float in SQL. Dates and datetimes keep
+their Arrow types and are sent as ISO strings in MessagePack.
+
+pyarrow and msgpack are imported on first use, so workers that never
+serve these formats don't pay for them. When a package is missing, the
+format is not offered and asking for it explicitly returns 406.
+"""
+import importlib
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.services.executors import executors
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+MEDIA_TYPES = {"arrow": ARROW_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+_ACCEPTED = {
+    "application/json": "json",
+    "application/*": "json",
+    "*/*": "json",
+    ARROW_MEDIA_TYPE: "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+_PACKAGES = {"arrow": "pyarrow", "msgpack": "msgpack"}
+
+# Rows fetched from the cursor, and encoded, per batch
+BATCH_SIZE = 5000
+
+# (name, kind) pairs; kind is one of int, float, str, date, datetime
+Fields = Sequence[Tuple[str, str]]
+
+
+def _module(fmt: str):
+    """Import the package behind a binary format, or answer 406 if it isn't installed."""
+    try:
+        return importlib.import_module(_PACKAGES[fmt])
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"{MEDIA_TYPES[fmt]} output requires the {_PACKAGES[fmt]} package on the server",
+        )
+
+
+def _available(fmt: str) -> bool:
+    if fmt == "json":
+        return True
+    try:
+        _module(fmt)
+    except HTTPException:
+        return False
+    return True
+
+
+def response_format(request: Request, response: Response) -> str:
+    """Dependency: "json", "arrow" or "msgpack", negotiated from the Accept header."""
+    response.headers.add_vary_header("Accept")
+    accept = request.headers.get("accept")
+    if not accept:
+        return "json"
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, media_type.strip().lower()))
+    # Highest quality first, then in the client's order
+    for _, _, media_type in sorted(ranges):
+        fmt = _ACCEPTED.get(media_type)
+        if fmt is not None and _available(fmt):
+            return fmt
+    raise HTTPException(
+        status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        detail="Supported media types: application/json, "
+               + ", ".join(MEDIA_TYPES[fmt] for fmt in MEDIA_TYPES if _available(fmt)),
+    )
+
+
+def batched(rows: Iterable, size: int = BATCH_SIZE) -> Iterator[List]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_cursor_batches(bind, stmt, size: int = BATCH_SIZE) -> Iterator[List]:
+    """Rows of `stmt` in batches from a server-side cursor, on a connection of its own.
+
+    Streaming bodies are sent after the request-scoped session is closed.
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=size).execute(stmt)
+        yield from result.partitions()
+
+
+async def aiter_cursor_batches(bind: AsyncEngine, stmt, size: int = BATCH_SIZE) -> AsyncIterator[List]:
+    """``iter_cursor_batches`` on an async engine."""
+    async with bind.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=size))
+        async for rows in result.partitions(size):
+            yield rows
+
+
+def _arrow_schema(pa, fields: Fields, metadata: Optional[Dict[str, str]]):
+    types = {
+        "int": pa.int64(), "float": pa.float64(), "str": pa.string(),
+        "date": pa.date32(), "datetime": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in fields], metadata=metadata)
+
+
+class ArrowEncoder:
+    """Encodes batches of row tuples (in `fields` order) or dicts as an Arrow IPC stream."""
+
+    def __init__(self, fields: Fields, metadata: Optional[Dict[str, str]] = None):
+        self._pa = _module("arrow")
+        self._schema = _arrow_schema(self._pa, fields, metadata)
+        self._sink = io.BytesIO()
+        self._writer = self._pa.ipc.new_stream(self._sink, self._schema)
+
+    def write(self, rows: List) -> bytes:
+        pa, schema = self._pa, self._schema
+        if rows and isinstance(rows[0], dict):
+            batch = pa.RecordBatch.from_pylist(rows, schema=schema)
+        else:
+            columns = list(zip(*rows)) if rows else [()] * len(schema)
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+            )
+        self._writer.write_batch(batch)
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        chunk = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return chunk
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not MessagePack serializable: {type(value).__name__}")
+
+
+class MsgpackEncoder:
+    """Encodes batches of row tuples (in `fields` order) or dicts as a sequence of MessagePack maps."""
+
+    def __init__(self, fields: Fields, metadata: Optional[Dict[str, str]] = None):
+        self._packer = _module("msgpack").Packer(default=_msgpack_default)
+        self._names = [name for name, _ in fields]
+
+    def write(self, rows: List) -> bytes:
+        return b"".join(
+            self._packer.pack(row if isinstance(row, dict) else dict(zip(self._names, row))) for row in rows
+        )
+
+    def close(self) -> bytes:
+        return b""
+
+
+_ENCODERS = {"arrow": ArrowEncoder, "msgpack": MsgpackEncoder}
+
+
+def encode(fmt: str, fields: Fields, batches: Iterable[List],
+           metadata: Optional[Dict[str, str]] = None) -> Iterator[bytes]:
+    """Body chunks of `batches` in a binary format ("arrow" or "msgpack")."""
+    # Created now, so a missing package is a 406 rather than a broken stream
+    encoder = _ENCODERS[fmt](fields, metadata)
+
+    def chunks():
+        for rows in batches:
+            yield encoder.write(rows)
+        yield encoder.close()
+    return chunks()
+
+
+def encode_async(fmt: str, fields: Fields, batches: AsyncIterable[List],
+                 metadata: Optional[Dict[str, str]] = None) -> AsyncIterator[bytes]:
+    """``encode`` for async batches; each batch is encoded on the reporting executor, off the event loop.
+
+    Batches are submitted unbounded, as the response has started by then;
+    check the executor's capacity before returning the response.
+    """
+    encoder = _ENCODERS[fmt](fields, metadata)
+
+    async def chunks():
+        async for rows in batches:
+            yield await executors["reporting"].run(encoder.write, rows, bounded=False)
+        yield encoder.close()
+    return chunks()
@@ -1,6 +1,195 @@
-"""Shared rate limiter instance used by the app and individual route handlers."""
+"""Shared rate limiter instance used by the app and individual route handlers.
+
+Counters live in Redis when it is configured, so limits hold across uvicorn
+workers and containers and survive restarts. The storage is chosen by
+RATE_LIMIT_STORAGE_URI; without it, REDIS_HOST/REDIS_PORT/REDIS_DB/
+REDIS_PASSWORD build a ``failover+redis://`` URI, and without those the
+counters are per process (``memory://``).
+"""
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from limits import parse
+from limits.storage import MemoryStorage, Storage, storage_from_string
+from limits.storage.base import MovingWindowSupport, SlidingWindowCounterSupport
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from app.middleware.auth import token_user_id
+
+logger = logging.getLogger("app.limiter")
+
+
+class FailoverStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport):
+    """Redis-backed limits storage that counts locally while Redis is unreachable.
+
+    Registered for ``failover+redis://``, ``failover+rediss://`` and
+    ``failover+redis+unix://``; the URI without the ``failover+`` prefix is
+    handed to the limits Redis storage, whose sliding-window and
+    moving-window operations are atomic Lua scripts. After a Redis error all
+    calls go to an in-memory storage for ``retry_interval`` seconds, then
+    Redis is tried again. Local counts are not merged back on recovery.
+    """
+
+    STORAGE_SCHEME = ["failover+redis", "failover+rediss", "failover+redis+unix"]
+
+    def __init__(self, uri: str, retry_interval: float = 5.0, **options):
+        super().__init__(uri)
+        self.primary = storage_from_string(uri.split("+", 1)[1], **options)
+        self.fallback = MemoryStorage()
+        self.retry_interval = retry_interval
+        self.failovers = 0
+        self._failed_at: Optional[float] = None
+
+    @property
+    def base_exceptions(self):
+        return self.primary.base_exceptions
+
+    @property
+    def degraded(self) -> bool:
+        return self._failed_at is not None
+
+    def _call(self, method: str, *args, **kwargs):
+        failed_at = self._failed_at
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_interval:
+            return getattr(self.fallback, method)(*args, **kwargs)
+        try:
+            result = getattr(self.primary, method)(*args, **kwargs)
+        except self.primary.base_exceptions as exc:
+            if failed_at is None:
+                self.failovers += 1
+                logger.warning("Rate limit storage unreachable, counting locally: %s", exc)
+            self._failed_at = time.monotonic()
+            return getattr(self.fallback, method)(*args, **kwargs)
+        if failed_at is not None:
+            self._failed_at = None
+            logger.info("Rate limit storage recovered")
+        return result
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._call("incr", key, expiry, amount=amount)
+
+    def get(self, key: str) -> int:
+        return self._call("get", key)
+
+    def get_expiry(self, key: str) -> float:
+        return self._call("get_expiry", key)
+
+    def check(self) -> bool:
+        try:
+            return self.primary.check()
+        except self.primary.base_exceptions:
+            return False
+
+    def reset(self) -> Optional[int]:
+        self.fallback.reset()
+        return self._call("reset")
+
+    def clear(self, key: str) -> None:
+        self.fallback.clear(key)
+        self._call("clear", key)
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        return self._call("acquire_entry", key, limit, expiry, amount=amount)
+
+    def get_moving_window(self, key: str, limit: int, expiry: int):
+        return self._call("get_moving_window", key, limit, expiry)
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        return self._call("acquire_sliding_window_entry", key, limit, expiry, amount=amount)
+
+    def get_sliding_window(self, key: str, expiry: int):
+        return self._call("get_sliding_window", key, expiry)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        self.fallback.clear_sliding_window(key, expiry)
+        self._call("clear_sliding_window", key, expiry)
+
+
+def _storage_uri() -> str:
+    uri = os.getenv("RATE_LIMIT_STORAGE_URI")
+    if uri:
+        return uri
+    host = os.getenv("REDIS_HOST")
+    if not host:
+        return "memory://"
+    password = os.getenv("REDIS_PASSWORD")
+    credentials = f":{quote(password, safe='')}@" if password else ""
+    port = os.getenv("REDIS_PORT", "6379")
+    db = os.getenv("REDIS_DB", "0")
+    return f"failover+redis://{credentials}{host}:{port}/{db}"
+
+
+def _storage_options(uri: str) -> Dict:
+    if not uri.startswith("failover+"):
+        return {}
+    # Keep a slow or dead Redis from stalling requests
+    timeout = float(os.getenv("RATE_LIMIT_STORAGE_TIMEOUT", "0.5"))
+    return {
+        "retry_interval": float(os.getenv("RATE_LIMIT_STORAGE_RETRY_SECONDS", "5")),
+        "socket_connect_timeout": timeout,
+        "socket_timeout": timeout,
+    }
+
+
+def get_rate_limit_key(request: Request) -> str:
+    """Count authenticated requests per user, the rest per client IP.
+
+    Users behind one NAT address would otherwise share a single budget.
+    Tokens already in the principal cache skip the JWT signature check.
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = token_user_id(token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return get_remote_address(request)
+
+
+_STORAGE_URI = _storage_uri()
+
+# Global rate limiter: 100 requests per minute per user, or per IP when
+# unauthenticated (default for all API routes)
+DEFAULT_RATE_LIMIT = "100/minute"
+limiter = Limiter(
+    key_func=get_rate_limit_key,
+    default_limits=[DEFAULT_RATE_LIMIT],
+    strategy=os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter"),
+    storage_uri=_STORAGE_URI,
+    storage_options=_storage_options(_STORAGE_URI),
+    key_prefix="worklog",
+)
+
+
+def charge(request: Request, scope: str, cost: int, limit: str = DEFAULT_RATE_LIMIT) -> None:
+    """Count `cost` requests against the caller's `limit` for `scope`, or answer 429.
+
+    For endpoints that do the work of several requests (POST /api/batch),
+    which the per-route default limit would count once.
+    """
+    if not limiter.enabled or cost <= 0:
+        return
+    item = parse(limit)
+    key = get_rate_limit_key(request)
+    if not limiter.limiter.hit(item, key, scope, cost=cost):
+        reset_at, _ = limiter.limiter.get_window_stats(item, key, scope)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: {limit}",
+            headers={"Retry-After": str(max(1, math.ceil(reset_at - time.time())))},
+        )
+
 
-# Global rate limiter: 100 requests per minute per IP (default for all API routes)
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
+def rate_limit_stats() -> Dict:
+    storage = limiter._storage
+    stats = {"storage": type(storage).__name__}
+    if isinstance(storage, FailoverStorage):
+        stats.update({"degraded": storage.degraded, "failovers": storage.failovers})
+    return stats
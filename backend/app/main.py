@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -19,13 +18,20 @@ from app.routes import notifications as notifications_router_module
 from app.routes import search as search_router_module
 from app.routes import audit as audit_router_module
 from app.routes import settings as settings_router_module
-from app.database import engine, Base
+from app.routes import metrics as metrics_router_module
+from app.routes import batch as batch_router_module
+from app.boot import boot
+from app.database import replicas
 from app.middleware.security import (
     SecurityHeadersMiddleware,
     HttpsEnforcementMiddleware,
     SecurityLoggingMiddleware,
 )
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.middleware.read_routing import ReadRoutingMiddleware
 from app.limiter import limiter
+from app.services.executors import configure_interactive_pool
 from config.security import validate_all, get_allowed_origins
 from utils.logger import get_logger
 
@@ -45,13 +51,15 @@ app = FastAPI(
 # --- Middleware (order matters: first added = outermost wrapper) ---
 
 # CORS — outermost so its headers are set last and not overwritten by inner middleware
-app.add_middleware(
-    CORSMiddleware,
+_cors_options = dict(
     allow_origins=get_allowed_origins(),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the client honour 429/503 back-off
+    expose_headers=["Retry-After"],
 )
+app.add_middleware(CORSMiddleware, **_cors_options)
 
 # Security headers — inner to CORS so it doesn't overwrite CORS preflight headers
 app.add_middleware(SecurityHeadersMiddleware)
@@ -63,14 +71,24 @@ app.add_middleware(HttpsEnforcementMiddleware, force_https=_force_https)
 # Security event logging
 app.add_middleware(SecurityLoggingMiddleware)
 
-# GZip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Compression (zstd/br/gzip by Accept-Encoding; skips already-compressed media)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000")))
 
 # Rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
+# Read-only requests may read from DATABASE_REPLICA_URLS
+if replicas:
+    app.add_middleware(ReadRoutingMiddleware)
+
+# Adaptive concurrency limit — added last so it wraps everything and sheds
+# excess requests with 503 before any other work is done for them; the 503
+# gets the CORS and security headers from the middleware itself
+if os.getenv("CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true":
+    app.add_middleware(ConcurrencyLimitMiddleware, cors=_cors_options)
+
 # Include routers
 app.include_router(employees.router, prefix="/api/employees", tags=["employees"])
 app.include_router(work_logs.router, prefix="/api/work-logs", tags=["work-logs"])
@@ -85,6 +103,8 @@ app.include_router(notifications_router_module.router, prefix="/api/notification
 app.include_router(search_router_module.router, prefix="/api/search", tags=["search"])
 app.include_router(audit_router_module.router, prefix="/api/audit", tags=["audit"])
 app.include_router(settings_router_module.router, prefix="/api/settings", tags=["settings"])
+app.include_router(metrics_router_module.router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(batch_router_module.router, prefix="/api/batch", tags=["batch"])
 
 @app.get("/")
 async def root():
@@ -106,9 +126,10 @@ async def generic_error_handler(request: Request, exc: Exception):
         return JSONResponse(status_code=500, content={"detail": "Internal server error"})
     return JSONResponse(status_code=500, content={"detail": str(exc)})
 
-# Create tables on startup (for development - use Alembic for production)
 @app.on_event("startup")
 async def startup():
-    Base.metadata.create_all(bind=engine)
-    from init_db import init_database
-    init_database()
+    configure_interactive_pool()
+    replicas.start()
+    # The production launcher (gunicorn.conf.py) boots once in the master instead
+    if os.getenv("RUN_STARTUP_INIT", "true").lower() == "true":
+        boot()
@@ -0,0 +1,122 @@
+"""Cost-weighted admission control for expensive endpoints.
+
+Every authenticated user has a token bucket. Routes declare what a request
+costs (a PDF far more than a search) through the ``admit`` dependency, and a
+request that cannot be paid for is rejected with 429 and a Retry-After
+telling the client when enough tokens will have refilled. Buckets live in
+process memory, like the CPU they protect, so each worker admits
+independently.
+"""
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.middleware.auth import get_current_user
+from app.middleware.principal_cache import Principal
+
+# Token cost of one request per kind of work
+ADMISSION_COSTS: Dict[str, float] = {
+    "search": 1,
+    "report": 2,
+    "export": 10,
+    "pdf": 10,
+    "backup": 30,
+}
+
+
+class TokenBucketAdmission:
+    """Per-key token buckets holding up to `capacity` tokens, refilled continuously."""
+
+    def __init__(self, capacity: float, refill_per_second: float, max_buckets: int = 10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_buckets = max_buckets
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.admitted: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def _level(self, key: int, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.capacity
+        tokens, updated = bucket
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def try_acquire(self, key: int, cost: float, kind: str = "") -> Optional[float]:
+        """Take `cost` tokens from a bucket; returns None if admitted, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._level(key, now)
+            if tokens < cost:
+                self.rejected[kind] = self.rejected.get(kind, 0) + 1
+                if cost > self.capacity or self.refill_per_second <= 0:
+                    return math.inf
+                return (cost - tokens) / self.refill_per_second
+            self._buckets[key] = (tokens - cost, now)
+            self.admitted[kind] = self.admitted.get(kind, 0) + 1
+            if len(self._buckets) > self.max_buckets:
+                self._prune(now)
+            return None
+
+    def _prune(self, now: float) -> None:
+        # A full bucket is indistinguishable from a missing one
+        for key in [k for k in self._buckets if self._level(k, now) >= self.capacity]:
+            del self._buckets[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self.admitted.clear()
+            self.rejected.clear()
+
+    def stats(self, top: int = 10) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            levels = sorted((self._level(key, now), key) for key in self._buckets)
+            return {
+                "capacity": self.capacity,
+                "refill_per_second": self.refill_per_second,
+                "costs": ADMISSION_COSTS,
+                "buckets": len(self._buckets),
+                "admitted": dict(self.admitted),
+                "rejected": dict(self.rejected),
+                "lowest_buckets": [
+                    {"user_id": key, "tokens": round(tokens, 2)}
+                    for tokens, key in levels[:top] if tokens < self.capacity
+                ],
+            }
+
+
+admission = TokenBucketAdmission(
+    capacity=float(os.getenv("ADMISSION_BUCKET_CAPACITY", "60")),
+    refill_per_second=float(os.getenv("ADMISSION_REFILL_PER_SECOND", "1")),
+)
+
+
+def admit(kind: str, **by_format: str):
+    """Return a dependency charging the current user for a request of `kind`.
+
+    Keyword arguments select a different kind by the ``format`` query
+    parameter, e.g. ``admit("report", pdf="pdf")``.
+    """
+    def dependency(request: Request, current_user: Principal = Depends(get_current_user)) -> Principal:
+        charged = by_format.get(request.query_params.get("format", ""), kind)
+        retry_after = admission.try_acquire(current_user.id, ADMISSION_COSTS[charged], charged)
+        if retry_after is not None:
+            if math.isinf(retry_after):
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Request exceeds the admission budget",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many expensive requests, retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        return current_user
+    return dependency
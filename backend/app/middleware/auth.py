@@ -1,42 +1,92 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from sqlalchemy.orm import Session
 import os
+from typing import Optional
 
 from app.database import get_db
 from app.models import User
+from app.middleware.principal_cache import Principal, principal_cache
+from app.services.token_revocation import token_revocation
 
 security = HTTPBearer()
 
+# Scope key under which POST /api/batch hands its verified (token, principal) to sub-requests
+BATCH_PRINCIPAL_KEY = "app.batch_principal"
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify a JWT and return its payload; raises jwt.InvalidTokenError."""
+    secret_key = os.getenv("JWT_SECRET", "your-super-secret-jwt-key-change-in-production-min-32-chars")
+    algorithm = os.getenv("ALGORITHM", "HS256")
+    return jwt.decode(token, secret_key, algorithms=[algorithm])
+
+
+def token_user_id(token: str) -> Optional[int]:
+    """User id of a bearer token, None if it is invalid; cached tokens skip the signature check."""
+    principal = principal_cache.peek(token)
+    if principal is not None:
+        return principal.id
+    try:
+        return decode_access_token(token).get("id")
+    except jwt.InvalidTokenError:
+        return None
+
+
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """Validate JWT token and return the current user."""
+) -> Principal:
+    """Validate JWT token and return the current user.
+
+    Verified tokens are cached with their principal, so repeat requests skip
+    both the signature check and the users query; revocation is still
+    checked every time. Handlers that need to modify the user row must load
+    it through their own session. Sub-requests of a batch reuse the
+    principal the batch request was authenticated with.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
         detail="Invalid or expired token",
     )
+
+    batch_principal = request.scope.get(BATCH_PRINCIPAL_KEY)
+    if batch_principal is not None and batch_principal[0] == credentials.credentials:
+        return batch_principal[1]
+
+    cached = principal_cache.get(credentials.credentials)
+    if cached is not None:
+        principal, jti = cached
+        if jti is not None and token_revocation.is_revoked(db, jti):
+            raise credentials_exception
+        return principal
+
     try:
-        secret_key = os.getenv("JWT_SECRET", "your-super-secret-jwt-key-change-in-production-min-32-chars")
-        algorithm = os.getenv("ALGORITHM", "HS256")
-        payload = jwt.decode(credentials.credentials, secret_key, algorithms=[algorithm])
+        payload = decode_access_token(credentials.credentials)
         user_id: int = payload.get("id")
         if user_id is None:
             raise credentials_exception
     except jwt.InvalidTokenError:
         raise credentials_exception
 
+    # Tokens issued before revocation support have no jti
+    jti = payload.get("jti")
+    if jti is not None and token_revocation.is_revoked(db, jti):
+        raise credentials_exception
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(credentials.credentials, principal, token_exp=payload.get("exp"), jti=jti)
+    return principal
 
 
 def require_role(*allowed_roles: str):
     """Return a dependency that checks the current user has one of the allowed roles."""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,81 @@
+"""Conditional GETs: strong ETags from data versions, and per-route Cache-Control.
+
+A route opts in with ``dependencies=[conditional_get(...)]``. Before the
+handler runs, the dependency asks the database (on the async engine, so the
+check doesn't take a threadpool thread) for the version of the data
+the response is built from. A version is the row count, highest id and
+latest updated_at of each table involved, limited to the caller's data
+scope. That version, the caller's scope, the request path and query and
+the Accept header make up the ETag. A matching If-None-Match is answered
+with 304 straight away, so the handler's queries and the serialisation are
+skipped. Otherwise the ETag and the route's Cache-Control policy are added
+to the response.
+SecurityHeadersMiddleware keeps a route's Cache-Control and uses
+``no-store`` everywhere else.
+"""
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.middleware.scoping import DataScope, get_data_scope
+
+# Builds the query whose single row is the version
+VersionFn = Callable[[DataScope], Select]
+
+# Browsers keep the response but revalidate it on every use
+REVALIDATE = "private, no-cache"
+
+
+def table_version(model, scope_column=None) -> VersionFn:
+    """Version of a table with ``id`` and ``updated_at`` columns, optionally scoped by an employee id column."""
+    def version(scope: DataScope) -> Select:
+        stmt = select(func.count(model.id), func.max(model.id), func.max(model.updated_at))
+        if scope_column is not None:
+            stmt = scope.apply(stmt, scope_column)
+        return stmt
+    return version
+
+
+def _etag(request: Request, scope: DataScope, versions) -> str:
+    fingerprint = repr((
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        # Routes may negotiate the representation (app.formats)
+        request.headers.get("accept", ""),
+        scope.cache_key,
+        versions,
+    ))
+    return '"%s"' % hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def conditional_get(*versions: VersionFn, cache_control: str = REVALIDATE):
+    """Dependency answering If-None-Match with 304 for responses built from `versions`."""
+    async def check_etag(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        scope: DataScope = Depends(get_data_scope),
+    ) -> None:
+        # On a connection of its own, returned before the handler runs: sync routes
+        # would otherwise hold an async-pool connection next to their sync one
+        current = []
+        async with db.bind.connect() as conn:
+            for version in versions:
+                current.append(tuple((await conn.execute(version(scope))).one()))
+        etag = _etag(request, scope, tuple(current))
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if _matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    return Depends(check_etag)
@@ -0,0 +1,159 @@
+"""Single-flight coalescing of identical concurrent GET requests.
+
+When several requests for the same report or summary arrive while one is
+already being computed (a shared report link, a dashboard open in many
+tabs), they wait for that computation and share its result instead of
+running it again. Requests are identical when they hit the same handler
+with the same path and query parameters and the same data scope (see
+``app.middleware.scoping``); admins all share one scope. Results are not
+cached: once the computation finishes the next request runs it afresh.
+
+Coalescing is per process, like the work it saves.
+"""
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from fastapi import params
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+
+from app.middleware.scoping import DataScope
+from app.replicas import RoutingSession
+
+
+class RequestCoalescer:
+    """Runs at most one computation per key at a time; concurrent callers share it."""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # A disconnecting caller must not cancel the computation others wait for
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller went away
+
+    def reset(self) -> None:
+        self.executed = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict:
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalescing_ratio": round(self.coalesced / total, 4) if total else None,
+            "in_flight": len(self._in_flight),
+        }
+
+
+request_coalescer = RequestCoalescer()
+
+
+def _scope_key(value: Any) -> Hashable:
+    if isinstance(value, DataScope):
+        return value.cache_key
+    if isinstance(value, str):
+        # Dependencies resolving to plain values, e.g. the negotiated output format
+        return value
+    user_id = getattr(value, "id", None)
+    if user_id is None:
+        raise TypeError(f"Cannot derive a coalescing key from dependency {type(value).__name__}")
+    return ("user", user_id)
+
+
+def _param_key(value: Any) -> Hashable:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _own_session(db: Any) -> Any:
+    # Same bind and routing as the caller's session, but not closed with its request
+    if isinstance(db, AsyncSession):
+        sync = db.sync_session
+        return AsyncSession(bind=db.bind, sync_session_class=type(sync), autoflush=False,
+                            expire_on_commit=False, **_routing(sync))
+    return type(db)(bind=db.bind, autoflush=False, **_routing(db))
+
+
+def _routing(db: Session) -> Dict:
+    if isinstance(db, RoutingSession):
+        return {"replicas": db.replicas, "asynchronous": db.asynchronous}
+    return {}
+
+
+def _copy_response(result: Any) -> Any:
+    # Middleware edits raw_headers in place, so every caller needs its own list
+    if isinstance(result, Response):
+        copy = object.__new__(type(result))
+        copy.__dict__.update(result.__dict__)
+        copy.raw_headers = list(result.raw_headers)
+        return copy
+    return result
+
+
+def coalesce(handler: Callable):
+    """Share one in-flight execution of a GET handler between identical requests.
+
+    Place it below the route decorator (and above ``runs_on``). Handlers
+    must return plain data or a buffered Response, not ORM objects or a
+    StreamingResponse. The computation gets sessions of its own, on the
+    same bind as the caller's, since it may outlive the request that
+    started it. Sessions and the injected Response are ignored in the key;
+    other dependencies contribute the caller's data scope or user id, or
+    their value if it is a string.
+    """
+    signature = inspect.signature(handler)
+    dependencies = {
+        name for name, parameter in signature.parameters.items()
+        if isinstance(parameter.default, params.Depends)
+    }
+    is_async = inspect.iscoroutinefunction(handler)
+
+    @functools.wraps(handler)
+    async def wrapper(**kwargs):
+        key = (handler.__module__, handler.__qualname__) + tuple(sorted(
+            (name, _scope_key(value) if name in dependencies else _param_key(value))
+            for name, value in kwargs.items()
+            if not isinstance(value, (Session, AsyncSession, Response))
+        ))
+
+        async def compute():
+            sessions = {
+                name: _own_session(value) for name, value in kwargs.items()
+                if isinstance(value, (Session, AsyncSession))
+            }
+            try:
+                if is_async:
+                    result = await handler(**{**kwargs, **sessions})
+                else:
+                    result = await run_in_threadpool(handler, **{**kwargs, **sessions})
+            finally:
+                for db in sessions.values():
+                    if isinstance(db, AsyncSession):
+                        await db.close()
+                    else:
+                        await run_in_threadpool(db.close)
+            if isinstance(result, StreamingResponse):
+                raise TypeError("Streaming responses cannot be coalesced")
+            return result
+
+        return _copy_response(await request_coalescer.run(key, compute))
+    return wrapper
@@ -0,0 +1,308 @@
+"""Response compression negotiated between zstd, Brotli and gzip.
+
+Replaces Starlette's GZipMiddleware, which gzips every response over
+``minimum_size``, including payloads that are already compressed. The
+codec is picked from the client's Accept-Encoding by server preference
+(zstd, then br, then gzip), so modern browsers get a better ratio for less
+CPU. zstd and Brotli are used when their packages are installed. Without
+them, gzip is used.
+
+Already-compressed media (PDF reports, tar.gz backups, xlsx exports,
+images and archives) pass through untouched. Streaming responses are
+compressed chunk by chunk. Compressed bodies of cacheable responses, i.e.
+those with an ETag and no ``no-store`` (see app.middleware.caching), are
+kept in a small LRU keyed by ETag and codec. Repeated downloads of an
+unchanged list then skip compression. A body that is re-encoded gets a
+weak ETag (``W/"..."``); others keep theirs. A 304 carries the ETag in the
+form the client revalidates with, i.e. the one its 200 advertised.
+conditional_get matches weak tags.
+"""
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional codec
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional codec
+    zstandard = None
+
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Brotli 4-5 and zstd 3 beat gzip -6 on ratio at similar or lower CPU cost
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+_SKIP_MEDIA_TYPES = {
+    "application/pdf",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-tar",
+    "application/zip",
+    "application/x-7z-compressed",
+    "application/zstd",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+_SKIP_MEDIA_PREFIXES = ("image/", "audio/", "video/", "font/woff")
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    stream = _STREAMS[encoding]()
+    return stream.compress(body) + stream.flush()
+
+
+# Server preference order
+_STREAMS = {}
+if zstandard is not None:
+    _STREAMS["zstd"] = _ZstdStream
+if brotli is not None:
+    _STREAMS["br"] = _BrotliStream
+_STREAMS["gzip"] = _GzipStream
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred codec the client accepts (q > 0), or None for identity."""
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    for encoding in _STREAMS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type not in _SKIP_MEDIA_TYPES and not media_type.startswith(_SKIP_MEDIA_PREFIXES)
+
+
+def _weak(etag: str) -> str:
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def _revalidates_weak(scope: Scope, etag: str) -> bool:
+    if_none_match = Headers(scope=scope).get("if-none-match", "")
+    return _weak(etag) in {tag.strip() for tag in if_none_match.split(",")}
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (ETag, codec), bounded by total compressed size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: str, body: bytes) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((etag, encoding))
+            # The checksum guards against an ETag that missed a change in the data
+            if entry is not None and entry[:2] == (len(body), zlib.crc32(body)):
+                self._entries.move_to_end((etag, encoding))
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, etag: str, encoding: str, body: bytes, compressed: bytes) -> None:
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((etag, encoding), None)
+            if previous is not None:
+                self.size -= len(previous[2])
+            self._entries[(etag, encoding)] = (len(body), zlib.crc32(body), compressed)
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+compressed_cache = CompressedBodyCache(int(float(os.getenv("COMPRESSION_CACHE_MB", "32")) * 1024 * 1024))
+
+_counters_lock = threading.Lock()
+_counters = {"responses": {encoding: 0 for encoding in _STREAMS}, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _count(encoding: Optional[str], bytes_in: int = 0, bytes_out: int = 0) -> None:
+    with _counters_lock:
+        if encoding is None:
+            _counters["skipped"] += 1
+        else:
+            _counters["responses"][encoding] += 1
+            _counters["bytes_in"] += bytes_in
+            _counters["bytes_out"] += bytes_out
+
+
+def compression_stats() -> Dict:
+    with _counters_lock:
+        counters = {**_counters, "responses": dict(_counters["responses"])}
+    ratio = counters["bytes_out"] / counters["bytes_in"] if counters["bytes_in"] else None
+    return {
+        "codecs": list(_STREAMS),
+        **counters,
+        "ratio": round(ratio, 3) if ratio is not None else None,
+        "cache": compressed_cache.stats(),
+    }
+
+
+class CompressionMiddleware:
+    """Compress responses with the best codec the client accepts."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, cache: CompressedBodyCache = compressed_cache):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(raw=start["headers"])
+                if start["status"] == 304 and "etag" in headers:
+                    # Match the validator of the 200 this revalidates: weak if it was compressed
+                    if _revalidates_weak(scope, headers["etag"]):
+                        headers["ETag"] = _weak(headers["etag"])
+                    headers.add_vary_header("Accept-Encoding")
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is not None:
+                chunk = stream.compress(body) if body else b""
+                if not more_body:
+                    chunk += stream.flush()
+                if chunk or not more_body:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            if start["status"] in (204, 304) or not _compressible(headers):
+                passthrough = True
+                _count(None)
+                await send(start)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+
+            if more_body:
+                stream = _STREAMS[encoding]()
+                _count(encoding)
+                del headers["content-length"]
+                headers["Content-Encoding"] = encoding
+                if etag is not None:
+                    headers["ETag"] = _weak(etag)
+                await send(start)
+                chunk = stream.compress(body)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                return
+
+            if len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            cacheable = etag is not None and "no-store" not in headers.get("cache-control", "")
+            compressed = self.cache.get(etag, encoding, body) if cacheable else None
+            if compressed is None:
+                compressed = _compress(encoding, body)
+                if cacheable:
+                    self.cache.put(etag, encoding, body, compressed)
+            _count(encoding, len(body), len(compressed))
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            if etag is not None:
+                headers["ETag"] = _weak(etag)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,147 @@
+"""Adaptive concurrency limiting: shed excess load early instead of queueing it.
+
+Sync route handlers wait for AnyIO threadpool slots, so when the database
+slows down, requests queue there until they time out. This middleware caps
+the number of requests in flight and answers the excess immediately with
+503. The cap is adapted AIMD-style from a smoothed time to first byte. It
+grows by about one per window of requests while latency stays under
+CONCURRENCY_TARGET_LATENCY_MS and the cap is actually in use. It shrinks by
+a constant factor, at most once per latency window, when latency rises
+above the target. Reports (PDFs, exports) and backups take seconds by
+design; they count towards the limit but not towards the latency, which
+tracks the interactive endpoints.
+
+Shed responses carry the CORS and security headers themselves, since this
+middleware wraps the ones that would add them.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.security import SecurityHeadersMiddleware
+
+# Never limited or measured (liveness probes, CORS preflights)
+_EXEMPT_PATHS = {"/", "/health"}
+# Admitted into extra headroom above the limit
+_PRIORITY_PREFIXES = ("/api/auth/",)
+# Long-running by design; limited but left out of the latency average
+_UNSAMPLED_PREFIXES = ("/api/reports/", "/api/backups")
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD concurrency limit driven by an exponentially smoothed latency."""
+
+    def __init__(self, initial: float, min_limit: float, max_limit: float,
+                 target_latency: float, priority_headroom: int = 4,
+                 backoff: float = 0.9, smoothing: float = 0.1):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.priority_headroom = priority_headroom
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.admitted = 0
+        self.shed = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, priority: bool = False) -> bool:
+        with self._lock:
+            capacity = int(self.limit) + (self.priority_headroom if priority else 0)
+            if self.in_flight >= capacity:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency: Optional[float]) -> None:
+        """Finish a request; latency is None when no response was started."""
+        with self._lock:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if latency is None:
+                return
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += self.smoothing * (latency - self.latency_ewma)
+
+            if self.latency_ewma > self.target_latency:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.latency_ewma:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            elif in_flight >= self.limit / 2:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "in_flight": self.in_flight,
+                "latency_ewma_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+                "target_latency_ms": round(self.target_latency * 1000, 2),
+                "admitted": self.admitted,
+                "shed": self.shed,
+            }
+
+
+concurrency_limit = AdaptiveConcurrencyLimit(
+    initial=float(os.getenv("CONCURRENCY_LIMIT_INITIAL", "32")),
+    min_limit=float(os.getenv("CONCURRENCY_LIMIT_MIN", "4")),
+    max_limit=float(os.getenv("CONCURRENCY_LIMIT_MAX", "200")),
+    target_latency=float(os.getenv("CONCURRENCY_TARGET_LATENCY_MS", "500")) / 1000,
+    priority_headroom=int(os.getenv("CONCURRENCY_PRIORITY_HEADROOM", "4")),
+)
+
+
+class ConcurrencyLimitMiddleware:
+    """Admit requests under the adaptive limit and answer the rest with 503."""
+
+    def __init__(self, app: ASGIApp, limit: AdaptiveConcurrencyLimit = concurrency_limit,
+                 cors: Optional[Dict[str, Any]] = None):
+        """`cors` takes the app's CORSMiddleware options, applied to shed responses."""
+        self.app = app
+        self.limit = limit
+        self.overloaded: ASGIApp = SecurityHeadersMiddleware(JSONResponse(
+            status_code=503,
+            content={"detail": "Server is overloaded, please retry shortly"},
+            headers={"Retry-After": "1"},
+        ))
+        if cors is not None:
+            self.overloaded = CORSMiddleware(self.overloaded, **cors)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in _EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.limit.try_acquire(priority=scope["path"].startswith(_PRIORITY_PREFIXES)):
+            await self.overloaded(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        latency = None
+        sampled = not scope["path"].startswith(_UNSAMPLED_PREFIXES)
+
+        async def send_and_measure(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start" and sampled:
+                latency = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            self.limit.release(latency)
@@ -0,0 +1,137 @@
+"""In-process TTL/LRU cache of verified tokens and the user principal they resolve to."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by route handlers (no password hash, not bound to a session)."""
+    id: int
+    username: str
+    role: str
+    employee_id: Optional[int]
+    force_password_change: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            employee_id=user.employee_id,
+            force_password_change=bool(user.force_password_change),
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    """Maps a raw bearer token to its Principal (and jti) until the TTL or the token's exp passes.
+
+    A hit means the token string was already verified, so both the JWT
+    signature check and the users lookup are skipped. Entries are indexed by
+    user id so that role, password and account changes can drop them
+    immediately. Invalidation is per process; other workers converge within
+    the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal, Optional[str]]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Tuple[Principal, Optional[str]]]:
+        """Return (principal, jti) for a cached token."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal, jti = entry
+            if expires_at <= now:
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal, jti
+
+    def peek(self, token: str) -> Optional[Principal]:
+        """The cached principal for a token, without touching the hit/miss counters or LRU order."""
+        entry = self._entries.get(token)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, token: str, principal: Principal, token_exp: Optional[float] = None,
+            jti: Optional[str] = None) -> None:
+        """Cache a principal; token_exp is the JWT exp claim (Unix seconds), if any."""
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (time.monotonic() + ttl, principal, jti)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token of a user (role change, password change, deletion)."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def _remove(self, token: str) -> None:
+        _, principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60")),
+    max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+)
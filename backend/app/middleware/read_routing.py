@@ -0,0 +1,117 @@
+"""Marks read-only requests so their sessions may read from a replica (see app.replicas).
+
+GET and HEAD requests, and POST /api/batch (GET sub-requests only), are
+read-only unless the client recently wrote. A successful write pins the
+client's reads to the primary for REPLICA_STICKY_SECONDS, which should
+exceed the replicas' usual replication lag. The pin is kept in two places:
+
+* per user, for requests with a valid bearer token. This covers API clients
+  without a cookie jar. It lives in this worker's memory, like the
+  principal cache, so a read that another worker serves is not pinned.
+* in a cookie, which every worker honours. Browsers send it back only to
+  the same origin, or cross-origin with credentials (the frontend's
+  client sets ``withCredentials``).
+
+Clients with neither, e.g. cookie-less scripts spread over several
+workers, may read a replica that hasn't replayed their write yet.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.auth import token_user_id
+from app.replicas import read_only
+
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+STICKY_COOKIE = "db_primary_until"
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+_READ_ONLY_POSTS = {"/api/batch"}
+
+
+class PrimaryPins:
+    """Per-user deadlines until which reads go to the primary."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self._until)
+
+    def pin(self, user_id: int, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + seconds
+            if len(self._until) > self.max_entries:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+
+    def pinned(self, user_id: int) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+primary_pins = PrimaryPins()
+
+
+class ReadRoutingMiddleware:
+    def __init__(self, app: ASGIApp, sticky_seconds: int = REPLICA_STICKY_SECONDS,
+                 pins: PrimaryPins = primary_pins):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+        self.pins = pins
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        if method in _READ_METHODS or (method == "POST" and scope["path"] in _READ_ONLY_POSTS):
+            if self._sticky(scope):
+                await self.app(scope, receive, send)
+            else:
+                with read_only():
+                    await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.sticky_seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until}; Max-Age={self.sticky_seconds}; Path=/; HttpOnly; SameSite=Lax",
+                )
+                user_id = self._user_id(scope)
+                if user_id is not None:
+                    self.pins.pin(user_id, self.sticky_seconds)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+    def _sticky(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                until = cookie_parser(value.decode("latin-1")).get(STICKY_COOKIE, "")
+                if until.isdigit() and int(until) > time.time():
+                    return True
+        if self.pins:
+            user_id = self._user_id(scope)
+            return user_id is not None and self.pins.pinned(user_id)
+        return False
+
+    @staticmethod
+    def _user_id(scope: Scope) -> Optional[int]:
+        scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        return token_user_id(token)
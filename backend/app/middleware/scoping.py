@@ -0,0 +1,141 @@
+"""Row-level data scoping by role.
+
+Admins see every employee. Managers see the employees assigned to them in
+manager_employee_assignments, plus their own linked employee. Employees see
+only their own linked employee.
+
+List queries are scoped in SQL: ``DataScope.employee_filter`` returns a
+correlated EXISTS against manager_employee_assignments, which the database
+answers from the (manager_user_id, employee_id) unique index, so no id
+lists are built in Python. Single-record checks (``require_employee``, or
+``require_employee_async`` in handlers on the async engine) use a
+per-manager cached set of assigned ids instead of a query. routes/
+assignments.py invalidates that set on every write; other workers pick up
+changes within ASSIGNMENT_CACHE_TTL_SECONDS.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import exists, false, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import ManagerEmployeeAssignment
+from app.middleware.auth import get_current_user
+from app.middleware.principal_cache import Principal
+
+
+class AssignmentCache:
+    """Per-manager frozen sets of assigned employee ids, with a TTL."""
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._sets: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, manager_user_id: int) -> FrozenSet[int]:
+        employee_ids = self._cached(manager_user_id)
+        if employee_ids is None:
+            employee_ids = self._store(manager_user_id, db.scalars(self._query(manager_user_id)))
+        return employee_ids
+
+    async def get_async(self, db: AsyncSession, manager_user_id: int) -> FrozenSet[int]:
+        employee_ids = self._cached(manager_user_id)
+        if employee_ids is None:
+            employee_ids = self._store(manager_user_id, await db.scalars(self._query(manager_user_id)))
+        return employee_ids
+
+    @staticmethod
+    def _query(manager_user_id: int):
+        return select(ManagerEmployeeAssignment.employee_id).where(
+            ManagerEmployeeAssignment.manager_user_id == manager_user_id
+        )
+
+    def _cached(self, manager_user_id: int) -> Optional[FrozenSet[int]]:
+        entry = self._sets.get(manager_user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _store(self, manager_user_id: int, employee_ids) -> FrozenSet[int]:
+        employee_ids = frozenset(employee_ids)
+        with self._lock:
+            self._sets[manager_user_id] = (time.monotonic() + self.ttl_seconds, employee_ids)
+        return employee_ids
+
+    def invalidate(self, manager_user_id: int) -> None:
+        with self._lock:
+            self._sets.pop(manager_user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+
+
+assignment_cache = AssignmentCache(ttl_seconds=float(os.getenv("ASSIGNMENT_CACHE_TTL_SECONDS", "60")))
+
+
+@dataclass(frozen=True)
+class DataScope:
+    """The employees a user may see, expressible as SQL or checked per id."""
+    user_id: int
+    role: str
+    employee_id: Optional[int]
+
+    @property
+    def unrestricted(self) -> bool:
+        return self.role == "admin"
+
+    @property
+    def cache_key(self):
+        """Identifies the visible data: equal keys see the same rows."""
+        return "all" if self.unrestricted else (self.role, self.user_id, self.employee_id)
+
+    def employee_filter(self, column):
+        """SQL condition restricting an employee id column to this scope."""
+        if self.unrestricted:
+            return true()
+        own = column == self.employee_id if self.employee_id is not None else false()
+        if self.role != "manager":
+            return own
+        assigned = exists().where(
+            ManagerEmployeeAssignment.manager_user_id == self.user_id,
+            ManagerEmployeeAssignment.employee_id == column,
+        )
+        return or_(assigned, own)
+
+    def apply(self, query, column):
+        """Filter a Query or Select by an employee id column; a no-op for admins."""
+        if self.unrestricted:
+            return query
+        return query.filter(self.employee_filter(column))
+
+    def allows(self, db: Session, employee_id: int) -> bool:
+        if self.unrestricted or employee_id == self.employee_id:
+            return True
+        if self.role != "manager":
+            return False
+        return employee_id in assignment_cache.get(db, self.user_id)
+
+    async def allows_async(self, db: AsyncSession, employee_id: int) -> bool:
+        if self.unrestricted or employee_id == self.employee_id:
+            return True
+        if self.role != "manager":
+            return False
+        return employee_id in await assignment_cache.get_async(db, self.user_id)
+
+    def require_employee(self, db: Session, employee_id: int) -> None:
+        if not self.allows(db, employee_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+
+    async def require_employee_async(self, db: AsyncSession, employee_id: int) -> None:
+        if not await self.allows_async(db, employee_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+
+
+async def get_data_scope(current_user: Principal = Depends(get_current_user)) -> DataScope:
+    return DataScope(user_id=current_user.id, role=current_user.role, employee_id=current_user.employee_id)
@@ -1,9 +1,10 @@
 """Security middleware: security headers, HTTPS enforcement, and request logging."""
 import logging
 import os
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.requests import Request
-from starlette.responses import RedirectResponse, Response
+from starlette.responses import RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 security_logger = logging.getLogger("security")
 
@@ -54,56 +55,95 @@ def _build_csp() -> str:
 _CONTENT_SECURITY_POLICY: str = _build_csp()
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to every response (helmet.js equivalent)."""
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-
-        # Don't add security headers to CORS preflight responses
-        if request.method == "OPTIONS":
-            return response
+# The middleware below is plain ASGI rather than BaseHTTPMiddleware: headers
+# are edited on the http.response.start message, so bodies (including
+# StreamingResponse) pass through untouched and no extra task is spawned per
+# request.
 
-        for header, value in _BASE_SECURITY_HEADERS.items():
-            response.headers[header] = value
+_ENCODED_SECURITY_HEADERS = [
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in {**_BASE_SECURITY_HEADERS, "Content-Security-Policy": _CONTENT_SECURITY_POLICY}.items()
+]
+_ENCODED_SECURITY_HEADER_NAMES = {name for name, _ in _ENCODED_SECURITY_HEADERS}
+# Routes with a cache policy (app.middleware.caching) keep their Cache-Control
+_CACHE_HEADER_NAMES = {b"cache-control", b"pragma"}
+_ENCODED_CACHEABLE_HEADERS = [
+    (name, value) for name, value in _ENCODED_SECURITY_HEADERS if name not in _CACHE_HEADER_NAMES
+]
+_ENCODED_CACHEABLE_HEADER_NAMES = {name for name, _ in _ENCODED_CACHEABLE_HEADERS}
 
-        response.headers["Content-Security-Policy"] = _CONTENT_SECURITY_POLICY
 
-        return response
+class SecurityHeadersMiddleware:
+    """Add security headers to every response (helmet.js equivalent)."""
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-class HttpsEnforcementMiddleware(BaseHTTPMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Don't add security headers to CORS preflight responses
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                raw_headers = message.get("headers", ())
+                if any(name.lower() == b"cache-control" for name, _ in raw_headers):
+                    added, replaced = _ENCODED_CACHEABLE_HEADERS, _ENCODED_CACHEABLE_HEADER_NAMES
+                else:
+                    added, replaced = _ENCODED_SECURITY_HEADERS, _ENCODED_SECURITY_HEADER_NAMES
+                headers = [(name, value) for name, value in raw_headers if name.lower() not in replaced]
+                headers.extend(added)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class HttpsEnforcementMiddleware:
     """Redirect HTTP to HTTPS when FORCE_HTTPS=true."""
 
-    def __init__(self, app, force_https: bool = False):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, force_https: bool = False):
+        self.app = app
         self._force = force_https
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if self._force:
-            forwarded_proto = request.headers.get("x-forwarded-proto", "")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._force and scope["type"] == "http":
+            forwarded_proto = Headers(scope=scope).get("x-forwarded-proto", "")
             if forwarded_proto == "http":
-                url = request.url.replace(scheme="https")
-                return RedirectResponse(url=str(url), status_code=301)
-        return await call_next(request)
+                url = Request(scope).url.replace(scheme="https")
+                response = RedirectResponse(url=str(url), status_code=301)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
 
 
-class SecurityLoggingMiddleware(BaseHTTPMiddleware):
+class SecurityLoggingMiddleware:
     """Log security-relevant events (4xx/5xx responses with IP and path)."""
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-        status_code = response.status_code
-        if status_code in (401, 403, 429):
-            client_ip = _get_client_ip(request)
-            security_logger.warning(
-                "Security event: status=%d method=%s path=%s ip=%s",
-                status_code,
-                request.method,
-                request.url.path,
-                client_ip,
-            )
-        return response
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_log(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if status_code in (401, 403, 429):
+                    request = Request(scope)
+                    security_logger.warning(
+                        "Security event: status=%d method=%s path=%s ip=%s",
+                        status_code,
+                        request.method,
+                        request.url.path,
+                        _get_client_ip(request),
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_and_log)
 
 
 def _get_client_ip(request: Request) -> str:
@@ -10,9 +10,14 @@ from .backup_log import BackupLog
 from .notification import Notification
 from .audit_log import AuditLog
 from .setting import Setting
+from .work_calendar import WorkCalendarDay
+from .employee_rate import EmployeeRate
+from .work_log_cost import WorkLogCost
+from .revoked_token import RevokedToken
 
 __all__ = [
     "Employee", "WorkLog", "User", "Role", "ManagerEmployeeAssignment",
     "Project", "project_employees", "Backup", "BackupLog",
-    "Notification", "AuditLog", "Setting",
+    "Notification", "AuditLog", "Setting", "WorkCalendarDay",
+    "EmployeeRate", "WorkLogCost", "RevokedToken",
 ]
@@ -16,3 +16,5 @@ class Employee(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     work_logs = relationship("WorkLog", back_populates="employee", cascade="all, delete-orphan")
+    rates = relationship("EmployeeRate", back_populates="employee", cascade="all, delete-orphan",
+                         order_by="EmployeeRate.effective_from")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class EmployeeRate(Base):
+    __tablename__ = "employee_rates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
+    hourly_rate = Column(Float, nullable=False)
+    overtime_rate = Column(Float, nullable=True)
+    effective_from = Column(Date, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+    employee = relationship("Employee", back_populates="rates")
+
+    __table_args__ = (
+        UniqueConstraint('employee_id', 'effective_from', name='unique_employee_rate_effective_from'),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Boolean, Date, Index
+from app.database import Base
+
+
+class WorkCalendarDay(Base):
+    __tablename__ = "work_calendar"
+
+    calendar_date = Column(Date, primary_key=True)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    is_working_day = Column(Boolean, nullable=False)
+    holiday_name = Column(String(100), nullable=True)
+
+    __table_args__ = (
+        Index("idx_work_calendar_year_month", "year", "month"),
+    )
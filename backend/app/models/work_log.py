@@ -20,6 +20,7 @@ class WorkLog(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     employee = relationship("Employee", back_populates="work_logs")
+    cost = relationship("WorkLogCost", back_populates="work_log", uselist=False, cascade="all, delete-orphan")
     
     __table_args__ = (
         UniqueConstraint('employee_id', 'work_date', name='unique_employee_work_date'),
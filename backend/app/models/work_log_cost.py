@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Float, Numeric, Date, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+
+class WorkLogCost(Base):
+    """Cost of a work log, materialised with the rates in effect on its work_date."""
+    __tablename__ = "work_log_costs"
+
+    work_log_id = Column(Integer, ForeignKey("work_logs.id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
+    work_date = Column(Date, nullable=False, index=True)
+    hourly_rate = Column(Float, nullable=False)
+    overtime_rate = Column(Float, nullable=False)
+    base_cost = Column(Numeric(12, 2), nullable=False, default=0)
+    overtime_cost = Column(Numeric(12, 2), nullable=False, default=0)
+    total_cost = Column(Numeric(12, 2), nullable=False, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    work_log = relationship("WorkLog", back_populates="cost")
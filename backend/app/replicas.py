@@ -0,0 +1,178 @@
+"""Read-replica routing: reads of read-only requests go to streaming replicas.
+
+Set DATABASE_REPLICA_URLS to a comma-separated list of replica URLs to
+enable it. Sessions from ``SessionLocal`` and ``AsyncSessionLocal`` are
+``RoutingSession``\\s. While a request is marked read-only
+(``ReadRoutingMiddleware`` marks GET and HEAD requests), a session sends
+its SELECTs to one replica, chosen round-robin among the healthy ones and
+kept for the rest of the session. Everything else goes to the primary:
+writes, any read after the session flushed, and all reads when no replica
+is healthy.
+
+Read-your-writes: a successful write response sets a short-lived cookie
+(REPLICA_STICKY_SECONDS). While the client presents it, its reads stay on
+the primary, so it doesn't read a replica that hasn't replayed the write yet.
+
+A background thread checks every replica each REPLICA_CHECK_SECONDS. A
+replica is taken out of rotation when it can't be reached or, on
+PostgreSQL, when it is more than REPLICA_MAX_LAG_SECONDS behind. A
+connection error during a query takes it out straight away.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app")
+
+_reads_to_replica: ContextVar[bool] = ContextVar("reads_to_replica", default=False)
+
+
+@contextmanager
+def read_only() -> Iterator[None]:
+    """Let sessions used in this context read from a replica."""
+    token = _reads_to_replica.set(True)
+    try:
+        yield
+    finally:
+        _reads_to_replica.reset(token)
+
+
+@dataclass
+class Replica:
+    url: str
+    engine: Engine
+    async_engine: Optional[AsyncEngine] = None
+    healthy: bool = True
+    lag_seconds: Optional[float] = None
+    error: Optional[str] = None
+    selected: int = 0
+
+    @property
+    def name(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    """Round-robin over healthy replicas, with periodic health checks."""
+
+    def __init__(self, replicas: List[Replica], check_interval: float = 5.0, max_lag: float = 30.0):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._next = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        for replica in replicas:
+            self._watch_errors(replica)
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """The next healthy replica, or None to use the primary."""
+        with self._lock:
+            for offset in range(len(self.replicas)):
+                replica = self.replicas[(self._next + offset) % len(self.replicas)]
+                if replica.healthy:
+                    self._next = (self._next + offset + 1) % len(self.replicas)
+                    replica.selected += 1
+                    return replica
+        return None
+
+    def check(self) -> None:
+        """Probe every replica once and update its health."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    if conn.dialect.name == "postgresql":
+                        lag = conn.execute(text(
+                            "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                        )).scalar()
+                    else:
+                        conn.execute(text("SELECT 1"))
+                        lag = 0.0
+            except Exception as exc:
+                self._mark_down(replica, str(exc))
+                continue
+            replica.lag_seconds = float(lag)
+            if replica.lag_seconds > self.max_lag:
+                self._mark_down(replica, f"replication lag {replica.lag_seconds:.1f}s")
+            else:
+                if not replica.healthy:
+                    logger.info("Replica %s is back in rotation", replica.name)
+                replica.healthy, replica.error = True, None
+
+    def start(self) -> None:
+        """Start the health-check thread (once per worker process)."""
+        if not self.replicas or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def stats(self) -> List[Dict]:
+        return [
+            {"url": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag_seconds,
+             "error": replica.error, "selected": replica.selected}
+            for replica in self.replicas
+        ]
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.check_interval):
+            self.check()
+
+    def _mark_down(self, replica: Replica, error: str) -> None:
+        if replica.healthy:
+            logger.warning("Replica %s taken out of rotation: %s", replica.name, error)
+        replica.healthy, replica.error = False, error
+
+    def _watch_errors(self, replica: Replica) -> None:
+        engines = [replica.engine] + ([replica.async_engine.sync_engine] if replica.async_engine else [])
+        for engine in engines:
+            @event.listens_for(engine, "handle_error")
+            def _on_error(context, replica=replica):
+                if context.is_disconnect:
+                    self._mark_down(replica, str(context.original_exception))
+
+
+class RoutingSession(Session):
+    """Session sending the reads of read-only requests to a replica (see module docstring)."""
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, asynchronous: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.asynchronous = asynchronous
+        self._replica: Optional[Replica] = None
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.replicas
+            and _reads_to_replica.get()
+            and not self._wrote
+            and not self._flushing
+            and clause is not None
+            and clause.is_select
+        ):
+            if self._replica is None or not self._replica.healthy:
+                self._replica = self.replicas.pick()
+            if self._replica is not None:
+                if self.asynchronous:
+                    return self._replica.async_engine.sync_engine
+                return self._replica.engine
+        elif self._flushing or (clause is not None and clause.is_dml):
+            # Later reads in this session must see the write
+            self._wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
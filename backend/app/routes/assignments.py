@@ -8,6 +8,8 @@ from datetime import datetime
 from app.database import get_db
 from app.models import User, Employee, ManagerEmployeeAssignment
 from app.middleware.auth import get_current_user, require_role
+from app.middleware.principal_cache import Principal
+from app.middleware.scoping import assignment_cache
 
 router = APIRouter()
 security_logger = logging.getLogger("security")
@@ -44,7 +46,7 @@ class AssignmentResponse(BaseModel):
 
 # --- Helper ---
 
-def _admin_required(current_user: User = Depends(require_role('admin'))) -> User:
+def _admin_required(current_user: Principal = Depends(require_role('admin'))) -> Principal:
     return current_user
 
 
@@ -52,7 +54,7 @@ def _admin_required(current_user: User = Depends(require_role('admin'))) -> User
 @router.get("", response_model=List[AssignmentResponse])
 def list_assignments(
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     assignments = (
         db.query(ManagerEmployeeAssignment)
@@ -67,7 +69,7 @@ def list_assignments(
 def get_manager_assignments(
     manager_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Admins can see any manager's assignments; managers can see their own
     if current_user.role != 'admin' and current_user.id != manager_id:
@@ -87,7 +89,7 @@ def get_manager_assignments(
 def create_assignment(
     data: AssignmentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     manager = db.query(User).filter(User.id == data.manager_user_id).first()
     if not manager:
@@ -113,6 +115,7 @@ def create_assignment(
     db.add(assignment)
     db.commit()
     db.refresh(assignment)
+    assignment_cache.invalidate(data.manager_user_id)
     security_logger.info(
         "Assignment created: manager=%s employee=%s by %s",
         data.manager_user_id,
@@ -127,7 +130,7 @@ def create_assignment(
 def delete_assignment(
     assignment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     assignment = db.query(ManagerEmployeeAssignment).filter(
         ManagerEmployeeAssignment.id == assignment_id
@@ -135,8 +138,10 @@ def delete_assignment(
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
 
+    manager_user_id = assignment.manager_user_id
     db.delete(assignment)
     db.commit()
+    assignment_cache.invalidate(manager_user_id)
     security_logger.info(
         "Assignment deleted: id=%s by %s", assignment_id, current_user.username
     )
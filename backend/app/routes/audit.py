@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 from app.database import get_db
-from app.models import AuditLog, User
+from app.models import AuditLog
 from app.middleware.auth import require_role
+from app.middleware.principal_cache import Principal
+from app.responses import fast_json, records, sparse_fields
 
 router = APIRouter()
 
@@ -27,24 +29,31 @@ class AuditLogResponse(BaseModel):
         from_attributes = True
 
 
-def _admin_only(current_user: User = Depends(require_role('admin'))) -> User:
+_AUDIT_LOG_FIELDS = tuple(AuditLogResponse.model_fields)
+_audit_log_fields = sparse_fields(_AUDIT_LOG_FIELDS)
+
+
+def _admin_only(current_user: Principal = Depends(require_role('admin'))) -> Principal:
     return current_user
 
 
 @router.get("", response_model=List[AuditLogResponse])
 def list_audit_logs(
+    response: Response,
     user_id: Optional[int] = Query(None),
     action: Optional[str] = Query(None),
     entity_type: Optional[str] = Query(None),
     limit: int = Query(100, le=500),
+    fields: Tuple[str, ...] = _audit_log_fields,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
-    query = db.query(AuditLog)
+    query = db.query(*(getattr(AuditLog, field) for field in fields))
     if user_id:
         query = query.filter(AuditLog.user_id == user_id)
     if action:
         query = query.filter(AuditLog.action == action)
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
-    return query.order_by(AuditLog.created_at.desc()).limit(limit).all()
+    rows = query.order_by(AuditLog.created_at.desc()).limit(limit)
+    return fast_json(records(rows, fields), response)
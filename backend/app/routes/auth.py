@@ -1,22 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import logging
 import os
+import uuid
 
 from app.database import get_db
 from app.models import User
-from app.middleware.auth import get_current_user
+from app.middleware.auth import decode_access_token, get_current_user, security
+from app.middleware.principal_cache import Principal, principal_cache
 from app.limiter import limiter as _limiter
+from app.services.passwords import password_hasher
+from app.services.token_revocation import token_revocation
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 security_logger = logging.getLogger("security")
 
 # --- Pydantic schemas ---
@@ -69,25 +72,48 @@ def _create_token(user: User) -> str:
         "role": user.role,
         "employee_id": user.employee_id,
         "exp": datetime.now(timezone.utc) + delta,
+        # Unique id so the token can be revoked before it expires
+        "jti": uuid.uuid4().hex,
     }
     return jwt.encode(payload, secret_key, algorithm=algorithm)
 
 
+def _find_user(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+
+def _store_password_hash(db: Session, user: User, password_hash: str, **changes) -> None:
+    user.password_hash = password_hash
+    for key, value in changes.items():
+        setattr(user, key, value)
+    db.commit()
+    db.refresh(user)
+
+
 # POST /api/auth/login
+# Async so that bcrypt runs on the password hashing pool while database work
+# goes through the regular threadpool.
 @router.post("/login", response_model=TokenResponse)
 @_limiter.limit("5/15minutes")
-def login(request: Request, login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: Request, login_data: LoginRequest, db: Session = Depends(get_db)):
     client_ip = request.client.host if request.client else "unknown"
     if not login_data.username or not login_data.password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username and password required")
 
-    user = db.query(User).filter(User.username == login_data.username).first()
-    if not user or not pwd_context.verify(login_data.password, user.password_hash):
+    user = await run_in_threadpool(_find_user, db, login_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.password_hash)
+    if not valid:
         security_logger.warning(
             "Failed login attempt: username=%s ip=%s", login_data.username, client_ip
         )
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+    if new_hash:
+        # Stored hash uses an outdated cost factor
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
+
     token = _create_token(user)
     security_logger.info(
         "Successful login: username=%s ip=%s", login_data.username, client_ip
@@ -100,14 +126,23 @@ def login(request: Request, login_data: LoginRequest, db: Session = Depends(get_
 
 # GET /api/auth/me
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: Principal = Depends(get_current_user)):
     return current_user
 
 
 # POST /api/auth/logout
 @router.post("/logout")
-def logout(current_user: User = Depends(get_current_user)):
-    # JWT logout is handled client-side by discarding the token
+def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # The client discards the token; revoking its jti also stops a copied token
+    payload = decode_access_token(credentials.credentials)
+    if payload.get("jti"):
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
+        token_revocation.revoke(db, payload["jti"], expires_at, user_id=current_user.id)
+    principal_cache.invalidate_token(credentials.credentials)
     return {"message": "Logged out successfully"}
 
 
@@ -118,9 +153,9 @@ class ChangePasswordRequest(BaseModel):
 
 # POST /api/auth/change-password
 @router.post("/change-password")
-def change_password(
+async def change_password(
     request: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     if not request.currentPassword or not request.newPassword:
@@ -135,14 +170,19 @@ def change_password(
             detail="New password must be at least 6 characters",
         )
 
-    if not pwd_context.verify(request.currentPassword, current_user.password_hash):
+    user = await run_in_threadpool(db.get, User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired token")
+
+    valid, _ = await password_hasher.verify_and_update(request.currentPassword, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Current password is incorrect",
         )
 
-    current_user.password_hash = pwd_context.hash(request.newPassword)
-    current_user.force_password_change = False
-    db.commit()
+    new_hash = await password_hasher.hash(request.newPassword)
+    await run_in_threadpool(_store_password_hash, db, user, new_hash, force_password_change=False)
+    principal_cache.invalidate_user(user.id)
     security_logger.info("Password changed: username=%s", current_user.username)
     return {"message": "Password changed successfully"}
@@ -12,8 +12,11 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.database import get_db
-from app.models import Backup, BackupLog, User
+from app.models import Backup, BackupLog
 from app.middleware.auth import require_role
+from app.middleware.principal_cache import Principal
+from app.middleware.admission import admit
+from app.services.executors import runs_on
 
 router = APIRouter()
 
@@ -70,7 +73,7 @@ class BackupConfigUpdate(BaseModel):
 
 # --- Helper ---
 
-def _admin_only(current_user: User = Depends(require_role('admin'))) -> User:
+def _admin_only(current_user: Principal = Depends(require_role('admin'))) -> Principal:
     return current_user
 
 
@@ -183,7 +186,7 @@ def _cleanup_old_backups(db: Session, retention_days: int = 30):
 @router.get("", response_model=List[BackupResponse])
 def list_backups(
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     return db.query(Backup).order_by(Backup.created_at.desc()).all()
 
@@ -192,7 +195,7 @@ def list_backups(
 @router.get("/status")
 def backup_status(
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     last = db.query(Backup).filter(Backup.status == "completed").order_by(Backup.created_at.desc()).first()
     total = db.query(Backup).count()
@@ -206,7 +209,7 @@ def backup_status(
 
 # GET /api/backups/config
 @router.get("/config", response_model=BackupConfigResponse)
-def get_config(current_user: User = Depends(_admin_only)):
+def get_config(current_user: Principal = Depends(_admin_only)):
     return BackupConfigResponse(
         local_path=os.getenv("LOCAL_BACKUP_PATH", "/tmp/backups"),
         retention_days=int(os.getenv("BACKUP_RETENTION_DAYS", "30")),
@@ -226,7 +229,7 @@ def get_config(current_user: User = Depends(_admin_only)):
 @router.put("/config")
 def update_config(
     data: BackupConfigUpdate,
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     # In production this would persist to DB settings table; here we return the update
     return {"message": "Configuration updated", "data": data.model_dump(exclude_none=True)}
@@ -235,7 +238,7 @@ def update_config(
 # POST /api/backups/test-remote
 @router.post("/test-remote")
 def test_remote_connection(
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     return {"success": False, "message": "Remote connection test: configure REMOTE_* env variables"}
 
@@ -245,7 +248,7 @@ def test_remote_connection(
 def get_backup(
     backup_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     backup = db.query(Backup).filter(Backup.id == backup_id).first()
     if not backup:
@@ -254,22 +257,24 @@ def get_backup(
 
 
 # POST /api/backups
-@router.post("", response_model=BackupResponse, status_code=201)
+@router.post("", response_model=BackupResponse, status_code=201, dependencies=[Depends(admit("backup"))])
+@runs_on("backup")
 def create_backup(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     backup = _create_backup_file(db, current_user.id)
     return backup
 
 
 # POST /api/backups/:id/restore
-@router.post("/{backup_id}/restore")
+@router.post("/{backup_id}/restore", dependencies=[Depends(admit("backup"))])
+@runs_on("backup")
 def restore_backup(
     backup_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     backup = db.query(Backup).filter(Backup.id == backup_id).first()
     if not backup:
@@ -290,7 +295,7 @@ def restore_backup(
 def delete_backup(
     backup_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     backup = db.query(Backup).filter(Backup.id == backup_id).first()
     if not backup:
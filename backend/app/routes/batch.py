@@ -0,0 +1,156 @@
+"""POST /api/batch: several GET requests in one round trip.
+
+A page load in the frontend fires a handful of independent GETs. The batch
+endpoint authenticates the caller once, then dispatches each sub-request
+in-process straight to the router (outer middleware such as compression,
+security headers and rate limiting applies once, to the batch) and runs
+them concurrently, at most BATCH_CONCURRENCY at a time. So that a batch
+is no cheaper than its sub-requests sent one by one, each sub-request is
+also counted against the caller's rate limit. The results come back in request order in one JSON
+response. Sub-requests skip the token and revocation checks: they reuse
+the principal the batch was authenticated with. Each sub-request still
+gets its own database session, because sessions are not thread-safe and
+the sync handlers run in parallel threads.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel, Field, field_validator
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message
+
+from app.limiter import charge
+from app.middleware.auth import BATCH_PRINCIPAL_KEY, get_current_user
+from app.middleware.principal_cache import Principal
+
+router = APIRouter()
+
+_log = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+# Sub-requests of one batch running at once; the batch holds a single concurrency-limit slot
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Request headers a sub-request may set for itself
+_FORWARDED_HEADERS = {"accept", "accept-language", "if-none-match"}
+_INHERITED_HEADERS = {"accept", "accept-language"}
+
+
+class SubRequest(BaseModel):
+    id: Optional[str] = None
+    path: str
+    headers: Dict[str, str] = {}
+
+    @field_validator('path')
+    @classmethod
+    def validate_path(cls, v):
+        path = urlsplit(v).path
+        if not v.startswith("/api/") or path.rstrip("/") == "/api/batch":
+            raise ValueError('Path must be an API path other than /api/batch')
+        return v
+
+
+class BatchRequest(BaseModel):
+    requests: List[SubRequest] = Field(min_length=1, max_length=BATCH_MAX_REQUESTS)
+
+
+def _router_app(app) -> ASGIApp:
+    """The app's router behind its (non-500) exception handlers, built once per app."""
+    inner = getattr(app.state, "batch_app", None)
+    if inner is None:
+        handlers = {key: value for key, value in app.exception_handlers.items() if key not in (500, Exception)}
+        inner = app.state.batch_app = ExceptionMiddleware(app.router, handlers=handlers)
+    return inner
+
+
+async def _dispatch(request: Request, principal: Principal, sub: SubRequest) -> bytes:
+    url = urlsplit(sub.path)
+    # Sub-requests inherit the batch's Accept headers unless they set their own
+    forwarded = {name: value for name, value in request.headers.items() if name in _INHERITED_HEADERS}
+    forwarded.update(
+        (name.lower(), value) for name, value in sub.headers.items() if name.lower() in _FORWARDED_HEADERS
+    )
+    headers = [(b"authorization", request.headers["authorization"].encode("latin-1"))]
+    headers += [(name.encode("latin-1"), value.encode("latin-1")) for name, value in forwarded.items()]
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope["scheme"],
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "app": request.app,
+        "state": dict(request.scope.get("state", {})),
+        BATCH_PRINCIPAL_KEY: (request.headers["authorization"].partition(" ")[2], principal),
+    }
+
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update(
+                (name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])
+            )
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await _router_app(request.app)(scope, receive, send)
+    except Exception:
+        _log.exception("Batch sub-request failed: GET %s", sub.path)
+        status, response_headers, chunks = 500, {"content-type": "application/json"}, [b'{"detail":"Internal server error"}']
+
+    body = b"".join(chunks)
+    content_type = response_headers.pop("content-type", "")
+    response_headers.pop("content-length", None)
+    if not body:
+        body = b"null"
+    elif not content_type.startswith("application/json"):
+        body = orjson.dumps(body.decode("utf-8", errors="replace"))
+    # Sub-responses are usually JSON already; splice them in rather than re-parse them
+    return b"".join((
+        b'{"id":', orjson.dumps(sub.id), b',"status":', str(status).encode(),
+        b',"headers":', orjson.dumps(response_headers), b',"body":', body, b"}",
+    ))
+
+
+# POST /api/batch
+@router.post("")
+async def batch(
+    data: BatchRequest,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+):
+    charge(request, "batch", len(data.requests))
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(sub: SubRequest) -> bytes:
+        async with slots:
+            return await _dispatch(request, current_user, sub)
+
+    results = await asyncio.gather(*(run(sub) for sub in data.requests))
+    return Response(b'{"responses":[' + b",".join(results) + b"]}", media_type="application/json")
@@ -1,12 +1,18 @@
+import calendar
+
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import WorkLog, Employee
-from app.middleware.auth import get_current_user, User
+from app.middleware.auth import get_current_user
+from app.middleware.principal_cache import Principal
+from app.middleware.caching import conditional_get, table_version
+from app.middleware.scoping import DataScope, get_data_scope
 
 router = APIRouter()
 
@@ -27,23 +33,25 @@ class CalendarResponse(BaseModel):
     days: List[DayEntry]
 
 
-@router.get("", response_model=CalendarResponse)
-def get_calendar(
+@router.get("", response_model=CalendarResponse, dependencies=[conditional_get(table_version(WorkLog, WorkLog.employee_id))])
+async def get_calendar(
     year: int = Query(..., ge=2000, le=2100),
     month: int = Query(..., ge=1, le=12),
     employee_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+    scope: DataScope = Depends(get_data_scope),
 ):
     # If employee_id not provided, use current user's linked employee
     if employee_id is None and current_user.employee_id:
         employee_id = current_user.employee_id
+    if employee_id:
+        await scope.require_employee_async(db, employee_id)
 
-    query = db.query(WorkLog).filter(
+    query = select(WorkLog).filter(
         WorkLog.work_date >= date(year, month, 1),
     )
 
-    import calendar
     last_day = calendar.monthrange(year, month)[1]
     query = query.filter(WorkLog.work_date <= date(year, month, last_day))
 
@@ -53,7 +61,7 @@ def get_calendar(
         # Non-admin without employee link sees nothing
         query = query.filter(WorkLog.employee_id == -1)
 
-    logs = query.order_by(WorkLog.work_date).all()
+    logs = (await db.scalars(query.order_by(WorkLog.work_date))).all()
 
     days = [
         DayEntry(
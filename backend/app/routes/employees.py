@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, field_validator
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from app.database import get_db
-from app.models import Employee, WorkLog, User
-from app.middleware.auth import get_current_user
+from app.models import Employee, EmployeeRate, WorkLog, User
+from app.middleware.auth import get_current_user, require_role
+from app.middleware.principal_cache import Principal, principal_cache
+from app.middleware.caching import conditional_get, table_version
+from app.middleware.scoping import DataScope, get_data_scope
+from app.responses import fast_json, pick, records, sparse_fields
+from app.services.cost_ledger import set_employee_rate, rebuild_cost_ledger, rebuild_start
 
 router = APIRouter()
 
@@ -37,15 +42,56 @@ class EmployeeResponse(EmployeeBase):
     class Config:
         from_attributes = True
 
-@router.get("", response_model=List[EmployeeResponse])
-def get_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
-                  current_user: User = Depends(get_current_user)):
-    """Get all employees"""
-    employees = db.query(Employee).offset(skip).limit(limit).all()
-    if not employees:
-        return []
+class EmployeeRateCreate(BaseModel):
+    hourly_rate: float
+    overtime_rate: Optional[float] = None
+    effective_from: date
+
+    @field_validator('hourly_rate', 'overtime_rate')
+    @classmethod
+    def validate_rate(cls, v):
+        if v is not None and v < 0:
+            raise ValueError('Rates cannot be negative')
+        return v
 
-    emp_ids = [emp.id for emp in employees]
+class EmployeeRateResponse(BaseModel):
+    id: int
+    employee_id: int
+    hourly_rate: float
+    overtime_rate: Optional[float] = None
+    effective_from: date
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# EmployeeResponse fields read straight from columns (see app.responses)
+_EMPLOYEE_FIELDS = (
+    "first_name", "last_name", "email", "hourly_rate", "overtime_rate", "id", "created_at", "updated_at",
+)
+_employee_fields = sparse_fields(tuple(EmployeeResponse.model_fields))
+
+# The list embeds each employee's last work log entry
+@router.get("", response_model=List[EmployeeResponse], dependencies=[
+    conditional_get(table_version(Employee, Employee.id), table_version(WorkLog, WorkLog.employee_id)),
+])
+def get_employees(response: Response, skip: int = 0, limit: int = 100,
+                  fields: Tuple[str, ...] = _employee_fields, db: Session = Depends(get_db),
+                  scope: DataScope = Depends(get_data_scope)):
+    """Get all employees visible to the current user"""
+    selected = [field for field in fields if field in _EMPLOYEE_FIELDS]
+    with_last_entry = "last_entry" in fields
+    if with_last_entry and "id" not in selected:
+        selected.append("id")
+    columns = [getattr(Employee, field) for field in selected]
+    employees = records(
+        scope.apply(db.query(*columns), Employee.id).offset(skip).limit(limit), selected
+    )
+    if not employees or not with_last_entry:
+        return fast_json(employees, response)
+
+    emp_ids = [emp["id"] for emp in employees]
 
     # Fetch the latest work_date per employee in one query
     latest_date_sq = (
@@ -60,80 +106,120 @@ def get_employees(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 
     # Fetch the actual work logs matching each employee's latest date
     latest_logs = (
-        db.query(WorkLog)
+        db.query(WorkLog.employee_id, WorkLog.work_date, WorkLog.work_hours)
         .join(
             latest_date_sq,
             (WorkLog.employee_id == latest_date_sq.c.employee_id) &
             (WorkLog.work_date == latest_date_sq.c.max_date),
         )
-        .all()
     )
 
-    last_log_by_emp = {log.employee_id: log for log in latest_logs}
-
-    result = []
+    last_entry_by_emp = {
+        employee_id: {"date": work_date, "work_hours": float(work_hours)}
+        for employee_id, work_date, work_hours in latest_logs
+    }
     for emp in employees:
-        last_log = last_log_by_emp.get(emp.id)
-        last_entry = None
-        if last_log:
-            last_entry = LastEntry(date=last_log.work_date, work_hours=float(last_log.work_hours))
-        emp_resp = EmployeeResponse(
-            id=emp.id,
-            first_name=emp.first_name,
-            last_name=emp.last_name,
-            email=emp.email,
-            hourly_rate=emp.hourly_rate,
-            overtime_rate=emp.overtime_rate,
-            created_at=emp.created_at,
-            updated_at=emp.updated_at,
-            last_entry=last_entry,
-        )
-        result.append(emp_resp)
-    return result
-
-@router.get("/{employee_id}", response_model=EmployeeResponse)
-def get_employee(employee_id: int, db: Session = Depends(get_db),
-                 current_user: User = Depends(get_current_user)):
+        emp["last_entry"] = last_entry_by_emp.get(emp["id"] if "id" in fields else emp.pop("id"))
+    return fast_json(employees, response)
+
+@router.get("/{employee_id}", response_model=EmployeeResponse,
+            dependencies=[conditional_get(table_version(Employee, Employee.id))])
+def get_employee(employee_id: int, response: Response, fields: Tuple[str, ...] = _employee_fields,
+                 db: Session = Depends(get_db),
+                 scope: DataScope = Depends(get_data_scope)):
     """Get employee by ID"""
+    scope.require_employee(db, employee_id)
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return employee
+    return fast_json(pick(EmployeeResponse, employee, fields), response)
 
 @router.post("", response_model=EmployeeResponse, status_code=201)
 def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    current_user: Principal = Depends(get_current_user)):
     """Create a new employee"""
     db_employee = Employee(**employee.model_dump())
     db.add(db_employee)
+    db.flush()
+    if db_employee.hourly_rate is not None:
+        set_employee_rate(db, db_employee, db_employee.hourly_rate, db_employee.overtime_rate,
+                          date.today(), created_by=current_user.id)
     db.commit()
     db.refresh(db_employee)
     return db_employee
 
 @router.put("/{employee_id}", response_model=EmployeeResponse)
 def update_employee(employee_id: int, employee: EmployeeUpdate, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    current_user: Principal = Depends(get_current_user),
+                    scope: DataScope = Depends(get_data_scope)):
     """Update an employee"""
+    scope.require_employee(db, employee_id)
     db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
+    rates_changed = (
+        employee.hourly_rate != db_employee.hourly_rate
+        or employee.overtime_rate != db_employee.overtime_rate
+    )
+    if rates_changed and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can change rates")
     for key, value in employee.model_dump().items():
         setattr(db_employee, key, value)
+    if rates_changed and employee.hourly_rate is not None:
+        set_employee_rate(db, db_employee, employee.hourly_rate, employee.overtime_rate,
+                          date.today(), created_by=current_user.id)
     
     # The updated_at field is automatically updated by SQLAlchemy onupdate
     db.commit()
-    db.refresh(db_employee)
+    if rates_changed and employee.hourly_rate is not None:
+        rebuild_cost_ledger(db, employee_id=employee_id, since=rebuild_start(db, employee_id, date.today()))
+    db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
     return db_employee
 
 @router.delete("/{employee_id}", status_code=204)
 def delete_employee(employee_id: int, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    scope: DataScope = Depends(get_data_scope)):
     """Delete an employee"""
+    scope.require_employee(db, employee_id)
     db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
+    # Linked user accounts are removed by ON DELETE CASCADE
+    linked_user_ids = [uid for (uid,) in db.query(User.id).filter(User.employee_id == employee_id)]
     db.delete(db_employee)
     db.commit()
+    for user_id in linked_user_ids:
+        principal_cache.invalidate_user(user_id)
     return None
+
+@router.get("/{employee_id}/rates", response_model=List[EmployeeRateResponse])
+def get_employee_rates(employee_id: int, db: Session = Depends(get_db),
+                       scope: DataScope = Depends(get_data_scope)):
+    """Get an employee's rate history"""
+    scope.require_employee(db, employee_id)
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return employee.rates
+
+@router.post("/{employee_id}/rates", response_model=EmployeeRateResponse, status_code=201)
+def add_employee_rate(employee_id: int, rate: EmployeeRateCreate, db: Session = Depends(get_db),
+                      current_user: Principal = Depends(require_role("admin")),
+                      scope: DataScope = Depends(get_data_scope)):
+    """Add (or correct) a rate effective from a date and recompute affected work log costs (admin only)"""
+    scope.require_employee(db, employee_id)
+    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    db_rate = set_employee_rate(db, employee, rate.hourly_rate, rate.overtime_rate,
+                                rate.effective_from, created_by=current_user.id)
+    db.commit()
+    db.refresh(db_rate)
+    response = EmployeeRateResponse.model_validate(db_rate)
+
+    rebuild_cost_ledger(db, employee_id=employee_id,
+                        since=rebuild_start(db, employee_id, rate.effective_from))
+    return response
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+
+from app.boot import boot_stats
+from app.database import pool_stats
+from app.limiter import rate_limit_stats
+from app.middleware.admission import admission
+from app.middleware.auth import require_role
+from app.middleware.coalescing import request_coalescer
+from app.middleware.compression import compression_stats
+from app.middleware.concurrency import concurrency_limit
+from app.middleware.principal_cache import Principal, principal_cache
+from app.services.executors import executor_stats
+from app.services.passwords import password_hasher
+from app.services.token_revocation import token_revocation
+
+router = APIRouter()
+
+
+# GET /api/metrics — in-process runtime counters (per worker)
+@router.get("")
+async def get_metrics(current_user: Principal = Depends(require_role('admin'))):
+    return {
+        "admission": admission.stats(),
+        "auth_cache": principal_cache.stats(),
+        "boot": boot_stats(),
+        "coalescing": request_coalescer.stats(),
+        "compression": compression_stats(),
+        "concurrency": concurrency_limit.stats(),
+        "database_pool": pool_stats(),
+        "executors": executor_stats(),
+        "password_hashing": password_hasher.stats(),
+        "rate_limit": rate_limit_stats(),
+        "token_revocation": token_revocation.stats(),
+    }
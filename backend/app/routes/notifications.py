@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
-from app.models import Notification, User
+from app.database import get_async_db, get_db
+from app.models import Notification
 from app.middleware.auth import get_current_user
+from app.middleware.principal_cache import Principal
 
 router = APIRouter()
 
@@ -26,24 +29,23 @@ class NotificationResponse(BaseModel):
 
 # GET /api/notifications
 @router.get("", response_model=List[NotificationResponse])
-def get_notifications(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def get_notifications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    return (
-        db.query(Notification)
+    return (await db.scalars(
+        select(Notification)
         .filter(Notification.user_id == current_user.id)
         .order_by(Notification.created_at.desc())
         .limit(50)
-        .all()
-    )
+    )).all()
 
 
 # POST /api/notifications/read-all
 @router.post("/read-all")
 def mark_all_read(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     db.query(Notification).filter(
         Notification.user_id == current_user.id,
@@ -58,7 +60,7 @@ def mark_all_read(
 def mark_read(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     notif = db.query(Notification).filter(
         Notification.id == notification_id,
@@ -76,7 +78,7 @@ def mark_read(
 def delete_notification(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     notif = db.query(Notification).filter(
         Notification.id == notification_id,
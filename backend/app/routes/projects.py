@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date, datetime
 
 from app.database import get_db
-from app.models import Project, Employee, User
+from app.models import Project, Employee
+from app.models.project import project_employees
 from app.middleware.auth import get_current_user, require_role
+from app.middleware.principal_cache import Principal
+from app.middleware.caching import conditional_get, table_version
+from app.responses import fast_json, pick, records, sparse_fields
 
 router = APIRouter()
 
+# Project responses embed employee names, so both tables make up their version
+_projects_etag = conditional_get(table_version(Project), table_version(Employee))
+
 
 # --- Schemas ---
 
@@ -60,34 +67,65 @@ class ProjectResponse(BaseModel):
 
 # --- Helpers ---
 
-def _require_admin_or_manager(current_user: User = Depends(require_role('admin', 'manager'))) -> User:
+def _require_admin_or_manager(current_user: Principal = Depends(require_role('admin', 'manager'))) -> Principal:
     return current_user
 
 
+# ProjectResponse and EmployeeShort fields read straight from columns (see app.responses)
+_PROJECT_FIELDS = (
+    "id", "name", "description", "client", "budget", "deadline", "status", "created_by", "created_at", "updated_at",
+)
+_MEMBER_FIELDS = ("id", "first_name", "last_name", "email")
+_project_fields = sparse_fields(tuple(ProjectResponse.model_fields))
+
+
 # GET /api/projects
-@router.get("", response_model=List[ProjectResponse])
+@router.get("", response_model=List[ProjectResponse], dependencies=[_projects_etag])
 def list_projects(
+    response: Response,
     status_filter: Optional[str] = None,
+    fields: Tuple[str, ...] = _project_fields,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    query = db.query(Project)
+    selected = [field for field in fields if field in _PROJECT_FIELDS]
+    with_employees = "employees" in fields
+    if with_employees and "id" not in selected:
+        selected.append("id")
+    query = db.query(*(getattr(Project, field) for field in selected))
     if status_filter:
         query = query.filter(Project.status == status_filter)
-    return query.order_by(Project.created_at.desc()).all()
+    projects = records(query.order_by(Project.created_at.desc()), selected)
+    if not with_employees:
+        return fast_json(projects, response)
+
+    members = db.query(project_employees.c.project_id, *(getattr(Employee, field) for field in _MEMBER_FIELDS)) \
+        .join(Employee, Employee.id == project_employees.c.employee_id)
+    if status_filter:
+        members = members.join(Project, Project.id == project_employees.c.project_id) \
+            .filter(Project.status == status_filter)
+    employees_by_project = {
+        (project["id"] if "id" in fields else project.pop("id")): project.setdefault("employees", [])
+        for project in projects
+    }
+    for project_id, *member in members:
+        employees_by_project[project_id].append(dict(zip(_MEMBER_FIELDS, member)))
+    return fast_json(projects, response)
 
 
 # GET /api/projects/:id
-@router.get("/{project_id}", response_model=ProjectResponse)
+@router.get("/{project_id}", response_model=ProjectResponse, dependencies=[_projects_etag])
 def get_project(
     project_id: int,
+    response: Response,
+    fields: Tuple[str, ...] = _project_fields,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return fast_json(pick(ProjectResponse, project, fields), response)
 
 
 # POST /api/projects
@@ -95,7 +133,7 @@ def get_project(
 def create_project(
     data: ProjectCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_require_admin_or_manager),
+    current_user: Principal = Depends(_require_admin_or_manager),
 ):
     project = Project(
         **data.model_dump(),
@@ -113,7 +151,7 @@ def update_project(
     project_id: int,
     data: ProjectUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_require_admin_or_manager),
+    current_user: Principal = Depends(_require_admin_or_manager),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -130,7 +168,7 @@ def update_project(
 def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role('admin')),
+    current_user: Principal = Depends(require_role('admin')),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -141,11 +179,11 @@ def delete_project(
 
 
 # GET /api/projects/:id/employees
-@router.get("/{project_id}/employees", response_model=List[EmployeeShort])
+@router.get("/{project_id}/employees", response_model=List[EmployeeShort], dependencies=[_projects_etag])
 def get_project_employees(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -163,7 +201,7 @@ def assign_employee_to_project(
     project_id: int,
     data: EmployeeAssign,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_require_admin_or_manager),
+    current_user: Principal = Depends(_require_admin_or_manager),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -174,6 +212,7 @@ def assign_employee_to_project(
     if employee in project.employees:
         raise HTTPException(status_code=400, detail="Employee already assigned to this project")
     project.employees.append(employee)
+    project.updated_at = datetime.utcnow()  # membership changes are part of the project's version
     db.commit()
     return {"message": "Employee assigned to project"}
 
@@ -184,7 +223,7 @@ def remove_employee_from_project(
     project_id: int,
     employee_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_require_admin_or_manager),
+    current_user: Principal = Depends(_require_admin_or_manager),
 ):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
@@ -193,5 +232,6 @@ def remove_employee_from_project(
     if not employee or employee not in project.employees:
         raise HTTPException(status_code=404, detail="Employee not found in project")
     project.employees.remove(employee)
+    project.updated_at = datetime.utcnow()
     db.commit()
     return {"message": "Employee removed from project"}
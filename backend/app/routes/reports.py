@@ -1,27 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response, JSONResponse
+import calendar
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional, Literal
+from sqlalchemy import select, func, and_, or_, case, literal, true, Numeric
+from openpyxl import Workbook
+from typing import Optional, Literal, Iterator, Dict, List, Tuple
 from datetime import date
 from app.database import get_db
-from app.models import WorkLog, Employee, User
-from app.middleware.auth import get_current_user
-from app.services.pdf_generator import generate_manager_report_pdf, generate_owner_report_pdf
+from app.formats import MEDIA_TYPES, batched, encode
+from app.models import WorkLog, WorkLogCost, Employee, Setting, WorkCalendarDay, ManagerEmployeeAssignment
+from app.middleware.auth import require_role
+from app.middleware.principal_cache import Principal
+from app.middleware.admission import admit
+from app.middleware.caching import conditional_get, table_version
+from app.middleware.coalescing import coalesce
+from app.middleware.scoping import DataScope, get_data_scope
+from app.routes.settings import DEFAULT_SETTINGS
+from app.services.work_calendar import calendar_covers
+from app.services.cost_ledger import RateBook, DEFAULT_OVERTIME_MULTIPLIER
+from app.services.executors import executors, runs_on
+from app.services.pdf_generator import (
+    generate_manager_report_pdf,
+    generate_owner_report_pdf,
+    generate_comparison_report_pdf,
+)
 
 router = APIRouter()
 
-@router.get("/manager/{employee_id}")
+# Reports cover a fixed period and may be a minute stale; revalidated with an ETag after that
+_REPORT_CACHE_CONTROL = "private, max-age=60"
+
+@router.get("/manager/{employee_id}", dependencies=[
+    conditional_get(table_version(WorkLog, WorkLog.employee_id), table_version(Employee, Employee.id),
+                    cache_control=_REPORT_CACHE_CONTROL),
+    Depends(admit("report", pdf="pdf")),
+])
+@coalesce
+@runs_on("reporting")
 def get_manager_report(
     employee_id: int,
     start_date: date,
     end_date: date,
     format: Literal["json", "pdf"] = "json",
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: DataScope = Depends(get_data_scope)
 ):
     """
     Generate manager report (hours only, no financial data)
     """
+    scope.require_employee(db, employee_id)
     # Get employee
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
@@ -97,27 +126,35 @@ def get_manager_report(
             }
         )
 
-@router.get("/owner/{employee_id}")
+@router.get("/owner/{employee_id}", dependencies=[Depends(admit("report", pdf="pdf"))])
+@coalesce
+@runs_on("reporting")
 def get_owner_report(
     employee_id: int,
     start_date: date,
     end_date: date,
     format: Literal["json", "pdf"] = "json",
-    hourly_rate: float = 25.0,
-    overtime_multiplier: float = 1.5,
+    hourly_rate: Optional[float] = None,
+    overtime_multiplier: Optional[float] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: DataScope = Depends(get_data_scope)
 ):
     """
     Generate owner report (includes financial data with rates and costs)
+
+    Costs come from the cost ledger (rates in effect on each work date).
+    Passing hourly_rate recomputes them with that rate instead.
     """
+    scope.require_employee(db, employee_id)
     # Get employee
     employee = db.query(Employee).filter(Employee.id == employee_id).first()
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
-    # Get work logs
-    work_logs = db.query(WorkLog).filter(
+    # Get work logs with their ledger entries
+    work_logs = db.query(WorkLog, WorkLogCost).outerjoin(
+        WorkLogCost, WorkLogCost.work_log_id == WorkLog.id
+    ).filter(
         WorkLog.employee_id == employee_id,
         WorkLog.work_date >= start_date,
         WorkLog.work_date <= end_date
@@ -133,6 +170,12 @@ def get_owner_report(
         "last_name": employee.last_name,
         "email": employee.email
     }
+
+    use_ledger = hourly_rate is None
+    if overtime_multiplier is None:
+        overtime_multiplier = DEFAULT_OVERTIME_MULTIPLIER
+    # Explicit rates need no rate history
+    rate_book = RateBook(db, [employee_id]) if use_ledger else None
     
     work_logs_data = []
     totals = {
@@ -145,20 +188,31 @@ def get_owner_report(
         "total_cost": 0
     }
     
-    for log in work_logs:
+    for log, ledger_entry in work_logs:
         work_hrs = float(log.work_hours)
         overtime_hrs = float(log.overtime_hours)
         vacation_hrs = float(log.vacation_hours)
         sick_hrs = float(log.sick_leave_hours)
         other_hrs = float(log.other_hours)
+
+        if not use_ledger:
+            rate, overtime_rate = hourly_rate, hourly_rate * overtime_multiplier
+        elif ledger_entry is not None:
+            rate, overtime_rate = ledger_entry.hourly_rate, ledger_entry.overtime_rate
+        else:
+            # Not yet in the ledger (e.g. before scripts/rebuild_cost_ledger.py has run)
+            rate, overtime_rate = rate_book.resolve(employee_id, log.work_date)
         
         # Calculate costs
-        work_cost = work_hrs * hourly_rate
-        overtime_cost = overtime_hrs * hourly_rate * overtime_multiplier
-        vacation_cost = vacation_hrs * hourly_rate
-        sick_cost = sick_hrs * hourly_rate
-        other_cost = other_hrs * hourly_rate
-        total_cost = work_cost + overtime_cost + vacation_cost + sick_cost + other_cost
+        work_cost = work_hrs * rate
+        overtime_cost = overtime_hrs * overtime_rate
+        vacation_cost = vacation_hrs * rate
+        sick_cost = sick_hrs * rate
+        other_cost = other_hrs * rate
+        if use_ledger and ledger_entry is not None:
+            total_cost = float(ledger_entry.total_cost)
+        else:
+            total_cost = work_cost + overtime_cost + vacation_cost + sick_cost + other_cost
         
         log_data = {
             "work_date": str(log.work_date),
@@ -168,6 +222,10 @@ def get_owner_report(
             "sick_leave_hours": sick_hrs,
             "other_hours": other_hrs,
             "notes": log.notes,
+            "rates": {
+                "hourly_rate": rate,
+                "overtime_rate": overtime_rate
+            },
             "costs": {
                 "work_cost": round(work_cost, 2),
                 "overtime_cost": round(overtime_cost, 2),
@@ -188,6 +246,11 @@ def get_owner_report(
         totals["total_cost"] += total_cost
     
     totals["total_cost"] = round(totals["total_cost"], 2)
+
+    if use_ledger:
+        # Headline rates are the ones in effect at the end of the period
+        hourly_rate, period_overtime_rate = rate_book.resolve(employee_id, end_date)
+        overtime_multiplier = period_overtime_rate / hourly_rate if hourly_rate else overtime_multiplier
     
     if format == "json":
         return {
@@ -197,6 +260,7 @@ def get_owner_report(
                 "end_date": str(end_date)
             },
             "rates": {
+                "source": "ledger" if use_ledger else "override",
                 "hourly_rate": hourly_rate,
                 "overtime_multiplier": overtime_multiplier,
                 "overtime_rate": hourly_rate * overtime_multiplier
@@ -217,3 +281,481 @@ def get_owner_report(
                 "Content-Disposition": f"attachment; filename=owner_report_{employee_id}_{start_date}_{end_date}.pdf"
             }
         )
+
+
+# --- Payroll export ---
+
+PAYROLL_COLUMNS = [
+    "employee_id", "first_name", "last_name", "email",
+    "work_hours", "overtime_hours", "vacation_hours", "sick_leave_hours",
+    "other_hours", "absent_hours", "total_hours",
+    "hourly_rate", "overtime_rate", "total_cost",
+]
+
+# Column kinds for the Arrow and MessagePack exports (app.formats)
+_PAYROLL_KINDS = [
+    (column, "int" if column == "employee_id" else "str" if column in ("first_name", "last_name", "email")
+     else "float")
+    for column in PAYROLL_COLUMNS
+]
+
+_XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rows fetched from the cursor per round trip while streaming the export
+_PAYROLL_BATCH_SIZE = 500
+
+
+def _payroll_statement(start_date: date, end_date: date):
+    """One grouped query: every employee joined with their work logs and ledger costs in the period."""
+    def total(column):
+        return func.coalesce(func.sum(column), 0).label(column.key)
+
+    def unledgered(expression, label):
+        # Hours of logs that have no ledger entry yet; priced with the fallback rates
+        return func.coalesce(
+            func.sum(case((WorkLogCost.work_log_id.is_(None), expression), else_=0)), 0
+        ).label(label)
+
+    return (
+        select(
+            Employee.id,
+            Employee.first_name,
+            Employee.last_name,
+            Employee.email,
+            Employee.hourly_rate,
+            Employee.overtime_rate,
+            total(WorkLog.work_hours),
+            total(WorkLog.overtime_hours),
+            total(WorkLog.vacation_hours),
+            total(WorkLog.sick_leave_hours),
+            total(WorkLog.other_hours),
+            total(WorkLog.absent_hours),
+            func.coalesce(func.sum(WorkLogCost.total_cost), 0).label("ledger_cost"),
+            unledgered(
+                func.coalesce(WorkLog.work_hours, 0) + func.coalesce(WorkLog.vacation_hours, 0)
+                + func.coalesce(WorkLog.sick_leave_hours, 0) + func.coalesce(WorkLog.other_hours, 0),
+                "unledgered_base_hours",
+            ),
+            unledgered(func.coalesce(WorkLog.overtime_hours, 0), "unledgered_overtime_hours"),
+        )
+        .select_from(Employee)
+        .outerjoin(
+            WorkLog,
+            and_(
+                WorkLog.employee_id == Employee.id,
+                WorkLog.work_date >= start_date,
+                WorkLog.work_date <= end_date,
+            ),
+        )
+        .outerjoin(WorkLogCost, WorkLogCost.work_log_id == WorkLog.id)
+        .group_by(
+            Employee.id, Employee.first_name, Employee.last_name, Employee.email,
+            Employee.hourly_rate, Employee.overtime_rate,
+        )
+        .order_by(Employee.last_name, Employee.first_name, Employee.id)
+    )
+
+
+def _payroll_row(row, hourly_rate: float, overtime_multiplier: float) -> Dict:
+    """Sum ledger costs for one aggregated row; price logs missing from the ledger with the fallbacks."""
+    rate = row.hourly_rate if row.hourly_rate is not None else hourly_rate
+    overtime_rate = row.overtime_rate if row.overtime_rate is not None else rate * overtime_multiplier
+
+    work_hrs = float(row.work_hours)
+    overtime_hrs = float(row.overtime_hours)
+    vacation_hrs = float(row.vacation_hours)
+    sick_hrs = float(row.sick_leave_hours)
+    other_hrs = float(row.other_hours)
+    absent_hrs = float(row.absent_hours)
+
+    # Absent hours are unpaid, matching the owner report
+    total_cost = (
+        float(row.ledger_cost)
+        + float(row.unledgered_base_hours) * rate
+        + float(row.unledgered_overtime_hours) * overtime_rate
+    )
+
+    return {
+        "employee_id": row.id,
+        "first_name": row.first_name,
+        "last_name": row.last_name,
+        "email": row.email or "",
+        "work_hours": work_hrs,
+        "overtime_hours": overtime_hrs,
+        "vacation_hours": vacation_hrs,
+        "sick_leave_hours": sick_hrs,
+        "other_hours": other_hrs,
+        "absent_hours": absent_hrs,
+        "total_hours": work_hrs + vacation_hrs + sick_hrs + other_hrs + overtime_hrs,
+        "hourly_rate": round(rate, 2),
+        "overtime_rate": round(overtime_rate, 2),
+        "total_cost": round(total_cost, 2),
+    }
+
+
+def _iter_payroll_rows(bind, stmt, hourly_rate: float, overtime_multiplier: float) -> Iterator[Dict]:
+    """Stream aggregated rows straight from a server-side cursor.
+
+    Uses its own connection because the request-scoped session is closed
+    before a streaming response body is sent.
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=_PAYROLL_BATCH_SIZE).execute(stmt)
+        for row in result:
+            yield _payroll_row(row, hourly_rate, overtime_multiplier)
+
+
+def _iter_csv(rows: Iterator[Dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=PAYROLL_COLUMNS)
+    writer.writeheader()
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % _PAYROLL_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _iter_xlsx(rows: Iterator[Dict]) -> Iterator[bytes]:
+    # Write-only workbooks spool rows to disk, so memory stays flat for large exports
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Payroll")
+    sheet.append(PAYROLL_COLUMNS)
+    for row in rows:
+        sheet.append([row[column] for column in PAYROLL_COLUMNS])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    yield from iter(lambda: buffer.read(64 * 1024), b"")
+
+
+@router.get("/payroll", dependencies=[Depends(admit("export"))])
+def export_payroll(
+    start_date: date,
+    end_date: date,
+    format: Literal["csv", "xlsx", "arrow", "msgpack"] = "csv",
+    hourly_rate: float = 25.0,
+    overtime_multiplier: float = 1.5,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role("admin")),
+):
+    """
+    Export hours and costs for every employee in a period as CSV, XLSX, an
+    Arrow IPC stream or a sequence of MessagePack maps.
+
+    Costs are summed from the cost ledger. Logs not yet in the ledger are
+    priced with the employee's rates, or hourly_rate/overtime_multiplier for
+    employees without their own rates.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    rows = _iter_payroll_rows(
+        db.get_bind(), _payroll_statement(start_date, end_date), hourly_rate, overtime_multiplier
+    )
+    filename = f"payroll_{start_date}_{end_date}.{format}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+
+    reporting = executors["reporting"]
+    # A full pool is a 503 now; once streaming, the export is finished regardless
+    reporting.check_capacity()
+    if format == "csv":
+        return StreamingResponse(reporting.iterate(_iter_csv(rows)), media_type="text/csv", headers=headers)
+    if format in MEDIA_TYPES:
+        chunks = encode(format, _PAYROLL_KINDS, batched(rows, _PAYROLL_BATCH_SIZE))
+        return StreamingResponse(reporting.iterate(chunks), media_type=MEDIA_TYPES[format], headers=headers)
+    return StreamingResponse(reporting.iterate(_iter_xlsx(rows)), media_type=_XLSX_MEDIA_TYPE, headers=headers)
+
+
+# --- Expected vs actual hours ---
+
+def _default_work_hours(db: Session) -> float:
+    setting = db.query(Setting).filter(Setting.key == "default_work_hours").first()
+    value = setting.value if setting and setting.value else DEFAULT_SETTINGS["default_work_hours"][0]
+    try:
+        return float(value)
+    except ValueError:
+        return float(DEFAULT_SETTINGS["default_work_hours"][0])
+
+
+def _expected_hours_statement(start_date: date, end_date: date, hours_per_day: float,
+                              employee_id: Optional[int] = None, scope: Optional[DataScope] = None):
+    """Per employee-month expected vs logged hours, joined against work_calendar in one query."""
+    in_period = WorkCalendarDay.calendar_date.between(start_date, end_date)
+
+    months = (
+        select(
+            WorkCalendarDay.year,
+            WorkCalendarDay.month,
+            func.sum(case((WorkCalendarDay.is_working_day, 1), else_=0)).label("working_days"),
+        )
+        .where(in_period)
+        .group_by(WorkCalendarDay.year, WorkCalendarDay.month)
+        .subquery()
+    )
+
+    logged = (
+        select(
+            WorkLog.employee_id,
+            WorkCalendarDay.year,
+            WorkCalendarDay.month,
+            func.sum(func.coalesce(WorkLog.work_hours, 0)).label("worked_hours"),
+            func.sum(func.coalesce(WorkLog.overtime_hours, 0)).label("overtime_hours"),
+            func.sum(
+                func.coalesce(WorkLog.vacation_hours, 0)
+                + func.coalesce(WorkLog.sick_leave_hours, 0)
+                + func.coalesce(WorkLog.other_hours, 0)
+            ).label("leave_hours"),
+        )
+        .join(WorkCalendarDay, WorkCalendarDay.calendar_date == WorkLog.work_date)
+        .where(WorkLog.work_date.between(start_date, end_date))
+        .group_by(WorkLog.employee_id, WorkCalendarDay.year, WorkCalendarDay.month)
+        .subquery()
+    )
+
+    expected = months.c.working_days * literal(hours_per_day, Numeric(5, 2))
+    worked = func.coalesce(logged.c.worked_hours, 0)
+    leave = func.coalesce(logged.c.leave_hours, 0)
+    balance = worked + leave - expected
+
+    stmt = (
+        select(
+            Employee.id.label("employee_id"),
+            Employee.first_name,
+            Employee.last_name,
+            months.c.year,
+            months.c.month,
+            months.c.working_days,
+            expected.label("expected_hours"),
+            worked.label("worked_hours"),
+            leave.label("leave_hours"),
+            func.coalesce(logged.c.overtime_hours, 0).label("overtime_hours"),
+            balance.label("balance_hours"),
+            case((balance < 0, -balance), else_=0).label("deficit_hours"),
+        )
+        .select_from(Employee)
+        .join(months, true())
+        .outerjoin(
+            logged,
+            and_(
+                logged.c.employee_id == Employee.id,
+                logged.c.year == months.c.year,
+                logged.c.month == months.c.month,
+            ),
+        )
+        .order_by(Employee.last_name, Employee.first_name, Employee.id, months.c.year, months.c.month)
+    )
+    if employee_id is not None:
+        stmt = stmt.where(Employee.id == employee_id)
+    if scope is not None:
+        stmt = scope.apply(stmt, Employee.id)
+    return stmt
+
+
+@router.get("/expected-hours", dependencies=[Depends(admit("report"))])
+@coalesce
+@runs_on("reporting")
+def get_expected_hours(
+    start_date: date,
+    end_date: date,
+    employee_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    scope: DataScope = Depends(get_data_scope)
+):
+    """
+    Expected vs actual hours per employee and month, based on the work calendar
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if not calendar_covers(db, start_date, end_date):
+        raise HTTPException(
+            status_code=409,
+            detail="Work calendar has not been generated for the requested period",
+        )
+
+    hours_per_day = _default_work_hours(db)
+    rows = db.execute(_expected_hours_statement(start_date, end_date, hours_per_day, employee_id, scope))
+
+    hour_fields = (
+        "expected_hours", "worked_hours", "leave_hours",
+        "overtime_hours", "balance_hours", "deficit_hours",
+    )
+    return {
+        "period": {
+            "start_date": str(start_date),
+            "end_date": str(end_date)
+        },
+        "hours_per_day": hours_per_day,
+        "rows": [
+            {
+                "employee_id": row.employee_id,
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+                "year": row.year,
+                "month": row.month,
+                "working_days": int(row.working_days),
+                **{field: round(float(getattr(row, field)), 2) for field in hour_fields},
+            }
+            for row in rows
+        ],
+    }
+
+
+# --- Period-over-period comparison ---
+
+_COMPARISON_METRICS = {
+    "work_hours": lambda: func.coalesce(WorkLog.work_hours, 0),
+    "overtime_hours": lambda: func.coalesce(WorkLog.overtime_hours, 0),
+    "leave_hours": lambda: (
+        func.coalesce(WorkLog.vacation_hours, 0)
+        + func.coalesce(WorkLog.sick_leave_hours, 0)
+        + func.coalesce(WorkLog.other_hours, 0)
+    ),
+    "absent_hours": lambda: func.coalesce(WorkLog.absent_hours, 0),
+}
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _comparison_periods(year: int, month: int) -> List[Dict]:
+    """The requested month, the month before it and the same month a year earlier."""
+    prev_year, prev_month = (year, month - 1) if month > 1 else (year - 1, 12)
+    periods = []
+    for key, (y, m) in (
+        ("current", (year, month)),
+        ("previous_month", (prev_year, prev_month)),
+        ("previous_year", (year - 1, month)),
+    ):
+        start, end = _month_range(y, m)
+        periods.append({"key": key, "label": f"{y}-{m:02d}", "start_date": start, "end_date": end})
+    return periods
+
+
+def _comparison_statement(periods: List[Dict], employee_id: Optional[int] = None,
+                          manager_id: Optional[int] = None, scope: Optional[DataScope] = None):
+    """Conditional aggregation: one column per (period, metric), one pass over work_logs."""
+    columns = []
+    for period in periods:
+        in_period = WorkLog.work_date.between(period["start_date"], period["end_date"])
+        for metric, expression in _COMPARISON_METRICS.items():
+            columns.append(
+                func.coalesce(func.sum(case((in_period, expression()), else_=0)), 0)
+                .label(f"{period['key']}__{metric}")
+            )
+        columns.append(func.count(case((in_period, WorkLog.id))).label(f"{period['key']}__days_logged"))
+
+    any_period = or_(*(
+        WorkLog.work_date.between(period["start_date"], period["end_date"]) for period in periods
+    ))
+    stmt = (
+        select(Employee.id, Employee.first_name, Employee.last_name, *columns)
+        .select_from(Employee)
+        .outerjoin(WorkLog, and_(WorkLog.employee_id == Employee.id, any_period))
+        .group_by(Employee.id, Employee.first_name, Employee.last_name)
+        .order_by(Employee.last_name, Employee.first_name, Employee.id)
+    )
+    if employee_id is not None:
+        stmt = stmt.where(Employee.id == employee_id)
+    if manager_id is not None:
+        stmt = stmt.where(Employee.id.in_(
+            select(ManagerEmployeeAssignment.employee_id)
+            .where(ManagerEmployeeAssignment.manager_user_id == manager_id)
+        ))
+    if scope is not None:
+        stmt = scope.apply(stmt, Employee.id)
+    return stmt
+
+
+def _change(current: float, previous: float) -> Dict:
+    return {
+        "hours": round(current - previous, 2),
+        "percent": round((current - previous) / previous * 100, 1) if previous else None,
+    }
+
+
+@router.get("/comparison", dependencies=[Depends(admit("report", pdf="pdf"))])
+@coalesce
+@runs_on("reporting")
+def get_comparison_report(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    employee_id: Optional[int] = None,
+    manager_id: Optional[int] = None,
+    format: Literal["json", "pdf"] = "json",
+    db: Session = Depends(get_db),
+    scope: DataScope = Depends(get_data_scope)
+):
+    """
+    Compare a month with the previous month and the same month last year (hours only)
+
+    Covers one employee (employee_id), a manager's team (manager_id) or everyone.
+    """
+    periods = _comparison_periods(year, month)
+    rows = db.execute(_comparison_statement(periods, employee_id, manager_id, scope)).all()
+    if employee_id is not None and not rows:
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    metrics = list(_COMPARISON_METRICS) + ["total_hours", "days_logged"]
+    employees = []
+    totals = {period["key"]: dict.fromkeys(metrics, 0) for period in periods}
+    for row in rows:
+        by_period = {}
+        for period in periods:
+            key = period["key"]
+            values = {
+                metric: round(float(getattr(row, f"{key}__{metric}")), 2)
+                for metric in _COMPARISON_METRICS
+            }
+            values["total_hours"] = round(
+                values["work_hours"] + values["overtime_hours"] + values["leave_hours"], 2
+            )
+            values["days_logged"] = getattr(row, f"{key}__days_logged")
+            by_period[key] = values
+            for metric in metrics:
+                totals[key][metric] += values[metric]
+
+        current_total = by_period["current"]["total_hours"]
+        employees.append({
+            "employee": {"id": row.id, "first_name": row.first_name, "last_name": row.last_name},
+            "periods": by_period,
+            "change": {
+                "vs_previous_month": _change(current_total, by_period["previous_month"]["total_hours"]),
+                "vs_previous_year": _change(current_total, by_period["previous_year"]["total_hours"]),
+            },
+        })
+
+    for values in totals.values():
+        for metric in _COMPARISON_METRICS:
+            values[metric] = round(values[metric], 2)
+        values["total_hours"] = round(values["total_hours"], 2)
+
+    periods_data = [
+        {
+            "key": period["key"],
+            "label": period["label"],
+            "start_date": str(period["start_date"]),
+            "end_date": str(period["end_date"]),
+        }
+        for period in periods
+    ]
+
+    if format == "json":
+        return {
+            "periods": periods_data,
+            "employees": employees,
+            "totals": totals,
+            "report_type": "comparison"
+        }
+    else:  # pdf
+        pdf_bytes = generate_comparison_report_pdf(periods_data, employees, totals)
+        return Response(
+            content=pdf_bytes,
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": f"attachment; filename=comparison_report_{year}_{month:02d}.pdf"
+            }
+        )
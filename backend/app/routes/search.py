@@ -1,25 +1,29 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Employee, Project, User
 from app.middleware.auth import get_current_user
+from app.middleware.principal_cache import Principal
+from app.middleware.admission import admit
+from app.middleware.scoping import DataScope, get_data_scope
 
 router = APIRouter()
 
 
-@router.get("")
-def global_search(
+@router.get("", dependencies=[Depends(admit("search"))])
+async def global_search(
     q: str = Query(..., min_length=1),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+    scope: DataScope = Depends(get_data_scope),
 ):
     query = q.strip().lower()
 
-    employees = (
-        db.query(Employee)
+    employees = (await db.scalars(
+        scope.apply(select(Employee), Employee.id)
         .filter(
             or_(
                 Employee.first_name.ilike(f"%{query}%"),
@@ -28,11 +32,10 @@ def global_search(
             )
         )
         .limit(5)
-        .all()
-    )
+    )).all()
 
-    projects = (
-        db.query(Project)
+    projects = (await db.scalars(
+        select(Project)
         .filter(
             or_(
                 Project.name.ilike(f"%{query}%"),
@@ -41,17 +44,15 @@ def global_search(
             )
         )
         .limit(5)
-        .all()
-    )
+    )).all()
 
     users_result = []
     if current_user.role == 'admin':
-        users_result = (
-            db.query(User)
+        users_result = (await db.scalars(
+            select(User)
             .filter(User.username.ilike(f"%{query}%"))
             .limit(5)
-            .all()
-        )
+        )).all()
 
     return {
         "query": q,
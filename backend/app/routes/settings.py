@@ -5,8 +5,9 @@ from typing import List, Optional, Dict
 from datetime import datetime
 
 from app.database import get_db
-from app.models import Setting, User
+from app.models import Setting
 from app.middleware.auth import require_role
+from app.middleware.principal_cache import Principal
 
 router = APIRouter()
 
@@ -37,7 +38,7 @@ class SettingsUpdate(BaseModel):
     settings: Dict[str, str]
 
 
-def _admin_only(current_user: User = Depends(require_role('admin'))) -> User:
+def _admin_only(current_user: Principal = Depends(require_role('admin'))) -> Principal:
     return current_user
 
 
@@ -53,7 +54,7 @@ def _ensure_defaults(db: Session):
 @router.get("", response_model=List[SettingResponse])
 def get_settings(
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     _ensure_defaults(db)
     return db.query(Setting).order_by(Setting.key).all()
@@ -63,7 +64,7 @@ def get_settings(
 def update_settings(
     data: SettingsUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_only),
+    current_user: Principal = Depends(_admin_only),
 ):
     _ensure_defaults(db)
     for key, value in data.settings.items():
@@ -1,19 +1,21 @@
 import re
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, field_validator
-from passlib.context import CryptContext
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 from app.database import get_db
 from app.models import User, Employee
 from app.middleware.auth import get_current_user, require_role
+from app.middleware.principal_cache import Principal, principal_cache
+from app.middleware.scoping import assignment_cache
+from app.responses import FastJSONResponse, fast_json, pick, records, sparse_fields
+from app.services.passwords import password_hasher
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security_logger = logging.getLogger("security")
 
 _USERNAME_RE = re.compile(r'^[a-zA-Z0-9._-]{3,50}$')
@@ -94,32 +96,53 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+_user_fields = sparse_fields(tuple(UserResponse.model_fields))
+
+
 # --- Helper ---
 
-def _admin_required(current_user: User = Depends(require_role('admin'))) -> User:
+def _admin_required(current_user: Principal = Depends(require_role('admin'))) -> Principal:
     return current_user
 
 
 # GET /api/users
 @router.get("", response_model=List[UserResponse])
 def list_users(
+    response: Response,
+    fields: Tuple[str, ...] = _user_fields,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
-    return db.query(User).all()
+    selected = [field for field in fields if field != "employee"]
+    columns = [getattr(User, field) for field in selected]
+    if "employee" not in fields:
+        return fast_json(records(db.query(*columns), selected), response)
+
+    rows = (
+        db.query(User.employee_id, Employee.first_name, Employee.last_name, *columns)
+        .outerjoin(Employee, Employee.id == User.employee_id)
+    )
+    users = []
+    for employee_id, first_name, last_name, *values in rows:
+        user = dict(zip(selected, values))
+        user["employee"] = {"id": employee_id, "first_name": first_name, "last_name": last_name} \
+            if first_name is not None else None
+        users.append(user)
+    return fast_json(users, response)
 
 
 # GET /api/users/:id
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
     user_id: int,
+    fields: Tuple[str, ...] = _user_fields,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return FastJSONResponse(pick(UserResponse, user, fields))
 
 
 # POST /api/users
@@ -127,7 +150,7 @@ def get_user(
 def create_user(
     data: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     existing = db.query(User).filter(User.username == data.username).first()
     if existing:
@@ -147,7 +170,7 @@ def create_user(
 
     user = User(
         username=data.username,
-        password_hash=pwd_context.hash(data.password),
+        password_hash=password_hasher.hash_blocking(data.password),
         role=data.role,
         employee_id=data.employee_id,
         force_password_change=True,
@@ -165,7 +188,7 @@ def update_user(
     user_id: int,
     data: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     if current_user.id == user_id and data.role is not None and data.role != current_user.role:
         raise HTTPException(status_code=400, detail="Cannot change own role")
@@ -195,6 +218,8 @@ def update_user(
 
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.id)
+    assignment_cache.invalidate(user.id)
     security_logger.info("User updated: %s by %s", user.username, current_user.username)
     return user
 
@@ -204,7 +229,7 @@ def update_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(_admin_required),
+    current_user: Principal = Depends(_admin_required),
 ):
     if current_user.id == user_id:
         raise HTTPException(status_code=400, detail="Cannot delete own account")
@@ -220,6 +245,8 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate_user(user_id)
+    assignment_cache.invalidate(user_id)
     security_logger.info("User deleted: %s by %s", user.username, current_user.username)
     return {"message": "User deleted successfully"}
 
@@ -230,7 +257,7 @@ def change_user_password(
     user_id: int,
     data: PasswordChange,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if current_user.role != 'admin' and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
@@ -239,8 +266,9 @@ def change_user_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = pwd_context.hash(data.new_password)
+    user.password_hash = password_hasher.hash_blocking(data.new_password)
     user.force_password_change = True
     db.commit()
+    principal_cache.invalidate_user(user.id)
     security_logger.info("Password changed for user %s by %s", user.username, current_user.username)
     return {"message": "Password updated successfully"}
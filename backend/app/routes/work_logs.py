@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, cast, func, select, Float
 from pydantic import BaseModel, field_validator
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.formats import MEDIA_TYPES, aiter_cursor_batches, encode, encode_async, response_format
 from app.models import WorkLog, Employee, User
-from app.middleware.auth import get_current_user
+from app.middleware.caching import conditional_get, table_version
+from app.middleware.coalescing import coalesce
+from app.middleware.scoping import DataScope, get_data_scope
+from app.responses import FastJSONResponse, fast_json, pick, records, sparse_fields
+from app.services.cost_ledger import record_work_log_cost
+from app.services.executors import executors
 
 router = APIRouter()
 
@@ -45,6 +53,30 @@ class WorkLogResponse(WorkLogBase):
     class Config:
         from_attributes = True
 
+# WorkLogResponse fields read straight from columns (see app.responses)
+_WORK_LOG_FIELDS = (
+    "employee_id", "work_date", "work_hours", "overtime_hours", "vacation_hours", "sick_leave_hours",
+    "other_hours", "absent_hours", "notes", "id", "created_at", "updated_at",
+)
+_work_log_fields = sparse_fields(tuple(WorkLogResponse.model_fields))
+# Column kinds for the binary formats (app.formats); hours are cast to float in SQL
+_WORK_LOG_KINDS = {
+    "employee_id": "int", "work_date": "date", "work_hours": "float", "overtime_hours": "float",
+    "vacation_hours": "float", "sick_leave_hours": "float", "other_hours": "float", "absent_hours": "float",
+    "notes": "str", "id": "int", "created_at": "datetime", "updated_at": "datetime",
+}
+_SUMMARY_KINDS = [
+    ("total_work_hours", "float"), ("total_overtime_hours", "float"), ("total_vacation_hours", "float"),
+    ("total_sick_leave_hours", "float"), ("total_absent_hours", "float"), ("total_other_hours", "float"),
+    ("total_logs", "int"),
+]
+
+
+def _column(field: str, binary: bool):
+    column = getattr(WorkLog, field)
+    return cast(column, Float).label(field) if binary and _WORK_LOG_KINDS[field] == "float" else column
+
+
 def validate_total_hours(work_log: WorkLogBase) -> Optional[str]:
     """Validate total hours and return warning if > 12"""
     total = (work_log.work_hours + work_log.overtime_hours + 
@@ -55,18 +87,28 @@ def validate_total_hours(work_log: WorkLogBase) -> Optional[str]:
         return f"Warning: Total hours ({total}) exceeds 12 hours per day"
     return None
 
-@router.get("", response_model=List[WorkLogResponse])
-def get_work_logs(
+@router.get("", response_model=List[WorkLogResponse], dependencies=[conditional_get(table_version(WorkLog, WorkLog.employee_id))])
+async def get_work_logs(
+    response: Response,
     employee_id: Optional[int] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    fields: Tuple[str, ...] = _work_log_fields,
+    output: str = Depends(response_format),
+    db: AsyncSession = Depends(get_async_db),
+    scope: DataScope = Depends(get_data_scope)
 ):
-    """Get work logs with optional filters"""
-    query = db.query(WorkLog)
+    """Get work logs with optional filters (JSON, Arrow or MessagePack by Accept)"""
+    binary = output != "json"
+    selected = [field for field in fields if field in _WORK_LOG_FIELDS]
+    # Only non-column fields (warning) requested: a query needs at least one column
+    with_id_only = not selected
+    if with_id_only:
+        selected.append("id")
+    columns = [_column(field, binary) for field in selected]
+    query = scope.apply(select(*columns), WorkLog.employee_id)
     
     if employee_id:
         query = query.filter(WorkLog.employee_id == employee_id)
@@ -77,65 +119,74 @@ def get_work_logs(
     if end_date:
         query = query.filter(WorkLog.work_date <= end_date)
     
-    work_logs = query.offset(skip).limit(limit).all()
-    return work_logs
-
-@router.get("/summary")
-def get_work_logs_summary(db: Session = Depends(get_db),
-                          current_user: User = Depends(get_current_user)):
-    """Get summary of all work logs"""
-    work_logs = db.query(WorkLog).all()
-    
-    if not work_logs:
-        return {
-            "total_work_hours": 0,
-            "total_overtime_hours": 0,
-            "total_vacation_hours": 0,
-            "total_sick_leave_hours": 0,
-            "total_absent_hours": 0,
-            "total_other_hours": 0,
-            "total_logs": 0
-        }
-    
-    total_work = 0
-    total_overtime = 0
-    total_vacation = 0
-    total_sick = 0
-    total_absent = 0
-    total_other = 0
+    query = query.offset(skip).limit(limit)
+    if binary:
+        executors["reporting"].check_capacity()
+        chunks = encode_async(output, [(field, _WORK_LOG_KINDS[field]) for field in selected],
+                              aiter_cursor_batches(db.bind, query))
+        return StreamingResponse(chunks, media_type=MEDIA_TYPES[output], headers=dict(response.headers))
+
+    work_logs = records(await db.execute(query), selected)
+    for work_log in work_logs:
+        if with_id_only:
+            del work_log["id"]
+        if "warning" in fields:
+            work_log["warning"] = None
+    return fast_json(work_logs, response)
+
+@router.get("/summary", dependencies=[conditional_get(table_version(WorkLog, WorkLog.employee_id))])
+@coalesce
+async def get_work_logs_summary(response: Response, output: str = Depends(response_format),
+                                db: AsyncSession = Depends(get_async_db),
+                                scope: DataScope = Depends(get_data_scope)):
+    """Get summary of all work logs (JSON, Arrow or MessagePack by Accept)"""
+    summary = await _work_logs_summary(db, scope)
+    if output == "json":
+        return summary
+    return Response(b"".join(encode(output, _SUMMARY_KINDS, [[summary]])), media_type=MEDIA_TYPES[output],
+                    headers=dict(response.headers))
+
+
+_SUMMED = (
+    ("total_work_hours", WorkLog.work_hours),
+    ("total_overtime_hours", WorkLog.overtime_hours),
+    ("total_vacation_hours", WorkLog.vacation_hours),
+    ("total_sick_leave_hours", WorkLog.sick_leave_hours),
+    ("total_absent_hours", WorkLog.absent_hours),
+    ("total_other_hours", WorkLog.other_hours),
+)
+
+
+async def _work_logs_summary(db: AsyncSession, scope: DataScope) -> dict:
+    # Summed in SQL rather than by loading every work log
+    stmt = select(func.count(WorkLog.id), *(func.sum(column) for _, column in _SUMMED))
+    total_logs, *totals = (await db.execute(scope.apply(stmt, WorkLog.employee_id))).one()
+    
+    if not total_logs:
+        return {**{name: 0 for name, _ in _SUMMED}, "total_logs": 0}
     
     # Convert Decimal to float for JSON serialization
-    for log in work_logs:
-        total_work += float(log.work_hours)
-        total_overtime += float(log.overtime_hours)
-        total_vacation += float(log.vacation_hours)
-        total_sick += float(log.sick_leave_hours)
-        total_absent += float(log.absent_hours)
-        total_other += float(log.other_hours)
-    
     return {
-        "total_work_hours": total_work,
-        "total_overtime_hours": total_overtime,
-        "total_vacation_hours": total_vacation,
-        "total_sick_leave_hours": total_sick,
-        "total_absent_hours": total_absent,
-        "total_other_hours": total_other,
-        "total_logs": len(work_logs)
+        **{name: float(total or 0) for (name, _), total in zip(_SUMMED, totals)},
+        "total_logs": total_logs,
     }
 
 @router.get("/{work_log_id}", response_model=WorkLogResponse)
-def get_work_log(work_log_id: int, db: Session = Depends(get_db),
-                 current_user: User = Depends(get_current_user)):
+def get_work_log(work_log_id: int, fields: Tuple[str, ...] = _work_log_fields,
+                 db: Session = Depends(get_db),
+                 scope: DataScope = Depends(get_data_scope)):
     """Get work log by ID"""
     work_log = db.query(WorkLog).filter(WorkLog.id == work_log_id).first()
     if not work_log:
         raise HTTPException(status_code=404, detail="Work log not found")
-    return work_log
+    scope.require_employee(db, work_log.employee_id)
+    return FastJSONResponse(pick(WorkLogResponse, work_log, fields))
 
 @router.post("", response_model=WorkLogResponse, status_code=201)
 def create_work_log(work_log: WorkLogCreate, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    scope: DataScope = Depends(get_data_scope)):
     """Create a new work log"""
+    scope.require_employee(db, work_log.employee_id)
     # Check if employee exists
     employee = db.query(Employee).filter(Employee.id == work_log.employee_id).first()
     if not employee:
@@ -159,6 +210,8 @@ def create_work_log(work_log: WorkLogCreate, db: Session = Depends(get_db),
     # Create work log
     db_work_log = WorkLog(**work_log.model_dump())
     db.add(db_work_log)
+    db.flush()
+    record_work_log_cost(db, db_work_log)
     db.commit()
     db.refresh(db_work_log)
     
@@ -170,11 +223,13 @@ def create_work_log(work_log: WorkLogCreate, db: Session = Depends(get_db),
 
 @router.put("/{work_log_id}", response_model=WorkLogResponse)
 def update_work_log(work_log_id: int, work_log: WorkLogUpdate, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    scope: DataScope = Depends(get_data_scope)):
     """Update a work log"""
     db_work_log = db.query(WorkLog).filter(WorkLog.id == work_log_id).first()
     if not db_work_log:
         raise HTTPException(status_code=404, detail="Work log not found")
+    scope.require_employee(db, db_work_log.employee_id)
+    scope.require_employee(db, work_log.employee_id)
     
     # Check if employee exists
     employee = db.query(Employee).filter(Employee.id == work_log.employee_id).first()
@@ -202,6 +257,7 @@ def update_work_log(work_log_id: int, work_log: WorkLogUpdate, db: Session = Dep
     # Update work log
     for key, value in work_log.model_dump().items():
         setattr(db_work_log, key, value)
+    record_work_log_cost(db, db_work_log)
     
     # The updated_at field is automatically updated by SQLAlchemy onupdate
     db.commit()
@@ -215,11 +271,12 @@ def update_work_log(work_log_id: int, work_log: WorkLogUpdate, db: Session = Dep
 
 @router.delete("/{work_log_id}", status_code=204)
 def delete_work_log(work_log_id: int, db: Session = Depends(get_db),
-                    current_user: User = Depends(get_current_user)):
+                    scope: DataScope = Depends(get_data_scope)):
     """Delete a work log"""
     db_work_log = db.query(WorkLog).filter(WorkLog.id == work_log_id).first()
     if not db_work_log:
         raise HTTPException(status_code=404, detail="Work log not found")
+    scope.require_employee(db, db_work_log.employee_id)
     
     db.delete(db_work_log)
     db.commit()
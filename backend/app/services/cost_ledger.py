@@ -0,0 +1,178 @@
+"""Effective-dated employee rates and the materialised work log cost ledger."""
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Employee, EmployeeRate, WorkLog, WorkLogCost
+
+# Used when neither the rate history nor the employee record has a rate
+DEFAULT_HOURLY_RATE = 25.0
+DEFAULT_OVERTIME_MULTIPLIER = 1.5
+
+_CENT = Decimal("0.01")
+
+
+def _to_money(value: float) -> Decimal:
+    return Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _rate_pair(hourly_rate: Optional[float], overtime_rate: Optional[float]) -> Optional[Tuple[float, float]]:
+    if hourly_rate is None:
+        return None
+    if overtime_rate is None:
+        overtime_rate = hourly_rate * DEFAULT_OVERTIME_MULTIPLIER
+    return hourly_rate, overtime_rate
+
+
+class RateBook:
+    """Rate history for a set of employees, loaded in one query and resolved by date."""
+
+    def __init__(self, db: Session, employee_ids: Optional[Iterable[int]] = None):
+        rates_query = db.query(EmployeeRate)
+        employees_query = db.query(Employee.id, Employee.hourly_rate, Employee.overtime_rate)
+        if employee_ids is not None:
+            employee_ids = list(employee_ids)
+            rates_query = rates_query.filter(EmployeeRate.employee_id.in_(employee_ids))
+            employees_query = employees_query.filter(Employee.id.in_(employee_ids))
+
+        self._history: Dict[int, Tuple[List[date], List[Tuple[float, float]]]] = {}
+        for rate in rates_query.order_by(EmployeeRate.employee_id, EmployeeRate.effective_from):
+            dates, pairs = self._history.setdefault(rate.employee_id, ([], []))
+            dates.append(rate.effective_from)
+            pairs.append(_rate_pair(rate.hourly_rate, rate.overtime_rate))
+
+        self._current = {
+            emp_id: _rate_pair(hourly_rate, overtime_rate)
+            for emp_id, hourly_rate, overtime_rate in employees_query
+        }
+
+    def resolve(self, employee_id: int, on_date: date) -> Tuple[float, float]:
+        """Return (hourly_rate, overtime_rate) in effect for an employee on a date.
+
+        Dates before the first history entry use the earliest known rate;
+        employees without any history fall back to their current rates, then
+        to the defaults.
+        """
+        history = self._history.get(employee_id)
+        if history:
+            dates, pairs = history
+            index = bisect_right(dates, on_date) - 1
+            return pairs[max(index, 0)]
+        current = self._current.get(employee_id)
+        if current:
+            return current
+        return DEFAULT_HOURLY_RATE, DEFAULT_HOURLY_RATE * DEFAULT_OVERTIME_MULTIPLIER
+
+
+def compute_costs(work_log: WorkLog, hourly_rate: float, overtime_rate: float) -> Dict[str, Decimal]:
+    """Cost breakdown for one log; absent hours are unpaid."""
+    base_hours = sum(
+        float(getattr(work_log, field) or 0)
+        for field in ("work_hours", "vacation_hours", "sick_leave_hours", "other_hours")
+    )
+    base_cost = _to_money(base_hours * hourly_rate)
+    overtime_cost = _to_money(float(work_log.overtime_hours or 0) * overtime_rate)
+    return {
+        "base_cost": base_cost,
+        "overtime_cost": overtime_cost,
+        "total_cost": base_cost + overtime_cost,
+    }
+
+
+def _apply(db: Session, work_log: WorkLog, rates: Tuple[float, float]) -> WorkLogCost:
+    hourly_rate, overtime_rate = rates
+    entry = work_log.cost
+    if entry is None:
+        entry = WorkLogCost(work_log_id=work_log.id)
+        work_log.cost = entry
+    entry.employee_id = work_log.employee_id
+    entry.work_date = work_log.work_date
+    entry.hourly_rate = hourly_rate
+    entry.overtime_rate = overtime_rate
+    for key, value in compute_costs(work_log, hourly_rate, overtime_rate).items():
+        setattr(entry, key, value)
+    return entry
+
+
+def record_work_log_cost(db: Session, work_log: WorkLog) -> WorkLogCost:
+    """Write (or rewrite) the ledger entry for a work log; the caller commits."""
+    rates = RateBook(db, [work_log.employee_id]).resolve(work_log.employee_id, work_log.work_date)
+    return _apply(db, work_log, rates)
+
+
+def rebuild_cost_ledger(db: Session, employee_id: Optional[int] = None,
+                        since: Optional[date] = None, batch_size: int = 1000) -> int:
+    """Recompute ledger entries after rate corrections; returns the number of logs processed."""
+    book = RateBook(db, [employee_id] if employee_id is not None else None)
+    query = db.query(WorkLog)
+    if employee_id is not None:
+        query = query.filter(WorkLog.employee_id == employee_id)
+    if since is not None:
+        query = query.filter(WorkLog.work_date >= since)
+
+    processed = 0
+    last_id = 0
+    while True:
+        batch = (
+            query.options(selectinload(WorkLog.cost))
+            .filter(WorkLog.id > last_id)
+            .order_by(WorkLog.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for work_log in batch:
+            _apply(db, work_log, book.resolve(work_log.employee_id, work_log.work_date))
+        db.commit()
+        processed += len(batch)
+        last_id = batch[-1].id
+        db.expunge_all()
+    return processed
+
+
+def set_employee_rate(db: Session, employee: Employee, hourly_rate: float,
+                      overtime_rate: Optional[float], effective_from: date,
+                      created_by: Optional[int] = None) -> EmployeeRate:
+    """Add or replace the rate effective from a date and sync the employee's current rates.
+
+    The caller commits and then rebuilds the ledger from effective_from.
+    """
+    rate = db.query(EmployeeRate).filter(
+        EmployeeRate.employee_id == employee.id,
+        EmployeeRate.effective_from == effective_from,
+    ).first()
+    if rate is None:
+        rate = EmployeeRate(employee_id=employee.id, effective_from=effective_from)
+        db.add(rate)
+    rate.hourly_rate = hourly_rate
+    rate.overtime_rate = overtime_rate
+    rate.created_by = created_by
+    db.flush()
+
+    current = (
+        db.query(EmployeeRate)
+        .filter(EmployeeRate.employee_id == employee.id, EmployeeRate.effective_from <= date.today())
+        .order_by(EmployeeRate.effective_from.desc())
+        .first()
+    )
+    if current is not None:
+        employee.hourly_rate = current.hourly_rate
+        employee.overtime_rate = current.overtime_rate
+    return rate
+
+
+def rebuild_start(db: Session, employee_id: int, effective_from: date) -> Optional[date]:
+    """First work date whose cost can change when a rate effective from a date is added.
+
+    The earliest rate also governs every date before it, so adding one
+    requires rebuilding the employee's whole ledger (None).
+    """
+    earlier = db.query(EmployeeRate).filter(
+        EmployeeRate.employee_id == employee_id,
+        EmployeeRate.effective_from < effective_from,
+    ).first()
+    return effective_from if earlier else None
@@ -0,0 +1,199 @@
+"""Named thread pools (bulkheads) for different classes of blocking work.
+
+Sync route handlers share AnyIO's default thread pool, so a few pg_dump
+backups (up to 300 s each) and PDF reports could occupy every thread and
+stall plain CRUD. Slow work runs on its own bounded executor instead:
+
+- ``interactive``: AnyIO's default pool, used by every sync handler that
+  does not declare otherwise; EXECUTOR_INTERACTIVE_WORKERS resizes it on
+  startup. The adaptive concurrency limit sheds its excess load.
+- ``reporting``: report aggregation, PDF and payroll exports.
+- ``backup``: pg_dump and archive handling.
+- ``crypto``: bcrypt (see ``app.services.passwords``).
+
+Each bounded executor has EXECUTOR_<NAME>_WORKERS threads and admits up to
+EXECUTOR_<NAME>_QUEUE_LIMIT waiting calls; beyond that callers get a 503.
+Handlers opt in with ``@runs_on("reporting")`` below the route decorator.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator
+
+import anyio.to_thread
+from fastapi import HTTPException, status
+
+
+class ExecutorBusy(HTTPException):
+    """Raised when an executor's queue is full."""
+
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+
+class BoundedExecutor:
+    """A thread pool that rejects work instead of queueing without bound."""
+
+    def __init__(self, name: str, max_workers: int, queue_limit: int,
+                 busy_detail: str = "Server is busy, please retry shortly"):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.busy_detail = busy_detail
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def check_capacity(self) -> None:
+        """Raise ExecutorBusy if bounded work would be rejected now.
+
+        For streaming responses, whose chunks are submitted unbounded once
+        the response has started: call it before returning the response.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.queue_limit:
+                self._rejected += 1
+                raise ExecutorBusy(self.busy_detail)
+
+    def submit(self, fn: Callable, *args, bounded: bool = True, **kwargs) -> Future:
+        """Schedule fn; raises ExecutorBusy when the queue is full, unless bounded is False."""
+        with self._lock:
+            if bounded and self._in_flight >= self.max_workers + self.queue_limit:
+                self._rejected += 1
+                raise ExecutorBusy(self.busy_detail)
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._wait_seconds += started - submitted
+                    self._max_wait_seconds = max(self._max_wait_seconds, started - submitted)
+                    self._run_seconds += finished - started
+
+        return self._executor.submit(timed)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def run_blocking(self, fn: Callable, *args, **kwargs):
+        """Run from a worker thread; the calling thread only waits, the work runs on this pool."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def iterate(self, iterator: Iterator) -> AsyncIterator:
+        """Drive a blocking iterator (e.g. a streaming response body) on this pool.
+
+        Chunks are not subject to the queue limit: the status has been sent
+        by the time the first one is requested, so a started response is
+        finished rather than cut off. Call ``check_capacity`` beforehand.
+        """
+        done = object()
+        chunk = await asyncio.wrap_future(self.submit(next, iterator, done, bounded=False))
+        while chunk is not done:
+            yield chunk
+            chunk = await asyncio.wrap_future(self.submit(next, iterator, done, bounded=False))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "peak_in_flight": self._peak_in_flight,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else None,
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 2) if completed else None,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 2) if completed else None,
+            }
+
+
+def _setting(name: str, key: str, default: int) -> int:
+    return int(os.getenv(f"EXECUTOR_{name.upper()}_{key}", str(default)))
+
+
+INTERACTIVE_WORKERS = _setting("interactive", "WORKERS", 40)
+
+executors: Dict[str, BoundedExecutor] = {
+    "reporting": BoundedExecutor(
+        "reporting",
+        max_workers=_setting("reporting", "WORKERS", min(4, os.cpu_count() or 1)),
+        queue_limit=_setting("reporting", "QUEUE_LIMIT", 16),
+        busy_detail="Reporting is busy, please retry shortly",
+    ),
+    "backup": BoundedExecutor(
+        "backup",
+        max_workers=_setting("backup", "WORKERS", 1),
+        queue_limit=_setting("backup", "QUEUE_LIMIT", 1),
+        busy_detail="A backup operation is already running, please retry later",
+    ),
+    "crypto": BoundedExecutor(
+        "crypto",
+        # PASSWORD_HASH_* predate the executor registry and are still honoured
+        max_workers=_setting("crypto", "WORKERS", int(os.getenv(
+            "PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))),
+        queue_limit=_setting("crypto", "QUEUE_LIMIT", int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))),
+        busy_detail="Authentication service is busy, please retry shortly",
+    ),
+}
+
+
+def configure_interactive_pool() -> None:
+    """Size AnyIO's default thread pool; call from within the event loop."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = INTERACTIVE_WORKERS
+
+
+def interactive_stats() -> Dict:
+    """Stats for AnyIO's default thread pool; call from within the event loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "workers": limiter.total_tokens,
+        "in_flight": limiter.borrowed_tokens,
+        "queued": limiter.tasks_waiting,
+    }
+
+
+def executor_stats() -> Dict:
+    stats = {"interactive": interactive_stats()}
+    stats.update({name: executor.stats() for name, executor in executors.items()})
+    return stats
+
+
+def runs_on(name: str):
+    """Run a sync route handler on the named executor instead of the shared pool.
+
+    Place it below the route decorator. Dependencies still resolve on the
+    shared pool; only the handler body moves.
+    """
+    executor = executors[name]
+
+    def decorator(handler: Callable):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            return await executor.run(handler, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+"""Password hashing and verification on the ``crypto`` executor.
+
+bcrypt is deliberately slow, so running it on the shared threadpool lets a
+burst of logins starve every other sync endpoint. All hashing goes through
+``password_hasher`` instead, which runs it on the small, bounded ``crypto``
+executor (see ``app.services.executors``); once its queue is full callers
+get a 503 rather than piling up.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.services.executors import BoundedExecutor, executors
+
+# bcrypt cost factor; hashes with any other cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class PasswordHasher:
+    """Runs CryptContext operations on a bounded executor."""
+
+    def __init__(self, context: CryptContext, executor: BoundedExecutor):
+        self.context = context
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._rehashed = 0
+
+    async def hash(self, password: str) -> str:
+        return await self.executor.run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; the second item is a new hash when the stored cost is outdated."""
+        valid, new_hash = await self.executor.run(
+            self.context.verify_and_update, password, password_hash
+        )
+        if new_hash is not None:
+            with self._lock:
+                self._rehashed += 1
+        return valid, new_hash
+
+    def hash_blocking(self, password: str) -> str:
+        """Hash from a sync endpoint; the calling thread only waits, the work runs on the pool."""
+        return self.executor.run_blocking(self.context.hash, password)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rehashed = self._rehashed
+        # Pool stats are reported with the other executors
+        return {"rounds": BCRYPT_ROUNDS, "rehashed": rehashed, "executor": self.executor.name}
+
+
+password_hasher = PasswordHasher(pwd_context, executors["crypto"])
@@ -150,6 +150,12 @@ def generate_owner_report_pdf(employee_data: Dict, work_logs: List[Dict], start_
         'total_hours': 0,
         'total_cost': 0
     }
+    category_costs = {
+        'work_cost': 0,
+        'overtime_cost': 0,
+        'vacation_cost': 0,
+        'sick_cost': 0,
+    }
     
     for log in work_logs:
         work_hrs = float(log['work_hours'])
@@ -159,11 +165,22 @@ def generate_owner_report_pdf(employee_data: Dict, work_logs: List[Dict], start_
         other_hrs = float(log['other_hours'])
         
         row_total_hrs = work_hrs + overtime_hrs + vacation_hrs + sick_hrs + other_hrs
-        row_cost = (work_hrs * hourly_rate + 
-                   overtime_hrs * hourly_rate * overtime_multiplier +
-                   vacation_hrs * hourly_rate +
-                   sick_hrs * hourly_rate +
-                   other_hrs * hourly_rate)
+        costs = log.get('costs')
+        if costs:
+            # Per-log costs (from the cost ledger) may use different rates over the period
+            row_cost = costs['total_cost']
+            for key in category_costs:
+                category_costs[key] += costs[key]
+        else:
+            row_cost = (work_hrs * hourly_rate + 
+                       overtime_hrs * hourly_rate * overtime_multiplier +
+                       vacation_hrs * hourly_rate +
+                       sick_hrs * hourly_rate +
+                       other_hrs * hourly_rate)
+            category_costs['work_cost'] += work_hrs * hourly_rate
+            category_costs['overtime_cost'] += overtime_hrs * hourly_rate * overtime_multiplier
+            category_costs['vacation_cost'] += vacation_hrs * hourly_rate
+            category_costs['sick_cost'] += sick_hrs * hourly_rate
         
         table_data.append([
             str(log['work_date']),
@@ -215,10 +232,10 @@ def generate_owner_report_pdf(employee_data: Dict, work_logs: List[Dict], start_
     # Financial summary
     summary = Paragraph(
         f"<b>Financial Summary:</b><br/>"
-        f"Total Work Hours: {totals['work_hours']:.2f} @ ${hourly_rate:.2f}/hr = ${totals['work_hours'] * hourly_rate:.2f}<br/>"
-        f"Total Overtime: {totals['overtime_hours']:.2f} @ ${hourly_rate * overtime_multiplier:.2f}/hr = ${totals['overtime_hours'] * hourly_rate * overtime_multiplier:.2f}<br/>"
-        f"Total Vacation: {totals['vacation_hours']:.2f} @ ${hourly_rate:.2f}/hr = ${totals['vacation_hours'] * hourly_rate:.2f}<br/>"
-        f"Total Sick Leave: {totals['sick_leave_hours']:.2f} @ ${hourly_rate:.2f}/hr = ${totals['sick_leave_hours'] * hourly_rate:.2f}<br/>"
+        f"Total Work Hours: {totals['work_hours']:.2f} = ${category_costs['work_cost']:.2f}<br/>"
+        f"Total Overtime: {totals['overtime_hours']:.2f} = ${category_costs['overtime_cost']:.2f}<br/>"
+        f"Total Vacation: {totals['vacation_hours']:.2f} = ${category_costs['vacation_cost']:.2f}<br/>"
+        f"Total Sick Leave: {totals['sick_leave_hours']:.2f} = ${category_costs['sick_cost']:.2f}<br/>"
         f"<b>GRAND TOTAL COST: ${totals['total_cost']:.2f}</b>",
         styles['Normal']
     )
@@ -227,3 +244,76 @@ def generate_owner_report_pdf(employee_data: Dict, work_logs: List[Dict], start_
     doc.build(elements)
     buffer.seek(0)
     return buffer.getvalue()
+
+
+def generate_comparison_report_pdf(periods: List[Dict], employees: List[Dict], totals: Dict) -> bytes:
+    """
+    Generate PDF period-over-period comparison (hours only)
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+    styles = getSampleStyleSheet()
+    labels = {period['key']: period['label'] for period in periods}
+
+    # Title
+    title = Paragraph(f"<b>Work Hours Comparison - {labels['current']}</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 0.2*inch))
+
+    period_info = Paragraph(
+        f"<b>Compared with:</b> {labels['previous_month']} (previous month), "
+        f"{labels['previous_year']} (same month last year)",
+        styles['Normal']
+    )
+    elements.append(period_info)
+    elements.append(Spacer(1, 0.3*inch))
+
+    def _change_text(change: Dict) -> str:
+        if change['percent'] is None:
+            return f"{change['hours']:+.2f}"
+        return f"{change['hours']:+.2f} ({change['percent']:+.1f}%)"
+
+    table_data = [
+        ['Employee', labels['current'], labels['previous_month'], 'Change',
+         labels['previous_year'], 'Change']
+    ]
+    for entry in employees:
+        employee = entry['employee']
+        hours = entry['periods']
+        table_data.append([
+            f"{employee['first_name']} {employee['last_name']}",
+            f"{hours['current']['total_hours']:.2f}",
+            f"{hours['previous_month']['total_hours']:.2f}",
+            _change_text(entry['change']['vs_previous_month']),
+            f"{hours['previous_year']['total_hours']:.2f}",
+            _change_text(entry['change']['vs_previous_year']),
+        ])
+
+    table_data.append([
+        'TOTAL',
+        f"{totals['current']['total_hours']:.2f}",
+        f"{totals['previous_month']['total_hours']:.2f}",
+        '',
+        f"{totals['previous_year']['total_hours']:.2f}",
+        '',
+    ])
+
+    table = Table(table_data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(table)
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer.getvalue()
@@ -0,0 +1,176 @@
+"""Revoked JWT ids (jti): a per-process Bloom filter in front of the revoked_tokens table.
+
+Checking a token that was never revoked, which is nearly every request,
+costs a few bit probes in the Bloom filter. A hit is confirmed against the
+database and the answer is kept in a short-TTL exact set. This covers the
+filter's false positives and keeps a revoked token from querying the
+database on every retry. Workers pick up each other's revocations by
+pulling new revoked_tokens rows (by id) every REVOCATION_SYNC_SECONDS. Ids
+are not committed in order, so each pull re-reads the last
+REVOCATION_SYNC_OVERLAP_IDS ids as well, catching a lower id that committed
+after a higher one had been pulled. Every REVOCATION_REBUILD_SECONDS
+workers rebuild the filter from unexpired rows, so that expired entries do
+not accumulate.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import RevokedToken
+
+logger = logging.getLogger("security")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using Python's (per-process salted) str hash."""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, value: str) -> None:
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        h1, h2, size, bits = h & 0xFFFFFFFF, (h >> 32) | 1, self.size, self._bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        # Hot path: most lookups stop at the first unset bit
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        h1, h2, size, bits = h & 0xFFFFFFFF, (h >> 32) | 1, self.size, self._bits
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class TokenRevocationList:
+    """Answers "is this jti revoked?" without touching the database in the common case."""
+
+    def __init__(self, capacity: int = 100000, sync_interval: float = 5.0,
+                 rebuild_interval: float = 3600.0, confirm_ttl: float = 60.0,
+                 max_confirmed: int = 10000, sync_overlap: int = 1000):
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self.sync_overlap = sync_overlap
+        self.rebuild_interval = rebuild_interval
+        self.confirm_ttl = confirm_ttl
+        self.max_confirmed = max_confirmed
+        self._sync_lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all state; the next check rebuilds from the database."""
+        self._bloom = BloomFilter(self.capacity)
+        self._confirmed: Dict[str, Tuple[float, bool]] = {}
+        self._last_id = 0
+        self._synced_at = 0.0
+        self._rebuilt_at = 0.0
+        self.filter_hits = 0
+        self.db_lookups = 0
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        now = time.monotonic()
+        if now - self._synced_at >= self.sync_interval:
+            self._sync(db, now)
+        if jti not in self._bloom:
+            return False
+
+        self.filter_hits += 1
+        confirmed = self._confirmed.get(jti)
+        if confirmed is not None and confirmed[0] > now:
+            return confirmed[1]
+        self.db_lookups += 1
+        revoked = db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is not None
+        self._remember(jti, revoked, now)
+        return revoked
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime, user_id: Optional[int] = None) -> None:
+        """Persist a revocation and apply it to this worker at once; commits."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+        if db.query(RevokedToken.id).filter(RevokedToken.jti == jti).first() is None:
+            db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.commit()
+        self._bloom.add(jti)
+        self._remember(jti, True, time.monotonic())
+        logger.info("Token revoked: jti=%s user_id=%s", jti, user_id)
+
+    def _remember(self, jti: str, revoked: bool, now: float) -> None:
+        if len(self._confirmed) >= self.max_confirmed:
+            self._confirmed = {k: v for k, v in self._confirmed.items() if v[0] > now}
+            if len(self._confirmed) >= self.max_confirmed:
+                self._confirmed.clear()
+        self._confirmed[jti] = (now + self.confirm_ttl, revoked)
+
+    def _sync(self, db: Session, now: float) -> None:
+        # Other requests keep using the current filter while one of them syncs
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if now - self._rebuilt_at >= self.rebuild_interval:
+                self._rebuild(db)
+                self._rebuilt_at = now
+            else:
+                rows = (
+                    db.query(RevokedToken.id, RevokedToken.jti)
+                    .filter(RevokedToken.id > self._last_id - self.sync_overlap)
+                    .order_by(RevokedToken.id)
+                    .all()
+                )
+                self._add_rows(self._bloom, rows)
+            self._synced_at = now
+        finally:
+            self._sync_lock.release()
+
+    def _rebuild(self, db: Session) -> None:
+        utcnow = datetime.now(timezone.utc).replace(tzinfo=None)
+        # Read the cursor first so rows inserted meanwhile are pulled again, not skipped
+        last_id = db.query(func.max(RevokedToken.id)).scalar() or 0
+        rows = (
+            db.query(RevokedToken.id, RevokedToken.jti)
+            .filter(RevokedToken.expires_at >= utcnow)
+            .order_by(RevokedToken.id)
+            .all()
+        )
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)))
+        self._last_id = last_id
+        self._add_rows(bloom, rows)
+        self._bloom = bloom
+
+    def _add_rows(self, bloom: BloomFilter, rows: Iterable) -> None:
+        for row_id, jti in rows:
+            if jti not in bloom:  # re-read by the sync overlap
+                bloom.add(jti)
+            self._last_id = max(self._last_id, row_id)
+
+    def stats(self) -> Dict:
+        return {
+            "filter_entries": self._bloom.count,
+            "filter_bits": self._bloom.size,
+            "filter_hashes": self._bloom.hashes,
+            "filter_hits": self.filter_hits,
+            "db_lookups": self.db_lookups,
+            "confirmed_cached": len(self._confirmed),
+        }
+
+
+token_revocation = TokenRevocationList(
+    capacity=int(os.getenv("REVOCATION_FILTER_CAPACITY", "100000")),
+    sync_interval=float(os.getenv("REVOCATION_SYNC_SECONDS", "5")),
+    rebuild_interval=float(os.getenv("REVOCATION_REBUILD_SECONDS", "3600")),
+    sync_overlap=int(os.getenv("REVOCATION_SYNC_OVERLAP_IDS", "1000")),
+)
@@ -0,0 +1,85 @@
+"""Working-days calendar: Polish public holidays and the precomputed work_calendar table."""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from app.models import WorkCalendarDay
+
+
+def easter_sunday(year: int) -> date:
+    """Return Easter Sunday for a Gregorian year (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def polish_holidays(year: int) -> Dict[date, str]:
+    """Return statutory public holidays (days free from work) in Poland for a year."""
+    easter = easter_sunday(year)
+    holidays = {
+        date(year, 1, 1): "Nowy Rok",
+        date(year, 1, 6): "Święto Trzech Króli",
+        easter: "Wielkanoc",
+        easter + timedelta(days=1): "Poniedziałek Wielkanocny",
+        date(year, 5, 1): "Święto Pracy",
+        date(year, 5, 3): "Święto Konstytucji 3 Maja",
+        easter + timedelta(days=49): "Zielone Świątki",
+        easter + timedelta(days=60): "Boże Ciało",
+        date(year, 8, 15): "Wniebowzięcie Najświętszej Maryi Panny",
+        date(year, 11, 1): "Wszystkich Świętych",
+        date(year, 11, 11): "Narodowe Święto Niepodległości",
+        date(year, 12, 25): "Boże Narodzenie (pierwszy dzień)",
+        date(year, 12, 26): "Boże Narodzenie (drugi dzień)",
+    }
+    # Christmas Eve has been a public holiday since 2025
+    if year >= 2025:
+        holidays[date(year, 12, 24)] = "Wigilia Bożego Narodzenia"
+    return holidays
+
+
+def build_calendar_year(year: int) -> List[WorkCalendarDay]:
+    """Build one WorkCalendarDay per date of the year; weekends and holidays are non-working."""
+    holidays = polish_holidays(year)
+    days = []
+    current = date(year, 1, 1)
+    while current.year == year:
+        holiday_name = holidays.get(current)
+        days.append(WorkCalendarDay(
+            calendar_date=current,
+            year=year,
+            month=current.month,
+            is_working_day=current.weekday() < 5 and holiday_name is None,
+            holiday_name=holiday_name,
+        ))
+        current += timedelta(days=1)
+    return days
+
+
+def generate_work_calendar(db: Session, years: Iterable[int]) -> int:
+    """(Re)generate the calendar for the given years; returns the number of days written."""
+    written = 0
+    for year in sorted(set(years)):
+        db.query(WorkCalendarDay).filter(WorkCalendarDay.year == year).delete(synchronize_session=False)
+        days = build_calendar_year(year)
+        db.add_all(days)
+        written += len(days)
+    db.commit()
+    return written
+
+
+def calendar_covers(db: Session, start_date: date, end_date: date) -> bool:
+    """Return True if every date in [start_date, end_date] has a calendar row."""
+    stored = db.query(WorkCalendarDay).filter(
+        WorkCalendarDay.calendar_date >= start_date,
+        WorkCalendarDay.calendar_date <= end_date,
+    ).count()
+    return stored == (end_date - start_date).days + 1
@@ -0,0 +1,114 @@
+"""Production server configuration: gunicorn managing uvicorn workers.
+
+    gunicorn app.main:app -c gunicorn.conf.py
+
+The master imports the app once (preload) and runs the boot check
+(app.boot) before forking, so workers only serve requests. The worker
+count follows the CPUs actually available to the container (affinity mask
+and cgroup CPU quota), not the host's core count. Workers are replaced
+gracefully after MAX_REQUESTS requests (with jitter, so they do not all
+restart together) or once their resident memory exceeds WORKER_MAX_RSS_MB;
+ReportLab-heavy workers grow over time.
+"""
+import math
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs allowed by the cgroup CPU quota, or None if unlimited."""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> float:
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+    quota = _cgroup_cpu_quota()
+    return min(cpus, quota) if quota else cpus
+
+
+def _default_workers() -> int:
+    per_core = float(os.getenv("WORKERS_PER_CORE", "1"))
+    # At least two, so one can be recycled while the other keeps serving
+    workers = max(2, math.ceil(available_cpus() * per_core))
+    max_workers = os.getenv("MAX_WORKERS")
+    return min(workers, int(max_workers)) if max_workers else workers
+
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY") or _default_workers())
+preload_app = True
+
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+# Time for in-flight requests to finish when a worker is recycled or the server stops
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+WORKER_MAX_RSS_MB = int(os.getenv("WORKER_MAX_RSS_MB", "512"))
+RSS_CHECK_SECONDS = float(os.getenv("RSS_CHECK_SECONDS", "10"))
+
+
+def on_starting(server):
+    # Once, in the master: workers inherit the flag and skip their own startup init
+    from app.boot import boot
+
+    boot()
+    os.environ["RUN_STARTUP_INIT"] = "false"
+    server.log.info("Starting %d workers (%.2f CPUs available)", workers, available_cpus())
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the children
+    from app.database import async_engine, engine, replicas
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replicas.replicas:
+        replica.engine.dispose(close=False)
+        replica.async_engine.sync_engine.dispose(close=False)
+
+
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _watch_rss(worker, limit_bytes: int) -> None:
+    while worker.alive:
+        time.sleep(RSS_CHECK_SECONDS)
+        rss = _rss_bytes()
+        if rss > limit_bytes:
+            worker.log.info("Worker %s uses %d MB (limit %d MB), restarting gracefully",
+                            worker.pid, rss // 2 ** 20, WORKER_MAX_RSS_MB)
+            # SIGTERM lets uvicorn finish in-flight requests; the master forks a replacement
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+def post_worker_init(worker):
+    if WORKER_MAX_RSS_MB > 0 and os.path.exists("/proc/self/statm"):
+        threading.Thread(
+            target=_watch_rss, args=(worker, WORKER_MAX_RSS_MB * 2 ** 20), name="rss-monitor", daemon=True
+        ).start()
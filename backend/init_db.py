@@ -1,18 +1,24 @@
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from typing import Optional
 import os
 
 from app.database import SessionLocal
 from app.models import User
+from app.services.passwords import pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+DEFAULT_ADMIN_USERNAME = os.getenv("DEFAULT_ADMIN_USERNAME", "admin")
 
 
-def init_database() -> None:
-    """Create default admin user if it does not exist."""
-    db: Session = SessionLocal()
+def init_database(db: Optional[Session] = None) -> bool:
+    """Create default admin user if it does not exist; True if it was created.
+
+    app.boot calls this with a session under its seeding lock.
+    """
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
     try:
-        admin_username = os.getenv("DEFAULT_ADMIN_USERNAME", "admin")
+        admin_username = DEFAULT_ADMIN_USERNAME
         admin_password = os.getenv("DEFAULT_ADMIN_PASSWORD", "admin123")
 
         existing = db.query(User).filter(User.username == admin_username).first()
@@ -28,11 +34,13 @@ def init_database() -> None:
             db.add(admin_user)
             db.commit()
             print(f"✅ Default admin user created (username: {admin_username})")
-        else:
-            print("✅ Admin user already exists")
+            return True
+        print("✅ Admin user already exists")
+        return False
     except Exception as exc:
         print(f"❌ Database initialization failed: {exc}")
         db.rollback()
         raise
     finally:
-        db.close()
+        if own_session:
+            db.close()
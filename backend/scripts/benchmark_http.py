@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Measure request latency (p50/p99) and throughput of the API.
+
+Usage:
+    python scripts/benchmark_http.py [--requests N] [--concurrency C] [--path PATH ...]
+    python scripts/benchmark_http.py --work-logs 10000 --requests 50 \
+        --path "/api/work-logs?limit=10000" --path "/api/employees?limit=10000" --employees 10000
+    python scripts/benchmark_http.py --url http://localhost:8000 --token JWT
+
+Without --url the app is driven in-process (no network, no server) against a
+temporary SQLite database seeded with --employees employees and --work-logs
+work logs, which isolates the cost of the middleware, routing and
+serialisation stack (rate limiting is disabled). With
+--url a running server is benchmarked; list endpoints then need --token.
+Run it on two commits to compare them.
+
+Default paths: /health and /api/employees.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("benchmark")
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def _in_process_app(employees: int, work_logs: int = 0):
+    """Point the app at a seeded temporary SQLite database; returns (app, token)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.main import app
+    from app.database import Base, get_db
+    from app.limiter import limiter
+    from app.models import Employee, User, WorkLog
+    from app.routes.auth import _create_token
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="benchmark-"), "benchmark.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Every in-process request comes from one client address
+    limiter.enabled = False
+
+    db = Session()
+    try:
+        user = User(username="benchmark", password_hash="!", role="admin")
+        db.add(user)
+        db.add_all(
+            Employee(first_name=f"First{i}", last_name=f"Last{i}", email=f"employee{i}@example.com")
+            for i in range(employees)
+        )
+        db.commit()
+        first_day = date(2020, 1, 1)
+        db.add_all(
+            WorkLog(employee_id=i % employees + 1, work_date=first_day + timedelta(days=i // employees),
+                    work_hours=Decimal("8.00"), overtime_hours=Decimal("0.50"), notes=f"Log {i}")
+            for i in range(work_logs)
+        )
+        db.commit()
+        token = _create_token(user)
+    finally:
+        db.close()
+    return app, token
+
+
+async def _run(client, path: str, headers: dict, total: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    # Warm up caches and connection pools before measuring
+    for _ in range(min(20, total)):
+        await client.get(path, headers=headers)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def _benchmark(args) -> list:
+    import httpx
+
+    if args.url:
+        transport, base_url, token = None, args.url, args.token
+    else:
+        app, token = _in_process_app(args.employees, args.work_logs)
+        transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30) as client:
+        return [
+            await _run(client, path, headers, args.requests, args.concurrency)
+            for path in args.path
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark API latency and throughput")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--token", help="bearer token for authenticated paths (with --url)")
+    parser.add_argument("--path", action="append", help="path to request (repeatable)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per path")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--employees", type=int, default=200, help="rows to seed in-process")
+    parser.add_argument("--work-logs", type=int, default=0, help="work logs to seed in-process")
+    args = parser.parse_args()
+    args.path = args.path or ["/health", "/api/employees"]
+
+    results = asyncio.run(_benchmark(args))
+    print(f"{'path':<30} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['path']:<30} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Generate the work_calendar table (business days and Polish public holidays).
+
+Usage:
+    python scripts/generate_work_calendar.py [year ...]
+    python scripts/generate_work_calendar.py 2024-2027
+
+Without arguments, generates the current and the next year. Existing rows for
+the requested years are replaced, so the script is safe to re-run.
+"""
+import os
+import sys
+from datetime import date
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("work_calendar")
+
+
+def _parse_years(args: list[str]) -> list[int]:
+    if not args:
+        this_year = date.today().year
+        return [this_year, this_year + 1]
+    years = []
+    for arg in args:
+        if "-" in arg:
+            first, last = arg.split("-", 1)
+            years.extend(range(int(first), int(last) + 1))
+        else:
+            years.append(int(arg))
+    return years
+
+
+def main() -> None:
+    from app.database import SessionLocal
+    from app.services.work_calendar import generate_work_calendar
+
+    try:
+        years = _parse_years(sys.argv[1:])
+    except ValueError:
+        logger.error("Years must be integers or ranges like 2024-2027")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        written = generate_work_calendar(db, years)
+    finally:
+        db.close()
+    logger.info("Work calendar generated for %s (%d days)", ", ".join(map(str, sorted(set(years)))), written)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
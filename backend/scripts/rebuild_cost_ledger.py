@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Rebuild the work log cost ledger after rate corrections.
+
+Usage:
+    python scripts/rebuild_cost_ledger.py [--employee ID] [--since YYYY-MM-DD]
+
+Without options, every work log is re-priced with the rate history
+(employee_rates) in effect on its work date.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger("cost_ledger")
+
+
+def main() -> None:
+    from app.database import SessionLocal
+    from app.services.cost_ledger import rebuild_cost_ledger
+
+    parser = argparse.ArgumentParser(description="Rebuild the work log cost ledger")
+    parser.add_argument("--employee", type=int, help="only rebuild this employee's logs")
+    parser.add_argument("--since", type=date.fromisoformat, help="only rebuild logs on or after this date")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        processed = rebuild_cost_ledger(db, employee_id=args.employee, since=args.since)
+    finally:
+        db.close()
+    logger.info("Cost ledger rebuilt for %d work logs", processed)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -1,6 +1,19 @@
 """Shared pytest fixtures for all test modules."""
+import os
+
+# Per-process rate limit counters in tests, even when REDIS_HOST is set
+os.environ["RATE_LIMIT_STORAGE_URI"] = "memory://"
+
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import async_url, get_async_db, get_db
 from app.limiter import limiter
+from app.middleware.admission import admission
+from app.middleware.principal_cache import principal_cache
+from app.middleware.scoping import assignment_cache
+from app.services.token_revocation import token_revocation
 
 
 @pytest.fixture(autouse=True)
@@ -13,3 +26,65 @@ def reset_rate_limiter():
     limiter._storage.reset()
     yield
     limiter._storage.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_principal_cache():
+    """Drop cached token principals and revocations between tests.
+
+    Each test recreates its tables, so user ids (and even identical tokens)
+    are reused across tests.
+    """
+    principal_cache.clear()
+    token_revocation.reset()
+    yield
+    principal_cache.clear()
+    token_revocation.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_admission():
+    """Refill every admission control bucket before each test."""
+    admission.reset()
+    yield
+    admission.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_assignment_cache():
+    """Drop cached manager assignment sets; ids are reused across tests."""
+    assignment_cache.clear()
+    yield
+    assignment_cache.clear()
+
+
+_async_engines = {}
+
+
+async def _async_db_on_test_database():
+    """get_async_db on the database the test module bound get_db to."""
+    from app.main import app
+
+    override = app.dependency_overrides.get(get_db)
+    if override is None:
+        async for db in get_async_db():
+            yield db
+        return
+    sessions = override()
+    url = next(sessions).get_bind().url
+    sessions.close()
+    if url not in _async_engines:
+        # TestClient runs each request on a fresh event loop; don't pool connections across them
+        _async_engines[url] = create_async_engine(async_url(url), poolclass=NullPool)
+    async with AsyncSession(_async_engines[url], autoflush=False, expire_on_commit=False) as db:
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def async_db_follows_get_db():
+    """Point the async session dependency at each module's test database."""
+    from app.main import app
+
+    app.dependency_overrides[get_async_db] = _async_db_on_test_database
+    yield
+    app.dependency_overrides.pop(get_async_db, None)
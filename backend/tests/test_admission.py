@@ -0,0 +1,79 @@
+"""Tests for cost-weighted admission control."""
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.middleware.admission import TokenBucketAdmission, admission
+from app.models import User
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_admission.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _token(username: str) -> str:
+    db = TestingSessionLocal()
+    try:
+        db.add(User(username=username, password_hash=pwd_context.hash("TestPass1"), role="admin"))
+        db.commit()
+    finally:
+        db.close()
+    response = client.post("/api/auth/login", json={"username": username, "password": "TestPass1"})
+    return response.json()["token"]
+
+
+def test_bucket_charges_cost_and_reports_wait():
+    bucket = TokenBucketAdmission(capacity=10, refill_per_second=2)
+    assert bucket.try_acquire(1, 8, "pdf") is None
+    wait = bucket.try_acquire(1, 8, "pdf")
+    assert wait == pytest.approx(3, abs=0.1)
+    # Other users have their own bucket
+    assert bucket.try_acquire(2, 8, "pdf") is None
+    assert math.isinf(bucket.try_acquire(3, 11, "backup"))
+    assert bucket.stats()["rejected"] == {"pdf": 1, "backup": 1}
+
+
+def test_expensive_requests_rejected_with_retry_after(monkeypatch):
+    monkeypatch.setattr(admission, "capacity", 2)
+    monkeypatch.setattr(admission, "refill_per_second", 0.5)
+    first, second = _token("first"), _token("second")
+
+    for _ in range(2):
+        assert client.get("/api/search?q=x", headers={"Authorization": f"Bearer {first}"}).status_code == 200
+    response = client.get("/api/search?q=x", headers={"Authorization": f"Bearer {first}"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+
+    assert client.get("/api/search?q=x", headers={"Authorization": f"Bearer {second}"}).status_code == 200
+
+    metrics = client.get("/api/metrics", headers={"Authorization": f"Bearer {second}"}).json()["admission"]
+    assert metrics["rejected"] == {"search": 1}
+    assert metrics["lowest_buckets"][0]["tokens"] < 1
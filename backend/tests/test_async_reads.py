@@ -0,0 +1,114 @@
+"""Tests for the endpoints served from the async engine."""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.main import app
+from app.database import Base, get_db
+from app.models import Employee, ManagerEmployeeAssignment, Notification, Project, User, WorkLog
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async_reads.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def data():
+    db = TestingSessionLocal()
+    try:
+        anna = Employee(first_name="Anna", last_name="Nowak", email="anna@example.com")
+        jan = Employee(first_name="Jan", last_name="Nowak")
+        db.add_all([anna, jan, Project(name="Nowak Renovation", status="active")])
+        db.flush()
+        db.add_all([
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 2), work_hours=Decimal("8.00"),
+                    overtime_hours=Decimal("1.50")),
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 3), work_hours=Decimal("7.25")),
+            WorkLog(employee_id=jan.id, work_date=date(2026, 3, 2), work_hours=Decimal("6.00")),
+        ])
+        manager = User(username="async_manager", password_hash=pwd_context.hash("TestPass1"), role="manager")
+        db.add_all([manager, User(username="async_admin", password_hash=pwd_context.hash("TestPass1"), role="admin")])
+        db.flush()
+        db.add(ManagerEmployeeAssignment(manager_user_id=manager.id, employee_id=anna.id))
+        db.add(Notification(user_id=manager.id, type="info", title="Hello", message="First"))
+        db.commit()
+        return {"anna": anna.id, "jan": jan.id}
+    finally:
+        db.close()
+
+
+def _headers(username: str) -> dict:
+    token = client.post("/api/auth/login", json={"username": username, "password": "TestPass1"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_async_url_maps_drivers():
+    assert database.async_url("postgresql://u:p@db/work_hours_db").drivername == "postgresql+asyncpg"
+    assert database.async_url("postgresql+psycopg2://u:p@db/work_hours_db").drivername == "postgresql+asyncpg"
+    assert database.async_url("sqlite:///./app.db").drivername == "sqlite+aiosqlite"
+
+
+def test_summary_and_list_are_scoped(data):
+    headers = _headers("async_manager")
+    summary = client.get("/api/work-logs/summary", headers=headers).json()
+    assert summary["total_work_hours"] == 15.25
+    assert summary["total_overtime_hours"] == 1.5
+    assert summary["total_logs"] == 2
+
+    logs = client.get("/api/work-logs?fields=employee_id,work_hours", headers=headers).json()
+    assert logs == [{"employee_id": data["anna"], "work_hours": "8.00"},
+                    {"employee_id": data["anna"], "work_hours": "7.25"}]
+
+    admin_summary = client.get("/api/work-logs/summary", headers=_headers("async_admin")).json()
+    assert admin_summary["total_work_hours"] == 21.25
+
+
+def test_calendar_checks_assignments(data):
+    headers = _headers("async_manager")
+    response = client.get(f"/api/calendar?year=2026&month=3&employee_id={data['anna']}", headers=headers)
+    assert response.status_code == 200
+    assert [day["work_hours"] for day in response.json()["days"]] == [8.0, 7.25]
+    assert response.headers["etag"]
+
+    response = client.get(f"/api/calendar?year=2026&month=3&employee_id={data['jan']}", headers=headers)
+    assert response.status_code == 403
+
+
+def test_notifications_and_search(data):
+    headers = _headers("async_manager")
+    notifications = client.get("/api/notifications", headers=headers).json()
+    assert [n["title"] for n in notifications] == ["Hello"]
+
+    results = client.get("/api/search?q=nowak", headers=headers).json()["results"]
+    # Jan is not assigned to the manager; users are searched for admins only
+    assert [e["title"] for e in results["employees"]] == ["Anna Nowak"]
+    assert [p["title"] for p in results["projects"]] == ["Nowak Renovation"]
+    assert results["users"] == []
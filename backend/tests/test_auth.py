@@ -89,6 +89,43 @@ def test_login_unknown_user():
     assert response.json()["detail"] == "Invalid credentials"
 
 
+def test_login_rehashes_outdated_cost():
+    from app.services.passwords import BCRYPT_ROUNDS
+
+    db = TestingSessionLocal()
+    try:
+        db.add(User(
+            username="legacy",
+            password_hash=CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("TestPass1"),
+            role="employee",
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/auth/login", json={"username": "legacy", "password": "TestPass1"})
+    assert response.status_code == 200
+
+    db = TestingSessionLocal()
+    try:
+        stored = db.query(User).filter(User.username == "legacy").first().password_hash
+    finally:
+        db.close()
+    assert stored.split("$")[2] == f"{BCRYPT_ROUNDS:02d}"
+    assert pwd_context.verify("TestPass1", stored)
+
+
+def test_login_busy_hasher_returns_503(monkeypatch):
+    from app.services.executors import executors
+
+    _create_user("busy", "TestPass1", "employee")
+    crypto = executors["crypto"]
+    monkeypatch.setattr(crypto, "queue_limit", -crypto.max_workers)
+    response = client.post("/api/auth/login", json={"username": "busy", "password": "TestPass1"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
 def test_login_missing_fields():
     """Test login with empty credentials returns 400."""
     response = client.post("/api/auth/login", json={"username": "", "password": ""})
@@ -138,6 +175,69 @@ def test_logout_with_valid_token():
     assert response.json()["message"] == "Logged out successfully"
 
 
+def test_logout_revokes_token():
+    """A token used to log out is rejected afterwards, other sessions are not."""
+    _create_user("logoutuser", "pass123", "employee")
+    first = client.post("/api/auth/login", json={"username": "logoutuser", "password": "pass123"}).json()["token"]
+    second = client.post("/api/auth/login", json={"username": "logoutuser", "password": "pass123"}).json()["token"]
+    assert client.get("/api/auth/me", headers={"Authorization": f"Bearer {first}"}).status_code == 200
+
+    client.post("/api/auth/logout", headers={"Authorization": f"Bearer {first}"})
+
+    assert client.get("/api/auth/me", headers={"Authorization": f"Bearer {first}"}).status_code == 403
+    assert client.get("/api/auth/me", headers={"Authorization": f"Bearer {second}"}).status_code == 200
+
+
+def test_revocation_reaches_other_workers():
+    """Another process picks up a revocation from the database on its next sync."""
+    from datetime import datetime, timedelta
+    from app.services.token_revocation import TokenRevocationList
+
+    worker_a = TokenRevocationList(sync_interval=0)
+    worker_b = TokenRevocationList(sync_interval=0)
+    db = TestingSessionLocal()
+    try:
+        assert not worker_b.is_revoked(db, "abc123")
+        worker_a.revoke(db, "abc123", datetime.utcnow() + timedelta(days=1))
+        assert worker_b.is_revoked(db, "abc123")
+        assert not worker_b.is_revoked(db, "other")
+    finally:
+        db.close()
+
+
+
+def test_revocations_committed_out_of_id_order_are_not_skipped():
+    """A lower id committing after a higher one was pulled is still picked up."""
+    from datetime import datetime, timedelta
+    from app.models import RevokedToken
+    from app.services.token_revocation import TokenRevocationList
+
+    worker = TokenRevocationList(sync_interval=0)
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    db = TestingSessionLocal()
+    try:
+        db.add(RevokedToken(id=2, jti="later-id", expires_at=expires_at))
+        db.commit()
+        assert worker.is_revoked(db, "later-id")
+        db.add(RevokedToken(id=1, jti="earlier-id", expires_at=expires_at))
+        db.commit()
+        assert worker.is_revoked(db, "earlier-id")
+        assert worker.stats()["filter_entries"] == 2
+    finally:
+        db.close()
+
+def test_bloom_filter_has_no_false_negatives():
+    from app.services.token_revocation import BloomFilter
+
+    bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+    revoked = [f"revoked-{i}" for i in range(1000)]
+    for jti in revoked:
+        bloom.add(jti)
+    assert all(jti in bloom for jti in revoked)
+    false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
 def test_logout_without_token():
     """Test logout without token returns 401."""
     response = client.post("/api/auth/logout")
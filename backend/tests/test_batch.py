@@ -0,0 +1,152 @@
+"""Tests for POST /api/batch."""
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.middleware.principal_cache import principal_cache
+from app.models import Employee, User
+from app.routes import batch as batch_module
+from app.routes.batch import BATCH_MAX_REQUESTS
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_batch.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _headers(username: str, role: str = "admin", employee_id=None) -> dict:
+    db = TestingSessionLocal()
+    try:
+        db.add(User(username=username, password_hash=pwd_context.hash("TestPass1"), role=role,
+                    employee_id=employee_id))
+        db.commit()
+    finally:
+        db.close()
+    response = client.post("/api/auth/login", json={"username": username, "password": "TestPass1"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def _employee(first_name: str) -> int:
+    db = TestingSessionLocal()
+    try:
+        employee = Employee(first_name=first_name, last_name="Nowak")
+        db.add(employee)
+        db.commit()
+        return employee.id
+    finally:
+        db.close()
+
+
+def test_batch_returns_results_in_order():
+    headers = _headers("batch_admin")
+    _employee("Anna")
+    response = client.post("/api/batch", headers=headers, json={"requests": [
+        {"id": "me", "path": "/api/auth/me"},
+        {"id": "employees", "path": "/api/employees?fields=first_name"},
+        {"id": "summary", "path": "/api/work-logs/summary"},
+        {"id": "projects", "path": "/api/projects"},
+        {"id": "missing", "path": "/api/projects/999"},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [r["id"] for r in results] == ["me", "employees", "summary", "projects", "missing"]
+    assert results[0]["status"] == 200 and results[0]["body"]["username"] == "batch_admin"
+    assert results[1]["body"] == [{"first_name": "Anna"}]
+    assert results[1]["headers"]["etag"]
+    assert results[2]["body"]["total_logs"] == 0
+    assert results[3]["body"] == []
+    assert results[4] == {"id": "missing", "status": 404, "headers": {}, "body": {"detail": "Not found"}}
+
+
+def test_sub_requests_reuse_batch_authentication(monkeypatch):
+    headers = _headers("batch_admin")
+    lookups = []
+    original = principal_cache.get
+    monkeypatch.setattr(principal_cache, "get", lambda token: lookups.append(token) or original(token))
+
+    response = client.post("/api/batch", headers=headers, json={"requests": [
+        {"path": "/api/auth/me"}, {"path": "/api/auth/me"}, {"path": "/api/auth/me"},
+    ]})
+    assert [r["status"] for r in response.json()["responses"]] == [200, 200, 200]
+    # Only the batch request itself resolves the token
+    assert len(lookups) == 1
+
+
+def test_sub_requests_keep_authorization_and_conditional_headers():
+    employee_id = _employee("Anna")
+    _employee("Jan")
+    headers = _headers("batch_employee", role="employee", employee_id=employee_id)
+    etag = client.get("/api/employees", headers=headers, params={"limit": 10}).headers["etag"]
+
+    results = client.post("/api/batch", headers=headers, json={"requests": [
+        {"path": "/api/users"},
+        {"path": "/api/employees?limit=10", "headers": {"If-None-Match": etag}},
+        {"path": "/api/employees"},
+    ]}).json()["responses"]
+    assert results[0]["status"] == 403
+    assert results[1]["status"] == 304 and results[1]["body"] is None
+    assert [e["id"] for e in results[2]["body"]] == [employee_id]
+
+
+def test_invalid_batches_are_rejected():
+    headers = _headers("batch_admin")
+    assert client.post("/api/batch", json={"requests": [{"path": "/api/auth/me"}]}).status_code == 403
+    for requests in (
+        [],
+        [{"path": "/api/batch"}],
+        [{"path": "https://example.com/api/users"}],
+        [{"path": "/health"}],
+        [{"path": "/api/auth/me"}] * (BATCH_MAX_REQUESTS + 1),
+    ):
+        assert client.post("/api/batch", headers=headers, json={"requests": requests}).status_code == 422
+
+
+def test_sub_requests_count_against_the_rate_limit(monkeypatch):
+    headers = _headers("batch_admin")
+    monkeypatch.setattr(batch_module, "BATCH_CONCURRENCY", 2)
+    running, peak = 0, 0
+    original = batch_module._dispatch
+
+    async def counting(*args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await original(*args)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(batch_module, "_dispatch", counting)
+    batch = {"requests": [{"path": "/api/auth/me"}] * BATCH_MAX_REQUESTS}
+    for _ in range(100 // BATCH_MAX_REQUESTS):
+        assert client.post("/api/batch", headers=headers, json=batch).status_code == 200
+    assert peak == 2
+
+    response = client.post("/api/batch", headers=headers, json=batch)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
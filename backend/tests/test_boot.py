@@ -0,0 +1,74 @@
+"""Tests for the boot routine (schema check, seeding, timings)."""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import boot
+from app.database import Base
+from app.models import User
+from init_db import DEFAULT_ADMIN_USERNAME
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_boot.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def empty_database():
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    yield
+
+
+def _stamp(*revisions: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+        conn.execute(text("DELETE FROM alembic_version"))
+        for revision in revisions:
+            conn.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {"rev": revision})
+
+
+def _admins() -> int:
+    with TestingSessionLocal() as db:
+        return db.query(User).filter(User.username == DEFAULT_ADMIN_USERNAME).count()
+
+
+def test_expected_heads_come_from_the_migrations():
+    heads = boot.expected_heads()
+    assert heads and "008_add_revoked_tokens" in heads
+
+
+def test_create_mode_builds_a_local_database_and_seeds_once():
+    report = boot.boot(engine, schema_mode="create")
+    assert report.schema == "created"
+    assert report.seeded is True
+    assert set(report.phases_ms) == {"connect", "schema", "seed"}
+    assert _admins() == 1
+    assert boot.boot_stats()["seeded"] is True
+
+    _stamp(*boot.expected_heads())
+    report = boot.boot(engine, schema_mode="create")
+    assert report.schema == "up to date"
+    assert report.seeded is False
+    assert _admins() == 1
+
+
+def test_verify_mode_refuses_an_outdated_schema():
+    Base.metadata.create_all(bind=engine)
+    with pytest.raises(RuntimeError, match="no alembic_version"):
+        boot.boot(engine, schema_mode="verify")
+
+    _stamp("007_add_rate_history_and_cost_ledger")
+    with pytest.raises(RuntimeError, match="alembic upgrade heads"):
+        boot.boot(engine, schema_mode="verify")
+
+    _stamp(*boot.expected_heads())
+    assert boot.boot(engine, schema_mode="verify").schema == "up to date"
+
+
+def test_skip_mode_does_not_touch_the_schema():
+    Base.metadata.create_all(bind=engine)
+    assert boot.boot(engine, schema_mode="skip").schema == "skipped"
+    with engine.connect() as conn:
+        assert not conn.dialect.has_table(conn, "alembic_version")
@@ -0,0 +1,169 @@
+"""Tests for ETag-based conditional GETs and per-route cache policies."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_async_db, get_db
+from app.models import Employee, User, WorkLog
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_caching.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _headers(username: str, role: str = "admin", employee_id=None) -> dict:
+    db = TestingSessionLocal()
+    try:
+        db.add(User(username=username, password_hash=pwd_context.hash("TestPass1"), role=role,
+                    employee_id=employee_id))
+        db.commit()
+    finally:
+        db.close()
+    response = client.post("/api/auth/login", json={"username": username, "password": "TestPass1"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def _employee(first_name: str) -> int:
+    db = TestingSessionLocal()
+    try:
+        employee = Employee(first_name=first_name, last_name="Nowak")
+        db.add(employee)
+        db.commit()
+        return employee.id
+    finally:
+        db.close()
+
+
+def test_unchanged_list_answers_304():
+    headers = _headers("cache_admin")
+    _employee("Anna")
+    first = client.get("/api/employees", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert "pragma" not in first.headers
+
+    second = client.get("/api/employees", headers={**headers, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    assert second.headers["x-content-type-options"] == "nosniff"
+
+    # Weak comparison and lists of tags are accepted too
+    third = client.get("/api/employees",
+                       headers={**headers, "If-None-Match": f'"other", W/{etag.removeprefix("W/")}'})
+    assert third.status_code == 304
+
+
+def test_changes_and_query_produce_new_etag():
+    headers = _headers("cache_admin")
+    employee_id = _employee("Anna")
+    etag = client.get("/api/employees", headers=headers).headers["etag"]
+
+    assert client.get("/api/employees?limit=1", headers=headers).headers["etag"] != etag
+
+    update = client.put(f"/api/employees/{employee_id}", headers=headers,
+                        json={"first_name": "Hanna", "last_name": "Nowak"})
+    assert update.status_code == 200
+    response = client.get("/api/employees", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["first_name"] == "Hanna"
+    assert response.headers["etag"] != etag
+
+
+def test_new_work_log_changes_employee_list_etag():
+    headers = _headers("cache_admin")
+    employee_id = _employee("Anna")
+    etag = client.get("/api/employees", headers=headers).headers["etag"]
+    db = TestingSessionLocal()
+    try:
+        db.add(WorkLog(employee_id=employee_id, work_date=date(2026, 3, 2), work_hours=8))
+        db.commit()
+    finally:
+        db.close()
+    response = client.get("/api/employees", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["last_entry"]["date"] == "2026-03-02"
+
+
+def test_etag_depends_on_data_scope():
+    own = _employee("Anna")
+    _employee("Jan")
+    admin_etag = client.get("/api/employees", headers=_headers("cache_admin")).headers["etag"]
+    employee_headers = _headers("cache_employee", role="employee", employee_id=own)
+    response = client.get("/api/employees", headers={**employee_headers, "If-None-Match": admin_etag})
+    assert response.status_code == 200
+    assert [e["id"] for e in response.json()] == [own]
+
+
+def test_routes_without_policy_are_not_stored():
+    headers = _headers("cache_admin")
+    response = client.get("/api/users", headers=headers)
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+
+def test_compressed_representation_revalidates_with_weak_etag():
+    headers = {**_headers("cache_admin"), "Accept-Encoding": "gzip"}
+    for index in range(30):
+        _employee(f"Employee {index}")
+    first = client.get("/api/employees", headers=headers)
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].startswith('W/"')
+
+    second = client.get("/api/employees", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_etag_connection_is_returned_before_a_sync_handler_runs():
+    headers = _headers("cache_admin")
+    _employee("Anna")
+    async_engine = create_async_engine(SQLALCHEMY_DATABASE_URL.replace("sqlite", "sqlite+aiosqlite"))
+    events = []
+    event.listen(async_engine.sync_engine, "checkout", lambda *args: events.append("etag checkout"))
+    event.listen(async_engine.sync_engine, "checkin", lambda *args: events.append("etag checkin"))
+
+    def record(conn, cursor, statement, *args):
+        if "FROM employees" in statement and "count(" not in statement:
+            events.append("handler query")
+
+    async def etag_db():
+        async with AsyncSession(async_engine) as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = etag_db
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/api/employees", headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert events == ["etag checkout", "etag checkin", "handler query"]
@@ -0,0 +1,142 @@
+"""Tests for single-flight coalescing of identical concurrent requests."""
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.middleware.coalescing import RequestCoalescer, coalesce, request_coalescer
+from app.middleware.scoping import DataScope
+
+_current_scope = {"value": DataScope(user_id=1, role="admin", employee_id=None)}
+
+
+def _scope() -> DataScope:
+    return _current_scope["value"]
+
+
+def _app(calls, release: threading.Event) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/summary/{year}")
+    @coalesce
+    def summary(year: int, month: int = 1, scope: DataScope = Depends(_scope)):
+        calls.append((year, month))
+        release.wait(5)
+        return {"year": year, "month": month, "calls": len(calls)}
+
+    @app.get("/pdf")
+    @coalesce
+    def pdf(scope: DataScope = Depends(_scope)):
+        calls.append("pdf")
+        release.wait(5)
+        return Response(content=b"%PDF", media_type="application/pdf")
+
+    return app
+
+
+async def _concurrent_gets(app: FastAPI, release: threading.Event, *paths: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        requests = [asyncio.ensure_future(client.get(path)) for path in paths]
+        await asyncio.sleep(0.2)
+        release.set()
+        return await asyncio.gather(*requests)
+
+
+@pytest.fixture(autouse=True)
+def reset_coalescer():
+    request_coalescer.reset()
+    yield
+    _current_scope["value"] = DataScope(user_id=1, role="admin", employee_id=None)
+
+
+def test_identical_requests_share_one_execution():
+    calls, release = [], threading.Event()
+    responses = asyncio.run(_concurrent_gets(
+        _app(calls, release), release, "/summary/2026?month=3", "/summary/2026?month=3", "/summary/2026?month=3"
+    ))
+    assert [r.json() for r in responses] == [{"year": 2026, "month": 3, "calls": 1}] * 3
+    assert calls == [(2026, 3)]
+    stats = request_coalescer.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] == 2
+    assert stats["coalescing_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+    assert stats["in_flight"] == 0
+
+
+def test_different_params_run_separately():
+    calls, release = [], threading.Event()
+    asyncio.run(_concurrent_gets(_app(calls, release), release, "/summary/2026?month=3", "/summary/2026?month=4"))
+    assert sorted(calls) == [(2026, 3), (2026, 4)]
+
+
+def test_different_scopes_run_separately():
+    calls, release = [], threading.Event()
+    app = _app(calls, release)
+    _current_scope["value"] = DataScope(user_id=2, role="manager", employee_id=None)
+    asyncio.run(_concurrent_gets(app, release, "/summary/2026"))
+    _current_scope["value"] = DataScope(user_id=3, role="manager", employee_id=None)
+    asyncio.run(_concurrent_gets(app, release, "/summary/2026"))
+    assert request_coalescer.stats()["executed"] == 2
+
+
+def test_responses_are_shared_as_copies():
+    calls, release = [], threading.Event()
+    responses = asyncio.run(_concurrent_gets(_app(calls, release), release, "/pdf", "/pdf"))
+    assert calls == ["pdf"]
+    assert [r.content for r in responses] == [b"%PDF", b"%PDF"]
+    assert all(r.headers["content-length"] == "4" for r in responses)
+
+
+def test_errors_are_shared_and_not_cached():
+    coalescer = RequestCoalescer()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.05)
+        raise HTTPException(status_code=404, detail="Employee not found")
+
+    async def scenario():
+        results = await asyncio.gather(
+            coalescer.run("key", failing), coalescer.run("key", failing), return_exceptions=True
+        )
+        assert all(isinstance(r, HTTPException) and r.status_code == 404 for r in results)
+        with pytest.raises(HTTPException):
+            await coalescer.run("key", failing)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_computation_runs_on_its_own_session():
+    engine = create_engine("sqlite://")
+    request_sessions, used = [], []
+
+    def get_db():
+        with Session(bind=engine) as db:
+            request_sessions.append(db)
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/count")
+    @coalesce
+    def count(db: Session = Depends(get_db), scope: DataScope = Depends(_scope)):
+        used.append(db)
+        return {"one": db.execute(text("SELECT 1")).scalar()}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/count")
+
+    assert asyncio.run(scenario()).json() == {"one": 1}
+    # The leader's request may end first; the computation must not depend on its session
+    assert used[0] is not request_sessions[0]
+    assert used[0].bind is engine
+    assert not used[0].in_transaction()
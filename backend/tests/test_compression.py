@@ -0,0 +1,114 @@
+"""Tests for codec negotiation and the compression middleware."""
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressedBodyCache, CompressionMiddleware, negotiate
+
+BODY = "work hours " * 500
+
+app = FastAPI()
+
+
+@app.get("/text")
+def text():
+    return PlainTextResponse(BODY, headers={"ETag": '"v1"', "Cache-Control": "private, no-cache"})
+
+
+@app.get("/pdf")
+def pdf():
+    return Response(b"%PDF-" + BODY.encode(), media_type="application/pdf")
+
+
+@app.get("/report.pdf")
+def report_pdf(request: Request):
+    # A conditional route with a body that is never compressed
+    if request.headers.get("if-none-match", "").removeprefix("W/") == '"r1"':
+        return Response(status_code=304, headers={"ETag": '"r1"'})
+    return Response(b"%PDF-" + BODY.encode(), media_type="application/pdf", headers={"ETag": '"r1"'})
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([BODY, BODY]), media_type="text/csv")
+
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("ok")
+
+
+cache = CompressedBodyCache(max_bytes=1024 * 1024)
+app.add_middleware(CompressionMiddleware, minimum_size=1000, cache=cache)
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def test_negotiate_prefers_best_accepted_codec():
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("") is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip;q=0, deflate") is None
+    if "br" in compression._STREAMS:
+        assert negotiate("gzip, deflate, br") == "br"
+        assert negotiate("br;q=0, gzip") == "gzip"
+    if "zstd" in compression._STREAMS:
+        assert negotiate("gzip, deflate, br, zstd") == "zstd"
+        assert negotiate("*") == "zstd"
+
+
+@pytest.mark.parametrize("encoding", list(compression._STREAMS))
+def test_compresses_and_caches_by_etag(encoding):
+    response = client.get("/text", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+    hits = cache.stats()["hits"]
+    assert client.get("/text", headers={"Accept-Encoding": encoding}).text == BODY
+    assert cache.stats()["hits"] == hits + 1
+
+
+def test_skips_precompressed_media_and_small_bodies():
+    response = client.get("/pdf", headers={"Accept-Encoding": "gzip, br, zstd"})
+    assert "content-encoding" not in response.headers
+    assert response.content.startswith(b"%PDF-")
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+
+    response = client.get("/text", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_streaming_response_is_compressed_in_chunks():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BODY * 2
+
+
+def test_etag_is_weakened_only_for_compressed_bodies():
+    gzip = {"Accept-Encoding": "gzip"}
+    response = client.get("/report.pdf", headers=gzip)
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"r1"'
+    revalidated = client.get("/report.pdf", headers={**gzip, "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == '"r1"'
+
+    response = client.get("/text", headers=gzip)
+    assert response.headers["etag"] == 'W/"v1"'
+    # A client revalidating the weak tag of a compressed 200 gets that tag back
+    revalidated = client.get("/report.pdf", headers={**gzip, "If-None-Match": 'W/"r1"'})
+    assert revalidated.headers["etag"] == 'W/"r1"'
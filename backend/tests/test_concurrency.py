@@ -0,0 +1,113 @@
+"""Tests for adaptive concurrency limiting and load shedding."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.concurrency import AdaptiveConcurrencyLimit, ConcurrencyLimitMiddleware
+
+
+def _limit(**options) -> AdaptiveConcurrencyLimit:
+    settings = dict(initial=10, min_limit=2, max_limit=20, target_latency=0.1)
+    settings.update(options)
+    return AdaptiveConcurrencyLimit(**settings)
+
+
+def test_limit_grows_while_fast_and_in_use():
+    limit = _limit()
+    for _ in range(50):
+        for _ in range(6):
+            assert limit.try_acquire()
+        for _ in range(6):
+            limit.release(0.01)
+    assert 10 < limit.limit <= 20
+
+
+def test_limit_does_not_grow_when_idle():
+    limit = _limit()
+    for _ in range(100):
+        limit.try_acquire()
+        limit.release(0.01)
+    assert limit.limit == 10
+
+
+def test_limit_backs_off_when_slow():
+    limit = _limit()
+    limit.try_acquire()
+    limit.release(1.0)
+    assert limit.limit == 9
+    # At most one decrease per latency window
+    limit.try_acquire()
+    limit.release(1.0)
+    assert limit.limit == 9
+
+
+def test_middleware_sheds_excess_and_prioritises_auth():
+    limit = _limit(initial=2, priority_headroom=1)
+    inner = FastAPI()
+
+    @inner.get("/api/employees")
+    def employees():
+        return []
+
+    @inner.post("/api/auth/login")
+    def login():
+        return {}
+
+    @inner.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    inner.add_middleware(ConcurrencyLimitMiddleware, limit=limit)
+    client = TestClient(inner)
+
+    assert client.get("/api/employees").status_code == 200
+    limit.in_flight = 2  # simulate two slow requests still running
+
+    response = client.get("/api/employees")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert client.post("/api/auth/login").status_code == 200
+    assert client.get("/health").status_code == 200
+    assert limit.stats()["shed"] == 1
+
+
+def test_shed_responses_are_readable_cross_origin():
+    limit = _limit(initial=2)
+    inner = FastAPI()
+
+    @inner.get("/api/employees")
+    def employees():
+        return []
+
+    inner.add_middleware(ConcurrencyLimitMiddleware, limit=limit, cors={
+        "allow_origins": ["http://localhost:3000"], "allow_credentials": True,
+        "expose_headers": ["Retry-After"],
+    })
+    limit.in_flight = 2
+
+    response = TestClient(inner).get("/api/employees", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == 503
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-expose-headers"] == "Retry-After"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_long_running_routes_are_not_sampled():
+    limit = _limit()
+    inner = FastAPI()
+
+    @inner.get("/api/reports/payroll")
+    def payroll():
+        return []
+
+    @inner.get("/api/employees")
+    def employees():
+        return []
+
+    inner.add_middleware(ConcurrencyLimitMiddleware, limit=limit)
+    client = TestClient(inner)
+
+    client.get("/api/reports/payroll")
+    assert limit.latency_ewma is None
+    assert limit.in_flight == 0 and limit.admitted == 1
+    client.get("/api/employees")
+    assert limit.latency_ewma is not None
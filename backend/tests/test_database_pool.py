@@ -0,0 +1,51 @@
+"""Tests for the configurable, instrumented connection pool."""
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app import database
+from app.database import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_metrics, pool_stats
+
+
+def test_engine_options(monkeypatch):
+    options = database._engine_options("postgresql://u:p@db/work_hours_db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_pre_ping"] is database.DB_POOL_PRE_PING
+    assert "connect_args" not in options
+
+    monkeypatch.setattr(database, "DB_STATEMENT_TIMEOUT_MS", 15000)
+    options = database._engine_options("postgresql://u:p@db/work_hours_db")
+    assert options["connect_args"] == {"options": "-c statement_timeout=15000"}
+    assert "connect_args" not in database._engine_options("sqlite:///./app.db")
+    assert database._engine_options("sqlite:///:memory:") == {}
+
+    options = database._engine_options("postgresql://u:p@db/work_hours_db", asynchronous=True)
+    assert options["poolclass"] is InstrumentedAsyncQueuePool
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "15000"}}
+
+
+def test_checkout_waits_and_timeouts_are_recorded():
+    engine = create_engine(
+        "sqlite:///./test_database_pool.db", poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    before = pool_metrics.stats()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert engine.pool.checkedout() == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+    finally:
+        engine.dispose()
+
+    after = pool_metrics.stats()
+    assert after["checkouts"] == before["checkouts"] + 1
+    assert after["timeouts"] == before["timeouts"] + 1
+
+
+def test_pool_stats_shape():
+    stats = pool_stats()
+    for key in ("checked_in", "checked_out", "overflow", "checkouts", "timeouts", "avg_wait_ms", "max_wait_ms"):
+        assert key in stats
+    assert stats["class"] == "InstrumentedQueuePool"
+    assert stats["async"]["class"] == "InstrumentedAsyncQueuePool"
@@ -0,0 +1,95 @@
+"""Tests for the named executors (bulkheads) that isolate slow work."""
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.services.executors import BoundedExecutor, ExecutorBusy, executors, runs_on
+
+
+def test_executor_rejects_beyond_queue_limit():
+    executor = BoundedExecutor("test-pool", max_workers=1, queue_limit=1)
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+    with pytest.raises(ExecutorBusy) as exc_info:
+        executor.submit(lambda: "rejected")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
+    assert executor.stats()["queued"] == 1
+
+    release.set()
+    running.result(timeout=5)
+    assert queued.result(timeout=5) == "queued"
+    stats = executor.stats()
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["max_wait_ms"] is not None
+
+
+def test_runs_on_moves_handler_to_named_pool(monkeypatch):
+    app = FastAPI()
+
+    @app.get("/report/{report_id}")
+    @runs_on("reporting")
+    def report(report_id: int, detail: bool = False):
+        return {"id": report_id, "detail": detail, "thread": threading.current_thread().name}
+
+    client = TestClient(app)
+    response = client.get("/report/7?detail=true")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == 7 and body["detail"] is True
+    assert body["thread"].startswith("reporting")
+
+    reporting = executors["reporting"]
+    monkeypatch.setattr(reporting, "queue_limit", -reporting.max_workers)
+    response = client.get("/report/7")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_iterate_streams_on_pool():
+    executor = BoundedExecutor("stream-pool", max_workers=1, queue_limit=0)
+    threads = []
+
+    def chunks():
+        for i in range(3):
+            threads.append(threading.current_thread().name)
+            yield str(i)
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(executor.iterate(chunks()), media_type="text/plain")
+
+    response = TestClient(app).get("/stream")
+    assert response.text == "012"
+    assert all(name.startswith("stream-pool") for name in threads)
+
+
+def test_streams_are_refused_before_they_start():
+    executor = BoundedExecutor("busy-pool", max_workers=1, queue_limit=0)
+    release = threading.Event()
+    running = executor.submit(release.wait)
+
+    app = FastAPI()
+
+    @app.get("/stream")
+    def stream():
+        executor.check_capacity()
+        return StreamingResponse(executor.iterate(iter(["a", "b"])), media_type="text/plain")
+
+    client = TestClient(app)
+    response = client.get("/stream")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    running.result(timeout=5)
+    assert client.get("/stream").text == "ab"
@@ -0,0 +1,187 @@
+"""The column-tuple/orjson list endpoints must return exactly what the Pydantic schemas would,
+and ?fields= must narrow them."""
+from datetime import date
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import AuditLog, Employee, Project, User, WorkLog
+from app.routes.audit import AuditLogResponse
+from app.routes.employees import EmployeeResponse, LastEntry
+from app.routes.projects import ProjectResponse
+from app.routes.users import UserResponse
+from app.routes.work_logs import WorkLogResponse
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_fast_json.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def seeded():
+    db = TestingSessionLocal()
+    try:
+        anna = Employee(first_name="Anna", last_name="Nowak", email="anna@example.com", hourly_rate=42.5)
+        jan = Employee(first_name="Jan", last_name="Kowalski")
+        db.add_all([anna, jan])
+        db.flush()
+        db.add_all([
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 2), work_hours=Decimal("8.00"),
+                    overtime_hours=Decimal("1.25"), notes="Release"),
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 3), work_hours=Decimal("7.50")),
+        ])
+        project = Project(name="Migration", client="ACME", budget=1000.0, deadline=date(2026, 6, 30))
+        project.employees.append(anna)
+        db.add_all([project, Project(name="Idle", status="on_hold")])
+        admin = User(username="fast_admin", password_hash=pwd_context.hash("TestPass1"), role="admin")
+        db.add_all([admin, User(username="anna", password_hash="!", role="employee", employee_id=anna.id)])
+        db.flush()
+        db.add(AuditLog(user_id=admin.id, action="UPDATE", entity_type="employee", entity_id=anna.id,
+                        old_values='{"a": 1}', ip_address="127.0.0.1"))
+        db.commit()
+    finally:
+        db.close()
+    token = client.post("/api/auth/login", json={"username": "fast_admin", "password": "TestPass1"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _pydantic_json(schema, query):
+    db = TestingSessionLocal()
+    try:
+        # What FastAPI does with ORM objects and a response_model
+        adapter = TypeAdapter(List[schema])
+        return adapter.dump_python(adapter.validate_python(query(db), from_attributes=True), mode="json")
+    finally:
+        db.close()
+
+
+def test_work_logs_match_schema(seeded):
+    response = client.get("/api/work-logs", headers=seeded)
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    assert response.json() == _pydantic_json(WorkLogResponse, lambda db: db.query(WorkLog).all())
+    assert response.json()[0]["work_hours"] == "8.00"
+
+
+def test_employees_match_schema(seeded):
+    def expected(db):
+        employees = db.query(Employee).all()
+        for employee in employees:
+            last = db.query(WorkLog).filter(WorkLog.employee_id == employee.id) \
+                .order_by(WorkLog.work_date.desc()).first()
+            employee.last_entry = LastEntry(date=last.work_date, work_hours=float(last.work_hours)) if last else None
+        return employees
+
+    response = client.get("/api/employees", headers=seeded)
+    assert response.json() == _pydantic_json(EmployeeResponse, expected)
+    assert response.json()[0]["last_entry"] == {"date": "2026-03-03", "work_hours": 7.5}
+
+
+def test_projects_match_schema(seeded):
+    expected = _pydantic_json(
+        ProjectResponse, lambda db: db.query(Project).order_by(Project.created_at.desc()).all()
+    )
+    response = client.get("/api/projects", headers=seeded)
+    assert sorted(response.json(), key=lambda p: p["id"]) == sorted(expected, key=lambda p: p["id"])
+
+    filtered = client.get("/api/projects?status_filter=on_hold", headers=seeded).json()
+    assert [p["name"] for p in filtered] == ["Idle"]
+    assert filtered[0]["employees"] == []
+
+
+def test_users_and_audit_logs_match_schema(seeded):
+    response = client.get("/api/users", headers=seeded)
+    assert response.json() == _pydantic_json(UserResponse, lambda db: db.query(User).all())
+
+    response = client.get("/api/audit", headers=seeded)
+    assert response.json() == _pydantic_json(AuditLogResponse, lambda db: db.query(AuditLog).all())
+
+
+def test_fields_narrow_lists_and_details(seeded):
+    logs = client.get("/api/work-logs?fields=work_date,work_hours", headers=seeded).json()
+    assert logs[0] == {"work_date": "2026-03-02", "work_hours": "8.00"}
+
+    employees = client.get("/api/employees?fields=first_name,last_entry", headers=seeded).json()
+    assert employees == [
+        {"first_name": "Anna", "last_entry": {"date": "2026-03-03", "work_hours": 7.5}},
+        {"first_name": "Jan", "last_entry": None},
+    ]
+
+    users = client.get("/api/users?fields=username, employee", headers=seeded).json()
+    assert {"username": "anna", "employee": {"id": 1, "first_name": "Anna", "last_name": "Nowak"}} in users
+
+    audit = client.get("/api/audit?fields=action", headers=seeded).json()
+    assert audit == [{"action": "UPDATE"}]
+
+    projects = client.get("/api/projects?fields=id,name", headers=seeded).json()
+    project_id = next(p["id"] for p in projects if p["name"] == "Migration")
+    detail = client.get(f"/api/projects/{project_id}?fields=name,employees", headers=seeded)
+    assert detail.headers["etag"]
+    assert detail.json() == {
+        "name": "Migration",
+        "employees": [{"id": 1, "first_name": "Anna", "last_name": "Nowak", "email": "anna@example.com"}],
+    }
+
+
+def test_unrequested_relationships_are_not_queried(seeded):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/projects?fields=name,status", headers=seeded)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert sorted(response.json(), key=lambda p: p["name"]) == [
+        {"name": "Idle", "status": "on_hold"}, {"name": "Migration", "status": "planning"},
+    ]
+    assert not any("project_employees" in statement for statement in statements)
+
+
+def test_unknown_field_is_rejected(seeded):
+    response = client.get("/api/work-logs?fields=id,salary", headers=seeded)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: salary"
+
+
+def test_only_non_column_fields(seeded):
+    response = client.get("/api/work-logs?fields=warning", headers=seeded)
+    assert response.status_code == 200
+    assert response.json() == [{"warning": None}, {"warning": None}]
+
+    employees = client.get("/api/employees?fields=last_entry", headers=seeded).json()
+    assert employees[1] == {"last_entry": None}
+    users = client.get("/api/users?fields=employee", headers=seeded)
+    assert users.status_code == 200
@@ -0,0 +1,148 @@
+"""Tests for Arrow IPC and MessagePack output."""
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import formats
+from app.main import app
+from app.database import Base, get_db
+from app.models import Employee, User, WorkLog
+from app.services.executors import executors
+
+pa = pytest.importorskip("pyarrow")
+msgpack = pytest.importorskip("msgpack")
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_formats.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+ARROW = {"Accept": "application/vnd.apache.arrow.stream"}
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def headers():
+    db = TestingSessionLocal()
+    try:
+        anna = Employee(first_name="Anna", last_name="Nowak", hourly_rate=40)
+        db.add(anna)
+        db.flush()
+        db.add_all([
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 2), work_hours=Decimal("8.00"),
+                    overtime_hours=Decimal("1.50"), notes="Release"),
+            WorkLog(employee_id=anna.id, work_date=date(2026, 3, 3), work_hours=Decimal("7.25")),
+        ])
+        db.add(User(username="formats_admin", password_hash=pwd_context.hash("TestPass1"), role="admin"))
+        db.commit()
+    finally:
+        db.close()
+    token = client.post("/api/auth/login", json={"username": "formats_admin", "password": "TestPass1"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _arrow_table(response):
+    return pa.ipc.open_stream(response.content).read_all()
+
+
+def test_work_logs_as_arrow(headers):
+    response = client.get("/api/work-logs", headers={**headers, **ARROW})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert "accept" in response.headers["vary"].lower()
+    table = _arrow_table(response)
+    assert table.schema.field("work_hours").type == pa.float64()
+    assert table.schema.field("work_date").type == pa.date32()
+    assert table.column("work_hours").to_pylist() == [8.0, 7.25]
+    assert table.column("notes").to_pylist() == ["Release", None]
+
+    sparse = _arrow_table(client.get("/api/work-logs?fields=work_date,overtime_hours", headers={**headers, **ARROW}))
+    assert sparse.column_names == ["work_date", "overtime_hours"]
+
+
+def test_work_logs_as_msgpack(headers):
+    response = client.get("/api/work-logs?fields=work_date,work_hours", headers={**headers, **MSGPACK})
+    assert response.headers["content-type"] == "application/msgpack"
+    rows = list(msgpack.Unpacker(io.BytesIO(response.content)))
+    assert rows == [{"work_date": "2026-03-02", "work_hours": 8.0}, {"work_date": "2026-03-03", "work_hours": 7.25}]
+
+
+def test_binary_work_logs_answer_503_when_reporting_is_busy(headers, monkeypatch):
+    reporting = executors["reporting"]
+    monkeypatch.setattr(reporting, "queue_limit", -reporting.max_workers)
+    response = client.get("/api/work-logs", headers={**headers, **MSGPACK})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_representations_get_distinct_etags(headers):
+    as_json = client.get("/api/work-logs", headers=headers)
+    as_arrow = client.get("/api/work-logs", headers={**headers, **ARROW})
+    assert as_json.headers["etag"] != as_arrow.headers["etag"]
+    assert as_json.json()[0]["work_hours"] == "8.00"
+
+
+def test_summary_as_msgpack(headers):
+    response = client.get("/api/work-logs/summary", headers={**headers, **MSGPACK})
+    summary = msgpack.unpackb(response.content)
+    assert summary["total_work_hours"] == 15.25
+    assert summary["total_logs"] == 2
+    # Same caching headers as the JSON representation
+    assert response.headers["etag"]
+    assert "cache-control" in response.headers
+    assert "Accept" in response.headers["vary"]
+
+
+def test_payroll_export_as_arrow(headers):
+    response = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31&format=arrow", headers=headers
+    )
+    assert response.status_code == 200
+    table = _arrow_table(response)
+    assert table.column("employee_id").type == pa.int64()
+    assert table.column("total_hours").to_pylist() == [16.75]
+    assert table.column("total_cost").to_pylist() == [15.25 * 40 + 1.5 * 60]
+
+
+def test_unsupported_or_unavailable_formats_answer_406(headers, monkeypatch):
+    assert client.get("/api/work-logs", headers={**headers, "Accept": "text/csv"}).status_code == 406
+
+    # Falls back to JSON when the client also accepts it
+    monkeypatch.setitem(formats._PACKAGES, "arrow", "pyarrow_not_installed")
+    fallback = client.get("/api/work-logs", headers={**headers, "Accept": f"{ARROW['Accept']}, application/json;q=0.5"})
+    assert fallback.headers["content-type"] == "application/json"
+
+    response = client.get("/api/work-logs", headers={**headers, **ARROW})
+    assert response.status_code == 406
+    assert "application/msgpack" in response.json()["detail"]
+    response = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31&format=arrow", headers=headers
+    )
+    assert response.status_code == 406
@@ -0,0 +1,88 @@
+"""Tests for the shared rate limit storage and its local fallback."""
+from limits import parse
+from limits.storage import MemoryStorage, storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from starlette.requests import Request
+
+from app.middleware import auth as auth_module
+from app.limiter import FailoverStorage, get_rate_limit_key
+from app.middleware.principal_cache import Principal, principal_cache
+
+
+class _UnreachableStorage(MemoryStorage):
+    base_exceptions = ConnectionError
+
+    def __init__(self):
+        super().__init__()
+        self.down = True
+
+    def acquire_sliding_window_entry(self, *args, **kwargs):
+        if self.down:
+            raise ConnectionError("connection refused")
+        return super().acquire_sliding_window_entry(*args, **kwargs)
+
+    def get_sliding_window(self, *args, **kwargs):
+        if self.down:
+            raise ConnectionError("connection refused")
+        return super().get_sliding_window(*args, **kwargs)
+
+
+def _failover_storage(retry_interval: float = 60) -> FailoverStorage:
+    storage = storage_from_string(
+        "failover+redis://127.0.0.1:1/0",
+        retry_interval=retry_interval,
+        socket_connect_timeout=0.1,
+        socket_timeout=0.1,
+    )
+    assert isinstance(storage, FailoverStorage)
+    return storage
+
+
+def test_unreachable_redis_counts_locally():
+    storage = _failover_storage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse("2/minute")
+
+    assert limiter.hit(limit, "login", "10.0.0.1")
+    assert limiter.hit(limit, "login", "10.0.0.1")
+    assert not limiter.hit(limit, "login", "10.0.0.1")
+    assert storage.degraded
+    assert storage.failovers == 1
+
+
+def test_recovers_when_primary_is_back():
+    storage = _failover_storage(retry_interval=0)
+    storage.primary = _UnreachableStorage()
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse("5/minute")
+
+    assert limiter.hit(limit, "login", "10.0.0.1")
+    assert storage.degraded
+
+    storage.primary.down = False
+    assert limiter.hit(limit, "login", "10.0.0.1")
+    assert not storage.degraded
+    # The hit counted locally during the outage is not carried over
+    assert limiter.get_window_stats(limit, "login", "10.0.0.1").remaining == 4
+
+
+def _request(authorization: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", authorization.encode())],
+                    "client": ("203.0.113.7", 1234)})
+
+
+def test_key_uses_cached_principal_without_verifying_the_token(monkeypatch):
+    def fail(token):
+        raise AssertionError("token decoded")
+
+    principal_cache.put("cached-token", Principal(id=7, username="anna", role="employee", employee_id=None,
+                                                  force_password_change=False, created_at=None))
+    monkeypatch.setattr(auth_module, "decode_access_token", fail)
+    before = principal_cache.stats()
+    assert get_rate_limit_key(_request("Bearer cached-token")) == "user:7"
+    assert principal_cache.stats() == before
+
+    monkeypatch.setattr(auth_module, "decode_access_token", lambda token: {"id": 8})
+    assert get_rate_limit_key(_request("Bearer other-token")) == "user:8"
+    assert get_rate_limit_key(_request("")) == "203.0.113.7"
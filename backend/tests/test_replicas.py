@@ -0,0 +1,156 @@
+"""Tests for read-replica routing, with a primary and two replicas as separate SQLite files."""
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base
+from app.middleware.principal_cache import Principal, principal_cache
+from app.middleware.read_routing import STICKY_COOKIE, PrimaryPins, ReadRoutingMiddleware
+from app.models import Employee
+from app.replicas import Replica, ReplicaSet, RoutingSession, read_only
+
+PRIMARY_URL = "sqlite:///./test_replicas.db"
+REPLICA_URLS = ["sqlite:///./test_replicas_a.db", "sqlite:///./test_replicas_b.db"]
+
+primary = create_engine(PRIMARY_URL, connect_args={"check_same_thread": False})
+
+
+def _replica(url: str) -> Replica:
+    return Replica(
+        url,
+        create_engine(url, connect_args={"check_same_thread": False}),
+        create_async_engine(url.replace("sqlite", "sqlite+aiosqlite"), poolclass=NullPool),
+    )
+
+
+@pytest.fixture
+def replica_set():
+    """Each database holds one employee named after it."""
+    replicas = ReplicaSet([_replica(url) for url in REPLICA_URLS])
+    for name, bind in [("primary", primary)] + [(f"replica{i}", r.engine) for i, r in enumerate(replicas.replicas)]:
+        Base.metadata.drop_all(bind=bind)
+        Base.metadata.create_all(bind=bind)
+        with sessionmaker(bind=bind)() as db:
+            db.add(Employee(first_name=name, last_name="Nowak"))
+            db.commit()
+    yield replicas
+    for replica in replicas.replicas:
+        replica.engine.dispose()
+
+
+def _names(db) -> list:
+    return list(db.scalars(select(Employee.first_name)))
+
+
+def test_reads_go_to_replicas_round_robin(replica_set):
+    Session = sessionmaker(class_=RoutingSession, replicas=replica_set, bind=primary)
+    with Session() as db:
+        assert _names(db) == ["primary"]
+
+    with read_only():
+        seen = []
+        for _ in range(3):
+            with Session() as db:
+                seen.append(_names(db))
+                # A session keeps its replica
+                assert _names(db) == seen[-1]
+        assert seen == [["replica0"], ["replica1"], ["replica0"]]
+
+
+def test_reads_after_a_write_stay_on_the_primary(replica_set):
+    Session = sessionmaker(class_=RoutingSession, replicas=replica_set, bind=primary)
+    with read_only(), Session() as db:
+        db.add(Employee(first_name="new", last_name="Kowalski"))
+        db.flush()
+        assert _names(db) == ["primary", "new"]
+
+
+def test_unhealthy_replicas_are_skipped(replica_set, tmp_path):
+    down = Replica(f"sqlite:///{tmp_path}/missing/replica.db",
+                   create_engine(f"sqlite:///{tmp_path}/missing/replica.db"))
+    replicas = ReplicaSet([down, replica_set.replicas[1]])
+    replicas.check()
+    assert not down.healthy and down.error
+    assert [replicas.pick() for _ in range(2)] == [replica_set.replicas[1]] * 2
+
+    replica_set.replicas[1].healthy = False
+    Session = sessionmaker(class_=RoutingSession, replicas=replicas, bind=primary)
+    with read_only(), Session() as db:
+        assert _names(db) == ["primary"]
+
+    (tmp_path / "missing").mkdir()
+    replicas.check()
+    assert down.healthy and down.lag_seconds == 0.0
+
+
+def test_async_sessions_route_to_async_replica_engines(replica_set):
+    async_primary = create_async_engine(PRIMARY_URL.replace("sqlite", "sqlite+aiosqlite"), poolclass=NullPool)
+    AsyncSession = async_sessionmaker(async_primary, sync_session_class=RoutingSession,
+                                      replicas=replica_set, asynchronous=True)
+
+    async def names():
+        async with AsyncSession() as db:
+            return list(await db.scalars(select(Employee.first_name)))
+
+    async def scenario():
+        on_primary = await names()
+        with read_only():
+            on_replica = await names()
+        return on_primary, on_replica
+
+    assert asyncio.run(scenario()) == (["primary"], ["replica0"])
+
+
+def _names_app(replica_set) -> FastAPI:
+    Session = sessionmaker(class_=RoutingSession, replicas=replica_set, bind=primary)
+
+    def get_db():
+        with Session() as db:
+            yield db
+
+    api = FastAPI()
+
+    @api.get("/names")
+    def names(db=Depends(get_db)):
+        return _names(db)
+
+    @api.post("/names")
+    def add_name(db=Depends(get_db)):
+        db.add(Employee(first_name="written", last_name="Nowak"))
+        db.commit()
+        return _names(db)
+
+    return api
+
+
+def test_middleware_keeps_writers_on_the_primary(replica_set):
+    client = TestClient(ReadRoutingMiddleware(_names_app(replica_set), sticky_seconds=30, pins=PrimaryPins()))
+    assert client.get("/names").json() == ["replica0"]
+
+    response = client.post("/names")
+    assert response.json() == ["primary", "written"]
+    assert STICKY_COOKIE in response.cookies
+    # The client's cookie jar now pins its reads to the primary
+    assert client.get("/names").json() == ["primary", "written"]
+
+    client.cookies.clear()
+    assert client.get("/names").json() == ["replica1"]
+
+
+def test_bearer_clients_without_cookies_stay_on_the_primary(replica_set):
+    principal_cache.put("writer-token", Principal(id=5, username="writer", role="admin", employee_id=None,
+                                                  force_password_change=False, created_at=None))
+    client = TestClient(ReadRoutingMiddleware(_names_app(replica_set), sticky_seconds=30, pins=PrimaryPins()))
+    writer = {"Authorization": "Bearer writer-token"}
+
+    client.post("/names", headers=writer)
+    client.cookies.clear()
+    assert client.get("/names", headers=writer).json() == ["primary", "written"]
+    # Other users still read from the replicas
+    assert client.get("/names").json() == ["replica0"]
@@ -0,0 +1,405 @@
+"""Tests for report API routes."""
+import csv
+import io
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from passlib.context import CryptContext
+
+from app.main import app
+from app.database import Base, get_db
+from app.models import User, Employee, WorkLog, WorkLogCost
+from app.services.work_calendar import easter_sunday, polish_holidays, generate_work_calendar
+from app.services.cost_ledger import rebuild_cost_ledger
+from app.routes import reports as reports_module
+from app.services.executors import executors
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_reports.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _create_user(username="report_admin", password="TestPass1", role="admin"):
+    db = TestingSessionLocal()
+    try:
+        user = User(username=username, password_hash=pwd_context.hash(password), role=role)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+    finally:
+        db.close()
+
+
+def _create_employee(first_name, last_name, hourly_rate=None, overtime_rate=None):
+    db = TestingSessionLocal()
+    try:
+        emp = Employee(
+            first_name=first_name,
+            last_name=last_name,
+            hourly_rate=hourly_rate,
+            overtime_rate=overtime_rate,
+        )
+        db.add(emp)
+        db.commit()
+        db.refresh(emp)
+        return emp
+    finally:
+        db.close()
+
+
+def _add_log(employee_id, work_date, work_hours=8, overtime_hours=0, **hours):
+    db = TestingSessionLocal()
+    try:
+        db.add(WorkLog(
+            employee_id=employee_id,
+            work_date=work_date,
+            work_hours=work_hours,
+            overtime_hours=overtime_hours,
+            vacation_hours=hours.get("vacation_hours", 0),
+            sick_leave_hours=hours.get("sick_leave_hours", 0),
+            other_hours=hours.get("other_hours", 0),
+            absent_hours=hours.get("absent_hours", 0),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _auth(username="report_admin", password="TestPass1"):
+    resp = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['token']}"}
+
+
+# ====================== Payroll export ======================
+
+def test_payroll_csv_applies_employee_rates_and_fallbacks():
+    _create_user()
+    headers = _auth()
+    anna = _create_employee("Anna", "Nowak", hourly_rate=40.0, overtime_rate=70.0)
+    jan = _create_employee("Jan", "Kowalski")
+    _create_employee("Idle", "Zielinski")
+    _add_log(anna.id, date(2026, 3, 2), work_hours=8, overtime_hours=2)
+    _add_log(anna.id, date(2026, 3, 3), work_hours=8)
+    _add_log(jan.id, date(2026, 3, 2), work_hours=6, overtime_hours=1, absent_hours=2)
+    # Outside the period
+    _add_log(jan.id, date(2026, 4, 1), work_hours=8)
+
+    resp = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31"
+        "&hourly_rate=20&overtime_multiplier=2",
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = {int(r["employee_id"]): r for r in csv.DictReader(io.StringIO(resp.text))}
+    assert len(rows) == 3
+
+    assert float(rows[anna.id]["total_hours"]) == 18.0
+    assert float(rows[anna.id]["total_cost"]) == 16 * 40.0 + 2 * 70.0
+
+    assert float(rows[jan.id]["hourly_rate"]) == 20.0
+    assert float(rows[jan.id]["overtime_rate"]) == 40.0
+    assert float(rows[jan.id]["absent_hours"]) == 2.0
+    assert float(rows[jan.id]["total_cost"]) == 6 * 20.0 + 1 * 40.0
+
+
+def test_payroll_xlsx():
+    _create_user()
+    headers = _auth()
+    emp = _create_employee("Ewa", "Lis", hourly_rate=30.0)
+    _add_log(emp.id, date(2026, 3, 2))
+
+    resp = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31&format=xlsx",
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    sheet = load_workbook(io.BytesIO(resp.content)).active
+    rows = list(sheet.values)
+    assert rows[0][0] == "employee_id"
+    assert rows[1][0] == emp.id
+    assert rows[1][-1] == 240.0
+
+
+def test_payroll_rejects_inverted_period():
+    _create_user()
+    headers = _auth()
+    resp = client.get(
+        "/api/reports/payroll?start_date=2026-03-31&end_date=2026-03-01", headers=headers
+    )
+    assert resp.status_code == 400
+
+
+def test_payroll_requires_admin():
+    _create_user(username="report_manager", role="manager")
+    headers = _auth(username="report_manager")
+    resp = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31", headers=headers
+    )
+    assert resp.status_code == 403
+
+
+def test_payroll_is_refused_with_503_when_reporting_is_busy(monkeypatch):
+    _create_user()
+    headers = _auth()
+    reporting = executors["reporting"]
+    monkeypatch.setattr(reporting, "queue_limit", -reporting.max_workers)
+    resp = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31", headers=headers
+    )
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+    assert resp.json() == {"detail": "Reporting is busy, please retry shortly"}
+
+
+# ====================== Work calendar / expected hours ======================
+
+def test_easter_and_movable_holidays():
+    assert easter_sunday(2024) == date(2024, 3, 31)
+    assert easter_sunday(2025) == date(2025, 4, 20)
+    assert easter_sunday(2026) == date(2026, 4, 5)
+    holidays = polish_holidays(2026)
+    assert date(2026, 4, 6) in holidays        # Easter Monday
+    assert date(2026, 6, 4) in holidays        # Corpus Christi
+    assert date(2026, 12, 24) in holidays
+    assert date(2024, 12, 24) not in polish_holidays(2024)
+
+
+def test_expected_hours_requires_generated_calendar():
+    _create_user()
+    headers = _auth()
+    resp = client.get(
+        "/api/reports/expected-hours?start_date=2026-03-01&end_date=2026-03-31", headers=headers
+    )
+    assert resp.status_code == 409
+
+
+def test_expected_hours_per_employee_month():
+    _create_user()
+    headers = _auth()
+    db = TestingSessionLocal()
+    try:
+        generate_work_calendar(db, [2026])
+    finally:
+        db.close()
+    emp = _create_employee("Anna", "Nowak")
+    _create_employee("Jan", "Kowalski")
+    _add_log(emp.id, date(2026, 4, 1), work_hours=8, overtime_hours=1)
+    _add_log(emp.id, date(2026, 4, 2), work_hours=0, vacation_hours=8)
+
+    resp = client.get(
+        f"/api/reports/expected-hours?start_date=2026-03-01&end_date=2026-04-30&employee_id={emp.id}",
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["hours_per_day"] == 8.0
+    march, april = data["rows"]
+    assert (march["month"], march["working_days"], march["expected_hours"]) == (3, 22, 176.0)
+    assert march["deficit_hours"] == 176.0
+    # Easter Monday (6 April) is a holiday
+    assert (april["month"], april["working_days"]) == (4, 21)
+    assert april["worked_hours"] == 8.0
+    assert april["leave_hours"] == 8.0
+    assert april["overtime_hours"] == 1.0
+    assert april["balance_hours"] == 16.0 - 168.0
+    assert april["deficit_hours"] == 152.0
+
+    resp = client.get(
+        "/api/reports/expected-hours?start_date=2026-03-01&end_date=2026-04-30", headers=headers
+    )
+    assert len(resp.json()["rows"]) == 4
+
+
+# ====================== Rate history / cost ledger ======================
+
+def _post_log(headers, employee_id, work_date, work_hours=8.0, overtime_hours=0.0):
+    resp = client.post("/api/work-logs", json={
+        "employee_id": employee_id,
+        "work_date": work_date,
+        "work_hours": work_hours,
+        "overtime_hours": overtime_hours,
+    }, headers=headers)
+    assert resp.status_code == 201, resp.text
+
+
+def test_work_log_cost_recorded_at_write_time():
+    _create_user()
+    headers = _auth()
+    emp = client.post("/api/employees", json={
+        "first_name": "Ola", "last_name": "Wrona", "hourly_rate": 30.0, "overtime_rate": 50.0,
+    }, headers=headers).json()
+    _post_log(headers, emp["id"], "2026-03-02", work_hours=8, overtime_hours=2)
+
+    db = TestingSessionLocal()
+    try:
+        entry = db.query(WorkLogCost).filter(WorkLogCost.employee_id == emp["id"]).one()
+        assert float(entry.total_cost) == 8 * 30.0 + 2 * 50.0
+    finally:
+        db.close()
+
+    rates = client.get(f"/api/employees/{emp['id']}/rates", headers=headers).json()
+    assert [r["hourly_rate"] for r in rates] == [30.0]
+
+
+def test_effective_dated_rate_reprices_ledger(monkeypatch):
+    _create_user()
+    headers = _auth()
+    emp = client.post("/api/employees", json={
+        "first_name": "Piotr", "last_name": "Sowa",
+    }, headers=headers).json()
+    _post_log(headers, emp["id"], "2026-03-02")
+    _post_log(headers, emp["id"], "2026-03-20")
+
+    for rate, effective_from in ((30.0, "2026-01-01"), (40.0, "2026-03-15")):
+        resp = client.post(f"/api/employees/{emp['id']}/rates", json={
+            "hourly_rate": rate, "effective_from": effective_from,
+        }, headers=headers)
+        assert resp.status_code == 201, resp.text
+    assert client.get(f"/api/employees/{emp['id']}", headers=headers).json()["hourly_rate"] == 40.0
+
+    report = client.get(
+        f"/api/reports/owner/{emp['id']}?start_date=2026-03-01&end_date=2026-03-31", headers=headers
+    ).json()
+    assert report["rates"]["source"] == "ledger"
+    assert [log["costs"]["total_cost"] for log in report["work_logs"]] == [240.0, 320.0]
+    assert report["totals"]["total_cost"] == 560.0
+
+    # Explicit rates still override the ledger, without loading the rate history
+    monkeypatch.setattr(reports_module, "RateBook", None)
+    override = client.get(
+        f"/api/reports/owner/{emp['id']}?start_date=2026-03-01&end_date=2026-03-31&hourly_rate=10",
+        headers=headers,
+    ).json()
+    assert override["totals"]["total_cost"] == 160.0
+
+    payroll = client.get(
+        "/api/reports/payroll?start_date=2026-03-01&end_date=2026-03-31", headers=headers
+    )
+    row = next(csv.DictReader(io.StringIO(payroll.text)))
+    assert float(row["total_cost"]) == 560.0
+
+
+
+def test_only_admins_write_rates():
+    emp = _create_employee("Ewa", "Kos", hourly_rate=30.0)
+    for username, role in (("rate_employee", "employee"), ("rate_manager", "manager")):
+        user = _create_user(username=username, role=role)
+        db = TestingSessionLocal()
+        try:
+            db.get(User, user.id).employee_id = emp.id
+            db.commit()
+        finally:
+            db.close()
+        headers = _auth(username=username)
+
+        resp = client.post(f"/api/employees/{emp.id}/rates", json={
+            "hourly_rate": 300.0, "effective_from": "2026-01-01",
+        }, headers=headers)
+        assert resp.status_code == 403
+        resp = client.put(f"/api/employees/{emp.id}", json={
+            "first_name": "Ewa", "last_name": "Kos", "hourly_rate": 300.0,
+        }, headers=headers)
+        assert resp.status_code == 403
+
+    db = TestingSessionLocal()
+    try:
+        assert float(db.get(Employee, emp.id).hourly_rate) == 30.0
+    finally:
+        db.close()
+
+def test_rebuild_cost_ledger_fills_missing_entries():
+    emp = _create_employee("Ewa", "Lis", hourly_rate=20.0)
+    _add_log(emp.id, date(2026, 3, 2), work_hours=5)
+    db = TestingSessionLocal()
+    try:
+        assert rebuild_cost_ledger(db) == 1
+        assert float(db.query(WorkLogCost).one().total_cost) == 100.0
+    finally:
+        db.close()
+
+
+# ====================== Comparison report ======================
+
+def test_comparison_report_single_pass_periods():
+    _create_user()
+    headers = _auth()
+    emp = _create_employee("Anna", "Nowak")
+    other = _create_employee("Jan", "Kowalski")
+    _add_log(emp.id, date(2026, 3, 2), work_hours=8, overtime_hours=2)
+    _add_log(emp.id, date(2026, 3, 3), work_hours=8)
+    _add_log(emp.id, date(2026, 2, 10), work_hours=6, vacation_hours=2)
+    _add_log(emp.id, date(2025, 3, 10), work_hours=4)
+    _add_log(emp.id, date(2026, 1, 10), work_hours=8)   # in none of the periods
+    _add_log(other.id, date(2026, 3, 2), work_hours=8)
+
+    resp = client.get("/api/reports/comparison?year=2026&month=3", headers=headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [p["label"] for p in data["periods"]] == ["2026-03", "2026-02", "2025-03"]
+    assert len(data["employees"]) == 2
+
+    anna = next(e for e in data["employees"] if e["employee"]["id"] == emp.id)
+    assert anna["periods"]["current"]["total_hours"] == 18.0
+    assert anna["periods"]["current"]["days_logged"] == 2
+    assert anna["periods"]["previous_month"]["leave_hours"] == 2.0
+    assert anna["periods"]["previous_year"]["total_hours"] == 4.0
+    assert anna["change"]["vs_previous_month"] == {"hours": 10.0, "percent": 125.0}
+    assert data["totals"]["current"]["total_hours"] == 26.0
+
+    single = client.get(
+        f"/api/reports/comparison?year=2026&month=1&employee_id={other.id}", headers=headers
+    ).json()
+    assert len(single["employees"]) == 1
+    # January compares against December of the previous year
+    assert single["periods"][1]["label"] == "2025-12"
+    assert single["employees"][0]["change"]["vs_previous_year"]["percent"] is None
+
+
+def test_comparison_report_team_and_pdf():
+    manager = _create_user(username="report_manager", role="manager")
+    _create_user()
+    headers = _auth()
+    emp = _create_employee("Anna", "Nowak")
+    _create_employee("Jan", "Kowalski")
+    client.post("/api/assignments", json={"manager_user_id": manager.id, "employee_id": emp.id},
+                headers=headers)
+
+    team = client.get(
+        f"/api/reports/comparison?year=2026&month=3&manager_id={manager.id}", headers=headers
+    ).json()
+    assert [e["employee"]["id"] for e in team["employees"]] == [emp.id]
+
+    pdf = client.get("/api/reports/comparison?year=2026&month=3&format=pdf", headers=headers)
+    assert pdf.status_code == 200
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF")
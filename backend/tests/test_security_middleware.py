@@ -0,0 +1,75 @@
+"""Tests for the ASGI security middleware."""
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.middleware.security import (
+    HttpsEnforcementMiddleware,
+    SecurityHeadersMiddleware,
+    SecurityLoggingMiddleware,
+)
+
+client = TestClient(app)
+
+
+def _wrapped_app(middleware, **options) -> TestClient:
+    inner = FastAPI()
+
+    @inner.get("/plain")
+    def plain():
+        return PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    @inner.get("/denied")
+    def denied():
+        return PlainTextResponse("no", status_code=403)
+
+    @inner.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]), media_type="text/plain")
+
+    inner.add_middleware(middleware, **options)
+    return TestClient(inner)
+
+
+def test_security_headers_added():
+    response = client.get("/health")
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["cache-control"] == "no-store"
+    assert "default-src 'self'" in response.headers["content-security-policy"]
+
+
+def test_security_headers_replace_existing_and_keep_streams():
+    wrapped = _wrapped_app(SecurityHeadersMiddleware)
+    response = wrapped.get("/plain")
+    assert response.headers.get_list("x-frame-options") == ["DENY"]
+
+    response = wrapped.get("/stream")
+    assert response.text == "abc"
+    assert response.headers["strict-transport-security"].startswith("max-age=")
+
+
+def test_security_headers_skip_preflight():
+    response = _wrapped_app(SecurityHeadersMiddleware).options("/plain")
+    assert "content-security-policy" not in response.headers
+
+
+def test_https_enforcement_redirects_forwarded_http():
+    wrapped = _wrapped_app(HttpsEnforcementMiddleware, force_https=True)
+    response = wrapped.get("/plain?x=1", headers={"X-Forwarded-Proto": "http"}, follow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"] == "https://testserver/plain?x=1"
+    assert wrapped.get("/plain", headers={"X-Forwarded-Proto": "https"}).status_code == 200
+
+
+def test_security_logging_reports_denied_requests(caplog):
+    wrapped = _wrapped_app(SecurityLoggingMiddleware)
+    with caplog.at_level(logging.WARNING, logger="security"):
+        wrapped.get("/plain")
+        wrapped.get("/denied", headers={"X-Forwarded-For": "10.0.0.7, 10.0.0.1"})
+    assert len(caplog.records) == 1
+    assert "status=403" in caplog.records[0].getMessage()
+    assert "ip=10.0.0.7" in caplog.records[0].getMessage()
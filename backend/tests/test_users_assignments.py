@@ -7,6 +7,7 @@ from passlib.context import CryptContext
 
 from app.main import app
 from app.database import Base, get_db
+from app.middleware.scoping import assignment_cache
 from app.models import User, Employee, ManagerEmployeeAssignment
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_users.db"
@@ -334,6 +335,28 @@ class TestChangePassword:
         assert resp.status_code == 422
 
 
+class TestPrincipalCache:
+    def test_role_change_applies_to_cached_token(self):
+        _create_user("admin1", "Admin123!", "admin")
+        user = _create_user("emp1", "EmpPass1!", "employee")
+        admin_token = _get_token("admin1", "Admin123!")
+        emp_token = _get_token("emp1", "EmpPass1!")
+        assert client.get("/api/users", headers=_auth(emp_token)).status_code == 403
+
+        client.put(f"/api/users/{user.id}", headers=_auth(admin_token), json={"role": "admin"})
+        assert client.get("/api/users", headers=_auth(emp_token)).status_code == 200
+
+    def test_deleted_user_token_rejected(self):
+        _create_user("admin1", "Admin123!", "admin")
+        user = _create_user("emp1", "EmpPass1!", "employee")
+        admin_token = _get_token("admin1", "Admin123!")
+        emp_token = _get_token("emp1", "EmpPass1!")
+        assert client.get("/api/auth/me", headers=_auth(emp_token)).status_code == 200
+
+        client.delete(f"/api/users/{user.id}", headers=_auth(admin_token))
+        assert client.get("/api/auth/me", headers=_auth(emp_token)).status_code == 403
+
+
 # ====================== Assignments ======================
 
 class TestAssignments:
@@ -438,3 +461,92 @@ class TestAssignments:
         token = _get_token("admin1", "Admin123!")
         resp = client.delete("/api/assignments/9999", headers=_auth(token))
         assert resp.status_code == 404
+
+
+class TestDataScope:
+    def _assign(self, admin_token, manager_id, employee_id):
+        return client.post(
+            "/api/assignments",
+            headers=_auth(admin_token),
+            json={"manager_user_id": manager_id, "employee_id": employee_id},
+        )
+
+    def test_manager_sees_only_assigned_employees(self):
+        _create_user("admin1", "Admin123!", "admin")
+        manager = _create_user("mgr1", "MgrPass1!", "manager")
+        assigned = _create_employee("Anna", "Nowak")
+        other = _create_employee("Jan", "Kowalski")
+        self._assign(_get_token("admin1", "Admin123!"), manager.id, assigned.id)
+        token = _get_token("mgr1", "MgrPass1!")
+
+        resp = client.get("/api/employees", headers=_auth(token))
+        assert resp.status_code == 200
+        assert [e["id"] for e in resp.json()] == [assigned.id]
+        assert client.get(f"/api/employees/{assigned.id}", headers=_auth(token)).status_code == 200
+        assert client.get(f"/api/employees/{other.id}", headers=_auth(token)).status_code == 403
+
+    def test_manager_work_logs_scoped(self):
+        _create_user("admin1", "Admin123!", "admin")
+        manager = _create_user("mgr1", "MgrPass1!", "manager")
+        assigned = _create_employee("Anna", "Nowak")
+        other = _create_employee("Jan", "Kowalski")
+        admin_token = _get_token("admin1", "Admin123!")
+        self._assign(admin_token, manager.id, assigned.id)
+        for emp in (assigned, other):
+            resp = client.post(
+                "/api/work-logs",
+                headers=_auth(admin_token),
+                json={"employee_id": emp.id, "work_date": "2026-03-02", "work_hours": 8},
+            )
+            assert resp.status_code == 201
+        token = _get_token("mgr1", "MgrPass1!")
+
+        resp = client.get("/api/work-logs", headers=_auth(token))
+        assert {log["employee_id"] for log in resp.json()} == {assigned.id}
+        resp = client.post(
+            "/api/work-logs",
+            headers=_auth(token),
+            json={"employee_id": other.id, "work_date": "2026-03-03", "work_hours": 8},
+        )
+        assert resp.status_code == 403
+
+    def test_assignment_changes_apply_immediately(self):
+        _create_user("admin1", "Admin123!", "admin")
+        manager = _create_user("mgr1", "MgrPass1!", "manager")
+        emp = _create_employee("Anna", "Nowak")
+        admin_token = _get_token("admin1", "Admin123!")
+        token = _get_token("mgr1", "MgrPass1!")
+        assert client.get(f"/api/employees/{emp.id}", headers=_auth(token)).status_code == 403
+
+        assignment_id = self._assign(admin_token, manager.id, emp.id).json()["id"]
+        assert client.get(f"/api/employees/{emp.id}", headers=_auth(token)).status_code == 200
+
+        client.delete(f"/api/assignments/{assignment_id}", headers=_auth(admin_token))
+        assert client.get(f"/api/employees/{emp.id}", headers=_auth(token)).status_code == 403
+
+    def test_user_changes_drop_cached_assignments(self):
+        _create_user("admin1", "Admin123!", "admin")
+        manager = _create_user("mgr1", "MgrPass1!", "manager")
+        emp = _create_employee("Anna", "Nowak")
+        admin_token = _get_token("admin1", "Admin123!")
+        self._assign(admin_token, manager.id, emp.id)
+        token = _get_token("mgr1", "MgrPass1!")
+
+        assert client.get(f"/api/employees/{emp.id}", headers=_auth(token)).status_code == 200
+        assert manager.id in assignment_cache._sets
+        client.put(f"/api/users/{manager.id}", headers=_auth(admin_token), json={"role": "employee"})
+        assert manager.id not in assignment_cache._sets
+
+        client.put(f"/api/users/{manager.id}", headers=_auth(admin_token), json={"role": "manager"})
+        assert client.get(f"/api/employees/{emp.id}", headers=_auth(token)).status_code == 200
+        client.delete(f"/api/users/{manager.id}", headers=_auth(admin_token))
+        assert manager.id not in assignment_cache._sets
+
+    def test_employee_sees_only_own_record(self):
+        own = _create_employee("Anna", "Nowak")
+        other = _create_employee("Jan", "Kowalski")
+        _create_user("emp1", "EmpPass1!", "employee", employee_id=own.id)
+        token = _get_token("emp1", "EmpPass1!")
+        resp = client.get("/api/employees", headers=_auth(token))
+        assert [e["id"] for e in resp.json()] == [own.id]
+        assert client.get(f"/api/employees/{other.id}", headers=_auth(token)).status_code == 403
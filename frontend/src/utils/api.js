@@ -4,6 +4,8 @@ const API_URL = process.env.REACT_APP_API_URL || '';
 
 const api = axios.create({
   baseURL: API_URL,
+  // Sends the API's read-your-writes cookie back when it is on another origin
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json'
   }